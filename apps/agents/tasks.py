@@ -5,6 +5,7 @@ from celery import shared_task
 from django.utils import timezone
 from django.db import transaction
 from .models import Agent, AgentExecution, AgentSchedule
+from apps.geodata.geometry_cache import load_layer_geometries
 import logging
 import sys
 import traceback
@@ -41,6 +42,8 @@ def execute_agent(self, execution_id):
             'input_datasets': list(execution.input_datasets.all()),
             'output_data': {},
             'output_layers': [],
+            # (ids, geometrías shapely) de una capa desde la caché de geometrías
+            'load_geometries': load_layer_geometries,
         }
         
         # Capture stdout and stderr
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("alerts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="alertlog",
+            name="alerts_aler_sent_at_5d07b5_idx",
+        ),
+        migrations.AddIndex(
+            model_name="alertlog",
+            index=models.Index(
+                fields=["sent_at", "id"], name="alerts_alertlog_keyset"
+            ),
+        ),
+    ]
@@ -498,7 +498,7 @@ class AlertLog(models.Model):
         indexes = [
             models.Index(fields=['alert', 'status']),
             models.Index(fields=['channel', 'status']),
-            models.Index(fields=['sent_at']),
+            models.Index(fields=['sent_at', 'id'], name='alerts_alertlog_keyset'),
         ]
     
     def __str__(self):
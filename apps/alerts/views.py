@@ -30,6 +30,7 @@ from .serializers import (
 from .filters import AlertRuleFilter, AlertFilter
 from .tasks import send_alert, test_alert_channel
 from apps.users.permissions import IsAnalystOrAbove
+from apps.core.pagination import KeysetPagination
 import logging
 
 logger = logging.getLogger(__name__)
@@ -323,6 +324,8 @@ class AlertLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AlertLog.objects.select_related('alert', 'channel', 'recipient').all()
     serializer_class = AlertLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering_field = 'sent_at'
     
     def get_queryset(self):
         """Filter queryset based on permissions."""
@@ -13,16 +13,16 @@ class GeneratedFileAdmin(admin.ModelAdmin):
         'user', 'download_count', 'created_at', 'expires_at', 'is_expired_display'
     ]
     list_filter = ['category', 'status', 'created_at', 'expires_at']
-    search_fields = ['file_path', 'user__username', 'hash_md5']
+    search_fields = ['file_path', 'user__username', 'hash_md5', 'cache_key']
     readonly_fields = [
-        'file_path', 'size', 'hash_md5', 'created_at', 'last_accessed',
+        'file_path', 'size', 'hash_md5', 'cache_key', 'created_at', 'last_accessed',
         'download_count', 'deleted_at'
     ]
     date_hierarchy = 'created_at'
     
     fieldsets = (
         ('File Information', {
-            'fields': ('file_path', 'category', 'status', 'size', 'hash_md5')
+            'fields': ('file_path', 'category', 'status', 'size', 'hash_md5', 'cache_key')
         }),
         ('User & Access', {
             'fields': ('user', 'download_count', 'last_accessed')
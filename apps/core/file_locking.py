@@ -144,7 +144,8 @@ class FileRegistry:
                      category: str,
                      user_id: Optional[int] = None,
                      ttl_hours: Optional[int] = None,
-                     metadata: dict = None) -> GeneratedFile:
+                     metadata: dict = None,
+                     cache_key: str = '') -> GeneratedFile:
         """
         Registra un archivo en la base de datos.
         
@@ -154,6 +155,7 @@ class FileRegistry:
             user_id: ID del usuario que lo generó
             ttl_hours: Tiempo de vida en horas (None = usa default por categoría)
             metadata: Metadata adicional
+            cache_key: Clave para reutilizar el archivo (ver find_cached)
         
         Returns:
             Instancia de GeneratedFile
@@ -205,6 +207,7 @@ class FileRegistry:
             existing.expires_at = expires_at
             existing.status = 'ready'
             existing.metadata = metadata or {}
+            existing.cache_key = cache_key or existing.cache_key
             existing.save()
             logger.info(f"Updated existing file record: {file_path}")
             return existing
@@ -218,12 +221,35 @@ class FileRegistry:
             hash_md5=md5_hash,
             expires_at=expires_at,
             status='ready',
-            metadata=metadata or {}
+            metadata=metadata or {},
+            cache_key=cache_key
         )
         
         logger.info(f"Registered file: {file_path} (expires: {expires_at})")
         return file_record
     
+    @staticmethod
+    def find_cached(cache_key: str) -> Optional[GeneratedFile]:
+        """
+        Busca un archivo vigente registrado con cache_key.
+        
+        Returns:
+            El GeneratedFile más reciente que puede descargarse, o None
+        """
+        from apps.core.models import GeneratedFile
+        
+        candidates = GeneratedFile.objects.filter(
+            cache_key=cache_key,
+            deleted_at__isnull=True,
+            expires_at__gt=timezone.now(),
+            status__in=['ready', 'downloading']
+        ).order_by('-created_at')
+        
+        for file_record in candidates[:5]:
+            if file_record.exists_on_disk():
+                return file_record
+        return None
+    
     @staticmethod
     def _calculate_md5(file_path: str) -> str:
         """Calcula hash MD5 del archivo."""
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="generatedfile",
+            name="cache_key",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Clave de reutilización (p. ej. exportaciones idénticas)",
+                max_length=64,
+            ),
+        ),
+    ]
@@ -77,6 +77,12 @@ class GeneratedFile(models.Model):
     last_accessed = models.DateTimeField(null=True, blank=True)
     
     metadata = models.JSONField(default=dict, blank=True)
+    cache_key = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="Clave de reutilización (p. ej. exportaciones idénticas)"
+    )
     
     class Meta:
         db_table = 'core_generated_file'
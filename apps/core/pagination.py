@@ -0,0 +1,228 @@
+"""
+Paginación por keyset (cursor) para listados de alto volumen.
+
+En lugar de OFFSET/LIMIT y un COUNT(*) por página, cada página se pide con
+un cursor opaco que codifica la última clave vista (campo de orden, id):
+
+    WHERE (created_at, id) < (:created_at, :id) ORDER BY created_at DESC, id DESC LIMIT n
+
+El coste por página es constante con un índice sobre (campo, id). El total
+es opcional: ?count=approximate lo estima con pg_class.reltuples (sin
+filtros) o con la estimación de filas del planificador (con filtros), y
+?count=exact ejecuta COUNT(*).
+"""
+import base64
+import json
+import logging
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+logger = logging.getLogger(__name__)
+
+COUNT_MODES = ('none', 'approximate', 'exact')
+
+
+def encode_cursor(value, pk, reverse: bool = False) -> str:
+    """Codifica la posición (valor, id, dirección) como cursor opaco."""
+    payload = {'v': value.isoformat() if hasattr(value, 'isoformat') else value, 'id': pk}
+    if reverse:
+        payload['r'] = 1
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Decodifica un cursor.
+
+    Returns:
+        Tupla (valor, id, reverse)
+
+    Raises:
+        NotFound: Si el cursor no es válido
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        value = payload['v']
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        return (parsed or value), int(payload['id']), bool(payload.get('r'))
+    except (ValueError, KeyError, TypeError):
+        raise NotFound('Cursor no válido')
+
+
+def approximate_count(queryset) -> int:
+    """
+    Estima el total de filas sin COUNT(*).
+
+    Sin filtros usa pg_class.reltuples de la tabla; con filtros usa la
+    estimación de filas del planificador (EXPLAIN). En bases de datos que no
+    son PostgreSQL hace COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] is not None and row[0] >= 0:
+            return int(row[0])
+        return queryset.count()
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por keyset sobre (ordering_field, id), en orden descendente.
+
+    La vista puede cambiar el campo con el atributo keyset_ordering_field
+    (p. ej. 'started_at' en SyncLog).
+    """
+
+    ordering_field = 'created_at'
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def get_ordering_field(self, view) -> str:
+        return getattr(view, 'keyset_ordering_field', self.ordering_field)
+
+    def get_page_size(self, request) -> int:
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Debe ser un entero'})
+        return max(1, min(size, self.max_page_size))
+
+    def get_count_mode(self, request) -> str:
+        mode = request.query_params.get(self.count_query_param, 'none')
+        if mode not in COUNT_MODES:
+            raise ValidationError({self.count_query_param: f'Opciones: {", ".join(COUNT_MODES)}'})
+        return mode
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.field = self.get_ordering_field(view)
+        self.page_size = self.get_page_size(request)
+        self.count_mode = self.get_count_mode(request)
+        self.count = None
+
+        if self.count_mode == 'exact':
+            self.count = queryset.count()
+        elif self.count_mode == 'approximate':
+            self.count = approximate_count(queryset)
+
+        field = self.field
+        cursor = request.query_params.get(self.cursor_query_param)
+        reverse = False
+
+        if cursor:
+            value, pk, reverse = decode_cursor(cursor)
+            if reverse:
+                # Página anterior: claves mayores, recorridas en orden ascendente
+                queryset = queryset.filter(**{f'{field}__gte': value}).filter(
+                    Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+                )
+            else:
+                queryset = queryset.filter(**{f'{field}__lte': value}).filter(
+                    Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+                )
+
+        ordering = (field, 'pk') if reverse else (f'-{field}', '-pk')
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not reverse else True
+        self.has_previous = bool(cursor) and (has_more if reverse else True)
+        return rows
+
+    def _key(self, obj):
+        return getattr(obj, self.field), obj.pk
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        value, pk = self._key(self.page[-1])
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(value, pk))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        value, pk = self._key(self.page[0])
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(value, pk, reverse=True))
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_is_approximate'] = self.count_mode == 'approximate'
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'count_is_approximate': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor de paginación (tomado de next/previous)',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Resultados por página (máx. {self.max_page_size})',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Total: none (por defecto), approximate o exact',
+                'schema': {'type': 'string', 'enum': list(COUNT_MODES)},
+            },
+        ]
@@ -4,7 +4,7 @@ Admin configuration for Geodata app.
 from django.contrib import admin
 from django.contrib.gis.admin import GISModelAdmin
 from django.utils.html import format_html
-from .models import DataSource, Layer, Feature, Dataset, SyncLog
+from .models import DataSource, Layer, Feature, Dataset, SyncLog, UploadSession
 
 
 @admin.register(DataSource)
@@ -205,3 +205,17 @@ class SyncLogAdmin(admin.ModelAdmin):
                 return f"{seconds/3600:.1f}h"
         return "En progreso"
     duration.short_description = 'Duración'
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    """Admin configuration for UploadSession model."""
+    list_display = ['id', 'filename', 'created_by', 'status', 'total_size', 'created_at', 'expires_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['filename', 'created_by__username']
+    readonly_fields = ['id', 'created_by', 'filename', 'total_size', 'chunk_size', 'checksum',
+                       'layer', 'task_id', 'error_message', 'created_at', 'updated_at']
+    
+    def has_add_permission(self, request):
+        """Sessions are created through the API."""
+        return False
@@ -0,0 +1,173 @@
+"""
+Operaciones masivas sobre features.
+
+Los signals de Feature mantienen las estadísticas de la capa aplicando
+deltas (ver geodata.statistics). Dentro de bulk_operation() los deltas se
+acumulan por capa y se aplican en una sola escritura al salir del bloque.
+Los borrados dejan la capa 'stale' y programan update_layer_statistics
+(recomputación completa) una sola vez por capa. El debounce es la marca
+Layer.statistics_scheduled_at, reclamada con un UPDATE condicional, así que
+se comparte entre procesos de gunicorn y workers de Celery.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .statistics import (
+    StatsDelta,
+    apply_delta,
+    feature_added_delta,
+    feature_changed_delta,
+    feature_removed_delta,
+)
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+
+def in_bulk_operation() -> bool:
+    """Indica si el hilo actual está dentro de bulk_operation()."""
+    return getattr(_state, 'pending', None) is not None
+
+
+def claim_statistics_schedule(layer_id) -> bool:
+    """
+    Marca la capa con una recomputación programada si no la tiene ya.
+
+    La marca vence a los GEODATA_STATS_DEBOUNCE + 60 segundos, por si la
+    tarea se perdió.
+
+    Returns:
+        True si este proceso reclamó la marca (y debe encolar la tarea)
+    """
+    from .models import Layer
+
+    countdown = getattr(settings, 'GEODATA_STATS_DEBOUNCE', 10)
+    now = timezone.now()
+    expired = now - timedelta(seconds=countdown + 60)
+    return bool(
+        Layer.objects.filter(id=layer_id)
+        .filter(Q(statistics_scheduled_at__isnull=True) | Q(statistics_scheduled_at__lt=expired))
+        .update(statistics_scheduled_at=now)
+    )
+
+
+def release_statistics_schedule(layer_id):
+    """Libera la marca: los cambios posteriores programan una tarea nueva."""
+    from .models import Layer
+
+    Layer.objects.filter(id=layer_id).update(statistics_scheduled_at=None)
+
+
+def enqueue_layer_statistics(layer_ids):
+    """Encola la recomputación de estadísticas una sola vez por capa (con debounce)."""
+    from .tasks import update_layer_statistics
+
+    countdown = getattr(settings, 'GEODATA_STATS_DEBOUNCE', 10)
+
+    for layer_id in layer_ids:
+        if claim_statistics_schedule(layer_id):
+            update_layer_statistics.apply_async((layer_id,), countdown=countdown)
+        else:
+            logger.debug(f"Layer statistics already scheduled for layer {layer_id}")
+
+
+def schedule_layer_statistics(layer_id, using: str = 'default'):
+    """
+    Programa la recomputación completa de estadísticas de una capa.
+
+    Dentro de bulk_operation() solo se marca la capa; fuera, se encola al
+    confirmar la transacción actual.
+    """
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending.setdefault(layer_id, StatsDelta()).stale = True
+        return
+
+    transaction.on_commit(lambda: enqueue_layer_statistics([layer_id]), using=using)
+
+
+def record_layer_delta(layer_id, delta: StatsDelta, using: str = 'default'):
+    """
+    Aplica (o acumula, dentro de bulk_operation) un delta de estadísticas.
+
+    Args:
+        layer_id: ID de la capa
+        delta: Cambios a registrar
+        using: Alias de la base de datos
+    """
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending.setdefault(layer_id, StatsDelta()).merge(delta)
+        return
+
+    apply_delta(layer_id, delta)
+    if delta.stale:
+        schedule_layer_statistics(layer_id, using=using)
+
+
+def record_feature_saved(feature, created: bool, using: str = 'default'):
+    """Registra la creación o modificación de un Feature."""
+    delta = feature_added_delta(feature) if created else feature_changed_delta(feature)
+    record_layer_delta(feature.layer_id, delta, using=using)
+
+
+def record_feature_deleted(feature, using: str = 'default'):
+    """Registra la eliminación de un Feature."""
+    record_layer_delta(feature.layer_id, feature_removed_delta(feature), using=using)
+
+
+@contextmanager
+def bulk_operation(using: str = 'default'):
+    """
+    Suprime el fan-out de signals de Feature durante una operación masiva.
+
+    Uso:
+        with bulk_operation():
+            layer.delete()
+
+    Los bloques anidados comparten los mismos deltas pendientes; los aplica
+    el bloque más externo.
+    """
+    if in_bulk_operation():
+        yield
+        return
+
+    _state.pending = {}
+    try:
+        yield
+    except BaseException:
+        # Los chunks ya confirmados deben contar, pero un fallo aquí (p. ej.
+        # en una transacción rota) no puede ocultar el error original
+        try:
+            _flush_pending(_pop_pending(), using)
+        except Exception as e:
+            logger.error(f"Could not apply statistics deltas after a failed bulk operation: {e}")
+        raise
+    else:
+        _flush_pending(_pop_pending(), using)
+
+
+def _pop_pending():
+    pending = _state.pending
+    _state.pending = None
+    return pending
+
+
+def _flush_pending(pending, using: str):
+    """Aplica los deltas acumulados y programa las capas que quedaron 'stale'."""
+    if not pending:
+        return
+    logger.info(f"Bulk operation touched {len(pending)} layer(s), applying statistics deltas")
+    for layer_id, delta in pending.items():
+        apply_delta(layer_id, delta)
+    stale = [layer_id for layer_id, delta in pending.items() if delta.stale]
+    if stale:
+        transaction.on_commit(lambda: enqueue_layer_statistics(stale), using=using)
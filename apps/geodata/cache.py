@@ -0,0 +1,15 @@
+"""
+Claves de caché de geodata.
+
+Las respuestas derivadas de una capa (GeoJSON simplificado, teselas)
+incluyen Layer.content_version en su clave, así que cualquier cambio en los
+features las invalida sin tener que borrarlas una a una.
+"""
+
+
+def simplified_geojson_key(layer, zoom_bucket, precision) -> str:
+    """Clave del GeoJSON simplificado de una capa para un zoom y precisión."""
+    return (
+        f'geodata:geojson:{layer.id}:v{layer.content_version}'
+        f':z{zoom_bucket}:p{precision}'
+    )
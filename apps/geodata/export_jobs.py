@@ -0,0 +1,289 @@
+"""
+Exportaciones como jobs de Celery con reutilización del resultado.
+
+Cada exportación se identifica por una clave: objeto (capa o dataset),
+formato, opciones que cambian la salida y content_version de las capas
+involucradas. Si en GeneratedFile hay un archivo vigente con esa clave se
+sirve directamente; si no, se encola un job (SyncLog) y las peticiones
+idénticas que llegan mientras corre reciben el mismo job id. La búsqueda del
+job en curso y su creación se serializan por clave con un advisory lock de
+PostgreSQL, así que el colapso funciona entre procesos de gunicorn. Cualquier
+cambio en los features incrementa content_version, así que la clave cambia y
+la exportación vieja deja de reutilizarse.
+
+Los datasets en Shapefile o FlatGeobuf se exportan en paralelo: un job por
+capa escribe sus archivos en un directorio de staging y el último arma un
+único ZIP con todos, sin ZIPs anidados (ver tasks.run_export_job).
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+import zipfile
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.file_locking import FileRegistry
+from .models import Dataset, Layer, SyncLog
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('shapefile', 'geojson', 'geojsonseq', 'gpkg', 'flatgeobuf')
+
+# Segundos tras los que un job en curso se considera abandonado
+DEFAULT_EXPORT_JOB_TIMEOUT = 3600
+
+# Formatos de dataset que se exportan con un job por capa (GeoPackage es un
+# único archivo SQLite y se escribe capa a capa)
+PARALLEL_DATASET_FORMATS = ('shapefile', 'flatgeobuf')
+
+# Opciones que cambian el archivo generado, por formato
+FORMAT_OPTIONS = {
+    'geojson': ('pretty', 'compress'),
+    'geojsonseq': ('compress',),
+}
+
+
+def export_options(export_format: str, options: Dict) -> Dict:
+    """Opciones de la petición que forman parte de la clave del formato."""
+    return {name: bool(options.get(name, False)) for name in FORMAT_OPTIONS.get(export_format, ())}
+
+
+def content_versions(obj) -> List[List[int]]:
+    """[[layer_id, content_version], ...] de las capas que se exportan."""
+    if isinstance(obj, Layer):
+        version = Layer.objects.filter(id=obj.id).values_list('content_version', flat=True).get()
+        return [[obj.id, version]]
+    return [
+        list(row) for row in
+        obj.layers.filter(is_active=True).order_by('id').values_list('id', 'content_version')
+    ]
+
+
+def export_key(obj, export_format: str, options: Dict) -> str:
+    """Clave (sha256) de una exportación."""
+    payload = {
+        'object': [obj._meta.label_lower, obj.pk],
+        'format': export_format,
+        'options': export_options(export_format, options),
+        'versions': content_versions(obj),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def lock_export_key(key: str):
+    """Bloquea la clave hasta el fin de la transacción (advisory lock de PostgreSQL)."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [int(key[:15], 16)])
+
+
+def running_export_job(key: str) -> Optional[SyncLog]:
+    """Job en curso (no abandonado) que genera la exportación con esa clave."""
+    timeout = getattr(settings, 'GEODATA_EXPORT_JOB_TIMEOUT', DEFAULT_EXPORT_JOB_TIMEOUT)
+    return SyncLog.objects.filter(
+        status=SyncLog.Status.PROCESSING,
+        details__job_type='export',
+        details__export_key=key,
+        started_at__gte=timezone.now() - timedelta(seconds=timeout)
+    ).order_by('started_at').first()
+
+
+def run_export(obj, export_format: str, options: Dict, filename: Optional[str] = None,
+               user_id: Optional[int] = None) -> Tuple[str, str]:
+    """
+    Genera la exportación (se ejecuta dentro del job).
+
+    Returns:
+        Tupla (ruta del archivo, content type)
+    """
+    from .exporters import GeoJSONExporter, OGR_EXPORTERS, ShapefileExporter
+    from .exporters.geojson import CONTENT_TYPES as GEOJSON_CONTENT_TYPES
+
+    is_dataset = isinstance(obj, Dataset)
+
+    if export_format == 'shapefile':
+        exporter = ShapefileExporter(output_dir='data/exports/shapefiles')
+        if is_dataset:
+            result = exporter.export_dataset(obj, filename)
+        else:
+            result = exporter.export_layer(obj, filename, user_id=user_id)
+        return result['file_path'], 'application/zip'
+
+    if export_format in OGR_EXPORTERS:
+        exporter = OGR_EXPORTERS[export_format]()
+        if is_dataset:
+            result = exporter.export_dataset(obj, filename, user_id=user_id)
+            content_type = exporter.content_type if exporter.multi_layer else 'application/zip'
+        else:
+            result = exporter.export_layer(obj, filename, user_id=user_id)
+            content_type = exporter.content_type
+        return result['file_path'], content_type
+
+    if is_dataset:
+        raise ValueError(f'El formato {export_format} no admite datasets')
+    compress = bool(options.get('compress'))
+    path = GeoJSONExporter(output_dir='data/exports/geojson').export_layer(
+        obj,
+        filename,
+        pretty=bool(options.get('pretty')),
+        format=export_format,
+        compress=compress
+    )
+    return path, 'application/gzip' if compress else GEOJSON_CONTENT_TYPES[export_format]
+
+
+def file_info(file_record) -> Dict:
+    """Datos públicos de un archivo exportado."""
+    return {
+        'file_id': file_record.id,
+        'filename': file_record.filename,
+        'size': file_record.size,
+        'format': file_record.metadata.get('export_format'),
+        'content_type': file_record.metadata.get('content_type'),
+        'expires_at': file_record.expires_at.isoformat(),
+        'job_id': file_record.metadata.get('job_id'),
+    }
+
+
+def enqueue_export(obj, export_format: str, options: Dict, user,
+                   filename: Optional[str] = None) -> Tuple[Optional[object], Optional[SyncLog]]:
+    """
+    Devuelve la exportación existente o el job que la genera.
+
+    Args:
+        obj: Layer o Dataset
+        export_format: Formato (EXPORT_FORMATS)
+        options: Opciones de la petición
+        user: Usuario que la solicita
+        filename: Nombre del archivo si hay que generarlo
+
+    Returns:
+        Tupla (GeneratedFile vigente, None) o (None, SyncLog del job en curso)
+    """
+    from .tasks import run_export_job
+
+    key = export_key(obj, export_format, options)
+    task_id = str(uuid.uuid4())
+
+    with transaction.atomic():
+        lock_export_key(key)
+        # Dentro del lock: un job idéntico pudo terminar mientras se esperaba
+        file_record = FileRegistry.find_cached(key)
+        if file_record is not None:
+            logger.info(f"Reusing export {file_record.file_path} for {obj} ({export_format})")
+            return file_record, None
+
+        running = running_export_job(key)
+        if running is not None:
+            return None, running
+
+        sync_log = SyncLog.objects.create(
+            layer=obj if isinstance(obj, Layer) else None,
+            requested_by=user,
+            status=SyncLog.Status.PROCESSING,
+            details={
+                'job_type': 'export',
+                'export_key': key,
+                'format': export_format,
+                'object': {'type': obj._meta.model_name, 'id': obj.pk, 'name': obj.name},
+                'options': export_options(export_format, options),
+                'task_id': task_id,
+                'queued_at': datetime.now().isoformat(),
+            }
+        )
+
+    run_export_job.apply_async(
+        args=[sync_log.id, obj._meta.model_name, obj.pk, export_format, export_options(export_format, options), key],
+        kwargs={'filename': filename or None, 'user_id': user.id if user else None},
+        task_id=task_id
+    )
+    logger.info(f"Export job {sync_log.id} queued for {obj} ({export_format})")
+    return None, sync_log
+
+
+def dataset_staging_dir(sync_log_id) -> str:
+    """Directorio donde las capas de un job de dataset dejan sus archivos."""
+    return os.path.join('data/exports/staging', f'job_{sync_log_id}')
+
+
+def dataset_member_name(layer) -> str:
+    from .exporters.ogr import safe_layer_name
+
+    return f'{safe_layer_name(layer.name)}_{layer.id}'
+
+
+def export_dataset_member(layer, export_format: str, staging_dir: str) -> Dict:
+    """
+    Exporta una capa de un dataset al directorio de staging del job.
+
+    Shapefile: carpeta <capa>_<id>/ con sus partes y metadata; FlatGeobuf:
+    <capa>_<id>.fgb. Si falla, se eliminan los archivos a medio escribir.
+
+    Returns:
+        Dict con features_count y skipped
+    """
+    from .exporters import OGR_EXPORTERS, ShapefileExporter
+
+    name = dataset_member_name(layer)
+    if export_format == 'shapefile':
+        target = os.path.join(staging_dir, name)
+        try:
+            return ShapefileExporter(output_dir=staging_dir).write_layer_files(layer, target, name)
+        except Exception:
+            shutil.rmtree(target, ignore_errors=True)
+            raise
+
+    exporter = OGR_EXPORTERS[export_format](output_dir=staging_dir)
+    target = os.path.join(staging_dir, f'{name}{exporter.extension}')
+    try:
+        return exporter.write_layer(layer, layer.features.filter(is_active=True), target, name)
+    except Exception:
+        if os.path.exists(target):
+            os.remove(target)
+        raise
+
+
+def dataset_archive_path(dataset, export_format: str, filename: Optional[str] = None) -> str:
+    """Ruta del ZIP final de un dataset (no sobrescribe uno existente)."""
+    from .exporters import FlatGeobufExporter
+
+    if export_format == 'shapefile':
+        output_dir, extension = 'data/exports/shapefiles', '.zip'
+    else:
+        output_dir, extension = FlatGeobufExporter.default_output_dir, f'{FlatGeobufExporter.extension}.zip'
+    os.makedirs(output_dir, exist_ok=True)
+
+    if not filename:
+        filename = f"{dataset.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    path = os.path.join(output_dir, f'{filename}_complete{extension}')
+    if os.path.exists(path):
+        path = os.path.join(output_dir, f'{filename}_complete_{uuid.uuid4().hex[:8]}{extension}')
+    return path
+
+
+def archive_directory(directory: str, zip_path: str) -> int:
+    """
+    Comprime todo el directorio en un ZIP (rutas relativas) borrando cada
+    archivo en cuanto entra, así el disco no guarda dos copias.
+
+    Returns:
+        Archivos agregados
+    """
+    added = 0
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                zipf.write(path, os.path.relpath(path, directory))
+                os.remove(path)
+                added += 1
+    return added
@@ -3,5 +3,6 @@ Exporters for geodata app.
 """
 from .shapefile import ShapefileExporter
 from .geojson import GeoJSONExporter
+from .ogr import GeoPackageExporter, FlatGeobufExporter, OGR_EXPORTERS
 
-__all__ = ['ShapefileExporter', 'GeoJSONExporter']
+__all__ = ['ShapefileExporter', 'GeoJSONExporter', 'GeoPackageExporter', 'FlatGeobufExporter', 'OGR_EXPORTERS']
@@ -1,65 +1,158 @@
 """
 GeoJSON exporter for geodata.
+
+Escribe el archivo en streaming: los features se leen con .iterator() y la
+base de datos serializa la geometría (AsGeoJSON) y las propiedades, así que
+cada feature se escribe como texto sin construir la colección en memoria.
+Formatos:
+    geojson: FeatureCollection (RFC 7946)
+    geojsonseq: un Feature por línea (GeoJSON delimitado por saltos de
+        línea, el formato que leen Spark y GDAL GeoJSONSeq)
+Ambos admiten salida gzip.
 """
+import gzip
 import json
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 import logging
 
+from django.conf import settings
+
+from ..streaming import DEFAULT_STREAM_CHUNK_SIZE, feature_rows
+
 logger = logging.getLogger(__name__)
 
+EXTENSIONS = {
+    'geojson': '.geojson',
+    'geojsonseq': '.geojsonl',
+}
+
+CONTENT_TYPES = {
+    'geojson': 'application/geo+json',
+    'geojsonseq': 'application/geo+json-seq',
+}
+
+
+def merge_feature_id(properties_json: Optional[str], feature_id: str) -> str:
+    """
+    Antepone feature_id al objeto de propiedades ya serializado.
+
+    Si las propiedades ya traen 'feature_id', su valor (posterior en el
+    objeto) es el que prevalece al leer, igual que con {'feature_id': ..., **props}.
+    """
+    head = f'{{"feature_id": {json.dumps(feature_id, ensure_ascii=False)}'
+    body = (properties_json or '{}').strip()[1:].lstrip()
+    if body.startswith('}'):
+        return head + '}'
+    return f'{head}, {body}'
+
 
 class GeoJSONExporter:
-    """Exporta datos geoespaciales a formato GeoJSON."""
-    
-    def __init__(self, output_dir: Optional[str] = None):
+    """Exporta datos geoespaciales a GeoJSON o GeoJSONSeq en streaming."""
+
+    def __init__(self, output_dir: Optional[str] = None, chunk_size: Optional[int] = None):
         """
         Inicializa el exportador.
-        
+
         Args:
             output_dir: Directorio de salida
+            chunk_size: Features leídos del cursor y escritos por bloque
         """
         self.output_dir = output_dir or 'data/exports'
+        self.chunk_size = chunk_size or getattr(settings, 'GEODATA_STREAM_CHUNK_SIZE', DEFAULT_STREAM_CHUNK_SIZE)
         os.makedirs(self.output_dir, exist_ok=True)
-    
-    def export_layer(self, layer, filename: Optional[str] = None, 
-                    pretty: bool = True) -> str:
+
+    def _output_path(self, filename: str, format: str, compress: bool) -> str:
+        extension = EXTENSIONS[format]
+        for known in ('.gz', *EXTENSIONS.values()):
+            if filename.endswith(known):
+                filename = filename[:-len(known)]
+        filename += extension + ('.gz' if compress else '')
+        return os.path.join(self.output_dir, filename)
+
+    def _open(self, path: str, compress: bool):
+        if compress:
+            return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+        return open(path, 'w', encoding='utf-8')
+
+    def _write(self, path: str, features, header: Dict, metadata: Dict, format: str,
+               compress: bool, pretty: bool, include_layer_id: bool = False) -> int:
+        """
+        Escribe los features uno a uno.
+
+        Args:
+            path: Archivo destino
+            features: QuerySet de Feature
+            header: Miembros del FeatureCollection previos a 'features'
+            metadata: Miembro 'metadata' (se completa con total_features)
+            format: 'geojson' o 'geojsonseq'
+            compress: Escribir gzip
+            pretty: Un feature por línea en el FeatureCollection
+            include_layer_id: Añadir layer_id a las propiedades de cada feature
+
+        Returns:
+            Cantidad de features escritos
+        """
+        seq = format == 'geojsonseq'
+        separator = '\n' if seq else (',\n' if pretty else ',')
+        written = 0
+
+        with self._open(path, compress) as f:
+            if not seq:
+                f.write(json.dumps(header, ensure_ascii=False)[:-1] + ', "features": [' + ('\n' if pretty else ''))
+
+            buffer = []
+            rows = feature_rows(features, chunk_size=self.chunk_size)
+            for pk, feature_id, layer_id, geometry_json, properties_json in rows:
+                if geometry_json is None:
+                    continue
+                properties = merge_feature_id(properties_json, feature_id or '')
+                if include_layer_id:
+                    properties = f'{{"layer_id": {layer_id}, {properties[1:]}'
+                if written:
+                    buffer.append(separator)
+                buffer.append(
+                    f'{{"type": "Feature", "id": "{pk}", "geometry": {geometry_json}, "properties": {properties}}}'
+                )
+                written += 1
+                if len(buffer) >= self.chunk_size:
+                    f.write(''.join(buffer))
+                    buffer = []
+            f.write(''.join(buffer))
+
+            if seq:
+                if written:
+                    f.write('\n')
+            else:
+                metadata['total_features'] = written
+                f.write(('\n' if pretty else '') + '], "metadata": ' + json.dumps(metadata, ensure_ascii=False) + '}\n')
+
+        return written
+
+    def export_layer(self, layer, filename: Optional[str] = None, pretty: bool = False,
+                     format: str = 'geojson', compress: bool = False) -> str:
         """
         Exporta una capa a GeoJSON.
-        
+
         Args:
             layer: Layer model instance
             filename: Nombre del archivo
-            pretty: Formatear JSON con indentación
-        
+            pretty: Un feature por línea (la salida compacta es la predeterminada)
+            format: 'geojson' o 'geojsonseq'
+            compress: Comprimir con gzip (.gz)
+
         Returns:
             Ruta al archivo GeoJSON
         """
         if filename is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{layer.name.replace(' ', '_')}_{timestamp}.geojson"
-        
-        if not filename.endswith('.geojson'):
-            filename += '.geojson'
-        
-        logger.info(f"Exportando layer {layer.name} a GeoJSON")
-        
-        # Construir GeoJSON
-        features = []
-        for feature in layer.features.filter(is_active=True):
-            if feature.geometry:
-                features.append({
-                    'type': 'Feature',
-                    'id': str(feature.id),
-                    'geometry': json.loads(feature.geometry.json),
-                    'properties': {
-                        'feature_id': feature.feature_id,
-                        **(feature.properties or {})
-                    }
-                })
-        
-        geojson = {
+            filename = f"{layer.name.replace(' ', '_')}_{timestamp}"
+
+        output_path = self._output_path(filename, format, compress)
+        logger.info(f"Exportando layer {layer.name} a {format}{' (gzip)' if compress else ''}")
+
+        header = {
             'type': 'FeatureCollection',
             'name': layer.name,
             'crs': {
@@ -68,83 +161,53 @@ class GeoJSONExporter:
                     'name': f'EPSG:{layer.srid}'
                 }
             },
-            'features': features,
-            'metadata': {
-                'layer_name': layer.name,
-                'description': layer.description,
-                'layer_type': layer.layer_type,
-                'geometry_type': layer.geometry_type,
-                'total_features': len(features),
-                'exported_at': datetime.now().isoformat(),
-                'source': layer.data_source.name if layer.data_source else None
-            }
         }
-        
-        # Guardar archivo
-        output_path = os.path.join(self.output_dir, filename)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            if pretty:
-                json.dump(geojson, f, indent=2, ensure_ascii=False)
-            else:
-                json.dump(geojson, f, ensure_ascii=False)
-        
-        logger.info(f"GeoJSON exportado exitosamente: {output_path}")
+        metadata = {
+            'layer_name': layer.name,
+            'description': layer.description,
+            'layer_type': layer.layer_type,
+            'geometry_type': layer.geometry_type,
+            'exported_at': datetime.now().isoformat(),
+            'source': layer.data_source.name if layer.data_source else None
+        }
+
+        written = self._write(
+            output_path,
+            layer.features.filter(is_active=True),
+            header,
+            metadata,
+            format,
+            compress,
+            pretty
+        )
+
+        logger.info(f"GeoJSON exportado exitosamente: {output_path} ({written} features)")
         return output_path
-    
-    def export_features(self, features, filename: str, 
-                       layer_name: str = "Features", 
-                       pretty: bool = True) -> str:
+
+    def export_features(self, features, filename: str,
+                        layer_name: str = "Features",
+                        pretty: bool = False, format: str = 'geojson',
+                        compress: bool = False) -> str:
         """
         Exporta un QuerySet de features a GeoJSON.
-        
+
         Args:
             features: QuerySet de Feature
             filename: Nombre del archivo
             layer_name: Nombre para la colección
-            pretty: Formatear JSON
-        
+            pretty: Un feature por línea
+            format: 'geojson' o 'geojsonseq'
+            compress: Comprimir con gzip (.gz)
+
         Returns:
             Ruta al archivo GeoJSON
         """
-        if not filename.endswith('.geojson'):
-            filename += '.geojson'
-        
-        logger.info(f"Exportando {features.count()} features a GeoJSON")
-        
-        # Construir GeoJSON
-        feature_list = []
-        for feature in features:
-            if feature.geometry:
-                feature_list.append({
-                    'type': 'Feature',
-                    'id': str(feature.id),
-                    'geometry': json.loads(feature.geometry.json),
-                    'properties': {
-                        'feature_id': feature.feature_id,
-                        'layer_id': feature.layer_id,
-                        **(feature.properties or {})
-                    }
-                })
-        
-        geojson = {
-            'type': 'FeatureCollection',
-            'name': layer_name,
-            'features': feature_list,
-            'metadata': {
-                'total_features': len(feature_list),
-                'exported_at': datetime.now().isoformat()
-            }
-        }
-        
-        # Guardar
-        output_path = os.path.join(self.output_dir, filename)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            if pretty:
-                json.dump(geojson, f, indent=2, ensure_ascii=False)
-            else:
-                json.dump(geojson, f, ensure_ascii=False)
-        
-        logger.info(f"GeoJSON exportado: {output_path}")
+        output_path = self._output_path(filename, format, compress)
+        logger.info(f"Exportando features a {format}{' (gzip)' if compress else ''}")
+
+        header = {'type': 'FeatureCollection', 'name': layer_name}
+        metadata = {'exported_at': datetime.now().isoformat()}
+        written = self._write(output_path, features, header, metadata, format, compress, pretty, include_layer_id=True)
+
+        logger.info(f"GeoJSON exportado: {output_path} ({written} features)")
         return output_path
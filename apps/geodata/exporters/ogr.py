@@ -0,0 +1,381 @@
+"""
+Exportadores GeoPackage y FlatGeobuf (escritura OGR vía Fiona).
+
+Los features se leen con .iterator() como (feature_id, WKB, propiedades) y
+se escriben con writerecords() en bloques de GEODATA_EXPORT_TRANSACTION_SIZE:
+Fiona envuelve cada llamada en una transacción OGR, así que en GeoPackage no
+hay un commit por feature. El índice espacial (R-tree en GeoPackage, Packed
+Hilbert R-tree en FlatGeobuf) se construye al escribir, con la opción de
+capa SPATIAL_INDEX.
+"""
+import os
+import re
+import shutil
+import tempfile
+import uuid
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import fiona
+import shapely
+from django.conf import settings
+
+from apps.core.file_locking import file_lock, FileRegistry
+from ..streaming import DEFAULT_STREAM_CHUNK_SIZE
+from .schema import coerce_value, field_names, geometry_type_counts, layer_schema
+
+logger = logging.getLogger(__name__)
+
+# Features por transacción OGR
+DEFAULT_TRANSACTION_SIZE = 20000
+
+FIONA_TYPES = {'C': 'str', 'N': 'int', 'F': 'float', 'L': 'bool'}
+
+FIONA_GEOMETRY_TYPES = {
+    'POINT': 'Point',
+    'LINESTRING': 'LineString',
+    'POLYGON': 'Polygon',
+    'MULTIPOINT': 'MultiPoint',
+    'MULTILINESTRING': 'MultiLineString',
+    'MULTIPOLYGON': 'MultiPolygon',
+    'GEOMETRYCOLLECTION': 'GeometryCollection',
+}
+
+# Tipos simples y múltiples que se unifican en el tipo múltiple
+MULTI_FAMILIES = (
+    ({'POINT', 'MULTIPOINT'}, 'MultiPoint'),
+    ({'LINESTRING', 'MULTILINESTRING'}, 'MultiLineString'),
+    ({'POLYGON', 'MULTIPOLYGON'}, 'MultiPolygon'),
+)
+
+
+def output_geometry_type(counts: Dict[str, int]) -> Tuple[str, bool]:
+    """
+    Tipo de geometría de la capa de salida.
+
+    Un solo tipo se declara tal cual; un tipo simple mezclado con su
+    múltiple se declara múltiple (y los simples se promueven); cualquier
+    otra mezcla se declara 'Unknown'.
+
+    Args:
+        counts: Features por tipo de geometría
+
+    Returns:
+        Tupla (tipo de Fiona, promover a múltiple)
+    """
+    types = set(counts)
+    if len(types) == 1:
+        return FIONA_GEOMETRY_TYPES.get(types.pop(), 'Unknown'), False
+    for family, multi_type in MULTI_FAMILIES:
+        if types and types <= family:
+            return multi_type, True
+    return 'Unknown', False
+
+
+def geometry_mapping(geom, promote: bool) -> Dict:
+    mapping = geom.__geo_interface__
+    if promote and not mapping['type'].startswith('Multi'):
+        return {'type': f"Multi{mapping['type']}", 'coordinates': [mapping['coordinates']]}
+    return mapping
+
+
+def safe_layer_name(name: str) -> str:
+    return re.sub(r'[^\w-]+', '_', name).strip('_') or 'layer'
+
+
+class OGRExporter:
+    """Exporta capas con un driver OGR de Fiona en streaming."""
+
+    format: str = ''
+    driver: str = ''
+    extension: str = ''
+    content_type: str = 'application/octet-stream'
+    # El formato admite varias capas en un mismo archivo
+    multi_layer: bool = False
+    default_output_dir: str = 'data/exports'
+
+    def __init__(self, output_dir: Optional[str] = None, chunk_size: Optional[int] = None,
+                 transaction_size: Optional[int] = None):
+        """
+        Inicializa el exportador.
+
+        Args:
+            output_dir: Directorio de salida
+            chunk_size: Features leídos del cursor por bloque
+            transaction_size: Features escritos por transacción OGR
+        """
+        self.output_dir = output_dir or self.default_output_dir
+        self.chunk_size = chunk_size or getattr(settings, 'GEODATA_STREAM_CHUNK_SIZE', DEFAULT_STREAM_CHUNK_SIZE)
+        self.transaction_size = transaction_size or getattr(
+            settings, 'GEODATA_EXPORT_TRANSACTION_SIZE', DEFAULT_TRANSACTION_SIZE
+        )
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def output_schema(self, layer, features) -> Tuple[Dict, List[Tuple[str, str, str]], bool]:
+        """
+        Esquema de Fiona de la capa.
+
+        Returns:
+            Tupla (schema, columnas (nombre, clave, tipo), promover a múltiple)
+        """
+        columns = layer_schema(layer, features)
+        names = field_names(
+            [key for key, _kind, _length in columns],
+            reserved=['feature_id', 'fid', 'geom'],
+            max_length=None
+        )
+        geometry_type, promote = output_geometry_type(geometry_type_counts(features))
+
+        properties = {'feature_id': 'str'}
+        fields = []
+        for key, kind, _length in columns:
+            properties[names[key]] = FIONA_TYPES[kind]
+            fields.append((names[key], key, kind))
+        return {'geometry': geometry_type, 'properties': properties}, fields, promote
+
+    def write_layer(self, layer, features, path: str, layer_name: Optional[str] = None) -> Dict:
+        """
+        Escribe una capa en una sola pasada por los features.
+
+        Args:
+            layer: Layer
+            features: QuerySet de Feature de la capa
+            path: Archivo destino (en GeoPackage se añade la capa si ya existe)
+            layer_name: Nombre de la capa dentro del archivo
+
+        Returns:
+            Dict con features_count, skipped y geometry_type
+        """
+        from django.contrib.gis.db.models.functions import AsWKB
+
+        schema, fields, promote = self.output_schema(layer, features)
+        layer_name = layer_name or safe_layer_name(layer.name)
+        written = 0
+        skipped = 0
+
+        rows = (
+            features.filter(geometry__isnull=False)
+            .order_by('id')
+            .annotate(wkb=AsWKB('geometry'))
+            .values_list('feature_id', 'wkb', 'properties')
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+        with fiona.open(path, 'w', driver=self.driver, schema=schema, crs='EPSG:4326',
+                        layer=layer_name, SPATIAL_INDEX='YES') as dst:
+            records = []
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    skipped += self._build_records(chunk, fields, promote, records)
+                    chunk = []
+                    written += self._write_transactions(dst, records)
+            if chunk:
+                skipped += self._build_records(chunk, fields, promote, records)
+            written += self._write_transactions(dst, records, final=True)
+
+        return {'features_count': written, 'skipped': skipped, 'geometry_type': schema['geometry']}
+
+    def _write_transactions(self, dst, records: List[Dict], final: bool = False) -> int:
+        """Escribe los registros acumulados en transacciones de transaction_size."""
+        written = 0
+        while len(records) >= self.transaction_size or (final and records):
+            batch = records[:self.transaction_size]
+            dst.writerecords(batch)
+            del records[:self.transaction_size]
+            written += len(batch)
+        return written
+
+    def _build_records(self, chunk, fields, promote: bool, records: List[Dict]) -> int:
+        geometries = shapely.force_2d(shapely.from_wkb([bytes(wkb) for _feature_id, wkb, _properties in chunk]))
+        skipped = 0
+        for (feature_id, _wkb, properties), geom in zip(chunk, geometries):
+            if geom is None or geom.is_empty:
+                skipped += 1
+                continue
+            properties = properties or {}
+            values = {'feature_id': feature_id or ''}
+            for name, key, kind in fields:
+                values[name] = coerce_value(kind, properties.get(key))
+            records.append({'geometry': geometry_mapping(geom, promote), 'properties': values})
+        return skipped
+
+    def _output_path(self, filename: str, extension: str) -> Tuple[str, str]:
+        path = os.path.join(self.output_dir, f"{filename}{extension}")
+        if os.path.exists(path):
+            filename = f"{filename}_{uuid.uuid4().hex[:8]}"
+            path = os.path.join(self.output_dir, f"{filename}{extension}")
+        return filename, path
+
+    def _register(self, path: str, user_id: Optional[int], metadata: Dict):
+        return FileRegistry.register_file(
+            file_path=path,
+            category='export',
+            user_id=user_id,
+            metadata={**metadata, 'format': self.format}
+        )
+
+    def export_layer(self, layer, filename: Optional[str] = None,
+                     user_id: Optional[int] = None, features=None) -> dict:
+        """
+        Exporta una capa con file locking.
+
+        Args:
+            layer: Layer model instance
+            filename: Nombre del archivo (sin extensión)
+            user_id: Usuario que registra el archivo
+            features: QuerySet a exportar (por defecto los features activos)
+
+        Returns:
+            dict con información del archivo generado
+        """
+        if filename is None:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f"{layer.name.replace(' ', '_')}_{timestamp}"
+
+        filename, path = self._output_path(filename, self.extension)
+        if features is None:
+            features = layer.features.filter(is_active=True)
+
+        logger.info(f"Exportando {layer.name} a {self.driver}...")
+
+        with file_lock(path, timeout=60):
+            try:
+                result = self.write_layer(layer, features, path)
+                if not result['features_count']:
+                    raise ValueError(f"No hay features en {layer.name}")
+
+                file_record = self._register(path, user_id, {
+                    'layer_id': layer.id,
+                    'layer_name': layer.name,
+                    'feature_count': result['features_count'],
+                })
+            except Exception as e:
+                logger.error(f"Error exportando a {self.driver}: {e}")
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+
+        logger.info(
+            f"Export completado: {path} ({result['features_count']} features, {result['skipped']} omitidos)"
+        )
+        return {
+            'success': True,
+            'file_path': path,
+            'filename': os.path.basename(path),
+            'size': os.path.getsize(path),
+            'format': self.format,
+            'features_count': result['features_count'],
+            'skipped': result['skipped'],
+            'file_id': file_record.id
+        }
+
+    def export_features(self, features, filename: str) -> dict:
+        """Exporta un conjunto de features (de una misma capa)."""
+        first = features.select_related('layer').first()
+        if first is None:
+            raise ValueError("No features to export")
+        return self.export_layer(first.layer, filename, features=features)
+
+    def export_dataset(self, dataset, filename: Optional[str] = None,
+                       user_id: Optional[int] = None) -> dict:
+        """
+        Exporta un dataset completo.
+
+        Los formatos con varias capas (GeoPackage) generan un solo archivo con
+        una capa por Layer; el resto, un ZIP con un archivo por capa que se
+        comprime y se borra en cuanto se escribe.
+        """
+        if filename is None:
+            filename = f"{dataset.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        extension = self.extension if self.multi_layer else f"{self.extension}.zip"
+        filename, path = self._output_path(f"{filename}_complete", extension)
+        temp_dir = tempfile.mkdtemp(prefix='smgi_')
+        exports = []
+        used_names = set()
+
+        try:
+            with file_lock(path, timeout=60):
+                zipf = None if self.multi_layer else zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+                try:
+                    for layer in dataset.layers.filter(is_active=True).order_by('id'):
+                        layer_name = safe_layer_name(layer.name)
+                        if layer_name.lower() in used_names:
+                            layer_name = f"{layer_name}_{layer.id}"
+                        used_names.add(layer_name.lower())
+                        features = layer.features.filter(is_active=True)
+
+                        if zipf is None:
+                            result = self.write_layer(layer, features, path, layer_name)
+                        else:
+                            layer_path = os.path.join(temp_dir, f"{layer_name}{self.extension}")
+                            result = self.write_layer(layer, features, layer_path, layer_name)
+                            zipf.write(layer_path, os.path.basename(layer_path))
+                            os.remove(layer_path)
+                        exports.append({'layer_id': layer.id, 'layer_name': layer.name, **result})
+                finally:
+                    if zipf is not None:
+                        zipf.close()
+
+                if not exports:
+                    raise ValueError(f"No hay capas en {dataset.name}")
+
+                features_count = sum(export['features_count'] for export in exports)
+                file_record = self._register(path, user_id, {
+                    'dataset_id': dataset.id,
+                    'dataset_name': dataset.name,
+                    'feature_count': features_count,
+                })
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        return {
+            'success': True,
+            'file_path': path,
+            'filename': os.path.basename(path),
+            'size': os.path.getsize(path),
+            'format': self.format,
+            'features_count': features_count,
+            'exports': exports,
+            'file_id': file_record.id
+        }
+
+    def cleanup(self):
+        """Limpia el directorio de salida."""
+        if self.output_dir and os.path.exists(self.output_dir):
+            shutil.rmtree(self.output_dir, ignore_errors=True)
+
+
+class GeoPackageExporter(OGRExporter):
+    """Exporta a GeoPackage: un archivo SQLite con índice R-tree por capa."""
+
+    format = 'gpkg'
+    driver = 'GPKG'
+    extension = '.gpkg'
+    content_type = 'application/geopackage+sqlite3'
+    multi_layer = True
+    default_output_dir = 'data/exports/gpkg'
+
+
+class FlatGeobufExporter(OGRExporter):
+    """Exporta a FlatGeobuf: índice espacial empaquetado, apto para lecturas HTTP por rangos."""
+
+    format = 'flatgeobuf'
+    driver = 'FlatGeobuf'
+    extension = '.fgb'
+    content_type = 'application/flatgeobuf'
+    default_output_dir = 'data/exports/flatgeobuf'
+
+
+OGR_EXPORTERS = {
+    exporter.format: exporter
+    for exporter in (GeoPackageExporter, FlatGeobufExporter)
+}
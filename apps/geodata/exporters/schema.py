@@ -0,0 +1,182 @@
+"""
+Esquema de atributos y tipos de geometría compartidos por los exportadores.
+
+Los tipos de columna se expresan con los códigos DBF: 'C' (texto),
+'N' (entero), 'F' (real) y 'L' (booleano); cada exportador los traduce a
+los de su formato.
+"""
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Count, F
+
+from ..functions import GeometryType
+
+# Filas leídas para inferir el esquema cuando la capa no lo declara
+SCHEMA_SAMPLE_SIZE = 1000
+
+# Tipos de properties_schema (nombres de JSON Schema y alias habituales)
+SCHEMA_TYPES = {
+    'string': 'C', 'str': 'C', 'text': 'C',
+    'integer': 'N', 'int': 'N',
+    'number': 'F', 'float': 'F', 'double': 'F', 'real': 'F',
+    'boolean': 'L', 'bool': 'L',
+}
+
+
+def field_names(keys: Iterable[str], reserved: Iterable[str] = (),
+                max_length: Optional[int] = 10) -> Dict[str, str]:
+    """
+    Nombres de columna únicos (sin distinguir mayúsculas).
+
+    Args:
+        keys: Claves de las propiedades
+        reserved: Nombres ya ocupados
+        max_length: Longitud máxima del nombre (10 en DBF; None sin límite)
+
+    Returns:
+        Dict clave -> nombre de columna
+    """
+    used = {name.lower() for name in reserved}
+    names = {}
+    for key in keys:
+        base = (str(key).strip() or 'field').replace(' ', '_')[:max_length]
+        name = base
+        counter = 1
+        while name.lower() in used:
+            suffix = str(counter)
+            name = (base[:max_length - len(suffix)] if max_length else base) + suffix
+            counter += 1
+        used.add(name.lower())
+        names[key] = name
+    return names
+
+
+def schema_from_declaration(properties_schema: Dict) -> List[Tuple[str, str, Optional[int]]]:
+    """
+    Lee Layer.properties_schema.
+
+    Acepta un JSON Schema ({'properties': {campo: {'type': ..., 'maxLength': ...}}}),
+    {'fields': {...}} o directamente {campo: tipo | {'type': tipo}}.
+
+    Returns:
+        Lista de (clave, tipo, longitud máxima)
+    """
+    if not isinstance(properties_schema, dict):
+        return []
+    declared = properties_schema.get('properties', properties_schema.get('fields', properties_schema))
+    if not isinstance(declared, dict):
+        return []
+
+    columns = []
+    for key, spec in declared.items():
+        if isinstance(spec, dict):
+            kind = spec.get('type')
+            max_length = spec.get('maxLength') or spec.get('max_length')
+        else:
+            kind, max_length = spec, None
+        if isinstance(kind, list):
+            # JSON Schema: ["string", "null"]
+            kind = next((k for k in kind if k != 'null'), 'string')
+        columns.append((key, SCHEMA_TYPES.get(str(kind).lower(), 'C'), max_length))
+    return columns
+
+
+def value_kind(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'L'
+    if isinstance(value, int):
+        return 'N'
+    if isinstance(value, float):
+        return 'F'
+    return 'C'
+
+
+def merge_kinds(current: Optional[str], new: Optional[str]) -> Optional[str]:
+    if current is None or current == new:
+        return new or current
+    if new is None:
+        return current
+    if {current, new} == {'N', 'F'}:
+        return 'F'
+    return 'C'
+
+
+def schema_from_sample(rows: Iterable[Dict]) -> List[Tuple[str, str, Optional[int]]]:
+    """
+    Infiere el esquema de una muestra de propiedades.
+
+    Las claves conservan el orden de aparición; una clave con tipos mezclados
+    se exporta como texto. Las columnas de texto no fijan longitud, porque la
+    muestra no garantiza haber visto el valor más largo.
+
+    Returns:
+        Lista de (clave, tipo, longitud máxima)
+    """
+    kinds: Dict[str, Optional[str]] = {}
+    for properties in rows:
+        for key, value in (properties or {}).items():
+            kinds[key] = merge_kinds(kinds.get(key), value_kind(value))
+    return [(key, kind or 'C', None) for key, kind in kinds.items()]
+
+
+def layer_schema(layer, features) -> List[Tuple[str, str, Optional[int]]]:
+    """
+    Columnas de la capa: las de properties_schema o las de una muestra
+    repartida por toda la capa (no solo el primer feature).
+
+    Args:
+        layer: Layer
+        features: QuerySet de Feature que se exporta
+
+    Returns:
+        Lista de (clave, tipo, longitud máxima)
+    """
+    columns = schema_from_declaration(layer.properties_schema)
+    if columns:
+        return columns
+
+    step = max(1, (layer.feature_count or 0) // SCHEMA_SAMPLE_SIZE)
+    sample = features.order_by()
+    if step > 1:
+        sample = sample.annotate(sample_slot=F('id') % step).filter(sample_slot=0)
+    return schema_from_sample(sample.values_list('properties', flat=True)[:SCHEMA_SAMPLE_SIZE])
+
+
+def coerce_value(kind: str, value):
+    """Adapta un valor al tipo de su columna; lo que no encaja queda nulo."""
+    if value is None:
+        return None
+    if kind == 'C':
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+    if kind == 'L':
+        return value if isinstance(value, bool) else None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if value != value or abs(value) == float('inf'):
+        return None
+    return int(value) if kind == 'N' else value
+
+
+def geometry_type_counts(features) -> Dict[str, int]:
+    """
+    Features por tipo de geometría ('POINT', 'MULTIPOLYGON', ...), calculado
+    con una agregación en la base de datos.
+    """
+    counts: Dict[str, int] = {}
+    rows = (
+        features.filter(geometry__isnull=False)
+        .annotate(geom_type=GeometryType('geometry'))
+        .values('geom_type')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        # SpatiaLite añade la dimensión ('POINT XYZ')
+        geom_type = (row['geom_type'] or 'GEOMETRY').split()[0].upper()
+        counts[geom_type] = counts.get(geom_type, 0) + row['n']
+    return counts
@@ -1,137 +1,351 @@
 """
 Shapefile exporter con file locking.
+
+La exportación es de una sola pasada: los features se leen con .iterator()
+como (feature_id, WKB, propiedades), las geometrías se construyen por bloque
+con shapely.from_wkb y sus partes se escriben directamente en el Writer de
+pyshp (multipartes y huecos incluidos). El esquema DBF sale de
+Layer.properties_schema o, si está vacío, de una muestra repartida por toda
+la capa. Las partes del shapefile se pasan al ZIP una a una y se borran en
+cuanto quedan comprimidas.
 """
 import os
 import shutil
 import tempfile
+import uuid
 import zipfile
-import shapefile
 from datetime import datetime
-from typing import Optional
-from django.contrib.gis.geos import GEOSGeometry
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import logging
 
+import shapefile
+import shapely
+from django.conf import settings
+from shapely.geometry.polygon import orient
+
 from apps.core.file_locking import file_lock, FileRegistry
+from ..streaming import DEFAULT_STREAM_CHUNK_SIZE
+from .schema import coerce_value, field_names, geometry_type_counts, layer_schema
 
 logger = logging.getLogger(__name__)
 
+WGS84_PRJ = (
+    'GEOGCS["WGS84",DATUM["WGS_1984",SPHEROID["WGS84",6378137,298.257223563]],'
+    'PRIMEM["Greenwich",0],UNIT["Degree",0.0174532925199433]]'
+)
+
+SHAPEFILE_PARTS = ('.shp', '.shx', '.dbf', '.prj', '.cpg')
+
+# Familia de shapefile por tipo de geometría (GeometryType de PostGIS / geom_type de shapely)
+SHAPE_FAMILIES = {
+    'POINT': 'POINT',
+    'MULTIPOINT': 'MULTIPOINT',
+    'LINESTRING': 'POLYLINE',
+    'MULTILINESTRING': 'POLYLINE',
+    'POLYGON': 'POLYGON',
+    'MULTIPOLYGON': 'POLYGON',
+}
+
+SHAPE_TYPES = {
+    'POINT': shapefile.POINT,
+    'MULTIPOINT': shapefile.MULTIPOINT,
+    'POLYLINE': shapefile.POLYLINE,
+    'POLYGON': shapefile.POLYGON,
+}
+
+
+class DBFField(NamedTuple):
+    """Columna DBF: nombre (máx. 10 caracteres) y clave de la propiedad."""
+    name: str
+    key: str
+    type: str
+    size: int
+    decimal: int = 0
+
+
+def dbf_field(name: str, key: str, field_type: str, max_length: Optional[int] = None) -> DBFField:
+    if field_type == 'N':
+        return DBFField(name, key, 'N', 19)
+    if field_type == 'F':
+        return DBFField(name, key, 'F', 19, 8)
+    if field_type == 'L':
+        return DBFField(name, key, 'L', 1)
+    return DBFField(name, key, 'C', max(1, min(int(max_length or 254), 254)))
+
+
+def ring_coords(ring) -> List[List[float]]:
+    return shapely.get_coordinates(ring).tolist()
+
+
+def geometry_parts(geom, family: str):
+    """
+    Partes de una geometría shapely para el Writer de pyshp.
+
+    Los polígonos se orientan como exige el formato: anillo exterior en
+    sentido horario y huecos en sentido antihorario.
+
+    Args:
+        geom: Geometría shapely
+        family: Familia de shapefile de la capa
+
+    Returns:
+        Lista de partes (o de puntos para POINT/MULTIPOINT); None si la
+        geometría no pertenece a la familia
+    """
+    geom_type = geom.geom_type.upper()
+    if family == 'POINT':
+        return ring_coords(geom) if geom_type == 'POINT' else None
+    if family == 'MULTIPOINT':
+        return ring_coords(geom) if geom_type in ('POINT', 'MULTIPOINT') else None
+    if SHAPE_FAMILIES.get(geom_type) != family:
+        return None
+    if family == 'POLYLINE':
+        lines = geom.geoms if geom_type == 'MULTILINESTRING' else [geom]
+        return [ring_coords(line) for line in lines if not line.is_empty]
+
+    polygons = geom.geoms if geom_type == 'MULTIPOLYGON' else [geom]
+    parts = []
+    for polygon in polygons:
+        if polygon.is_empty:
+            continue
+        polygon = orient(polygon, sign=-1.0)
+        parts.append(ring_coords(polygon.exterior))
+        parts.extend(ring_coords(interior) for interior in polygon.interiors)
+    return parts
+
 
 class ShapefileExporter:
     """Exporta datos geoespaciales a Shapefile con file locking."""
-    
-    def __init__(self, output_dir: Optional[str] = None):
+
+    def __init__(self, output_dir: Optional[str] = None, chunk_size: Optional[int] = None):
+        """
+        Inicializa el exportador.
+
+        Args:
+            output_dir: Directorio de salida
+            chunk_size: Features leídos del cursor por bloque
+        """
         self.output_dir = output_dir or 'data/exports/shapefiles'
+        self.chunk_size = chunk_size or getattr(settings, 'GEODATA_STREAM_CHUNK_SIZE', DEFAULT_STREAM_CHUNK_SIZE)
         os.makedirs(self.output_dir, exist_ok=True)
-    
-    def export_layer(self, layer, filename: Optional[str] = None, 
-                     user_id: Optional[int] = None) -> dict:
+
+    def shape_family(self, layer, features) -> Optional[str]:
+        """
+        Familia de shapefile de la capa.
+
+        Se toma del geometry_type declarado; para capas mixtas se elige la
+        familia con más features (una agregación en la base de datos) y el
+        resto se omite, porque un shapefile admite un solo tipo.
+        """
+        family = SHAPE_FAMILIES.get((layer.geometry_type or '').upper())
+        if family is not None:
+            return family
+
+        counts: Dict[str, int] = {}
+        has_multipoint = False
+        for geom_type, n in geometry_type_counts(features).items():
+            geom_family = SHAPE_FAMILIES.get(geom_type)
+            if geom_family in ('POINT', 'MULTIPOINT'):
+                has_multipoint = has_multipoint or geom_family == 'MULTIPOINT'
+                geom_family = 'POINT'
+            if geom_family is not None:
+                counts[geom_family] = counts.get(geom_family, 0) + n
+
+        if not counts:
+            return None
+        family = max(counts, key=counts.get)
+        if family == 'POINT' and has_multipoint:
+            return 'MULTIPOINT'
+        return family
+
+    def dbf_schema(self, layer, features) -> List[DBFField]:
+        """
+        Columnas DBF: las de properties_schema o las de una muestra repartida
+        por toda la capa (no solo el primer feature), más feature_id.
+        """
+        columns = layer_schema(layer, features)
+        names = field_names([key for key, _kind, _length in columns], reserved=['feature_id'])
+        fields = [dbf_field(names[key], key, kind, length) for key, kind, length in columns]
+        fields.append(DBFField('feature_id', '', 'C', 254))
+        return fields
+
+    def write_shapefile(self, layer, features, base_path: str) -> Dict:
+        """
+        Escribe .shp/.shx/.dbf/.prj/.cpg en una sola pasada por los features.
+
+        Args:
+            layer: Layer
+            features: QuerySet de Feature de la capa
+            base_path: Ruta sin extensión de los archivos
+
+        Returns:
+            Dict con features_count, skipped y shape_type
+        """
+        from django.contrib.gis.db.models.functions import AsWKB
+
+        family = self.shape_family(layer, features)
+        fields = self.dbf_schema(layer, features)
+        written = 0
+        skipped = 0
+
+        writer = shapefile.Writer(base_path, shapeType=SHAPE_TYPES[family] if family else shapefile.NULL,
+                                  encoding='utf-8')
+        try:
+            for field in fields:
+                writer.field(field.name, field.type, size=field.size, decimal=field.decimal)
+
+            rows = (
+                features.filter(geometry__isnull=False)
+                .order_by('id')
+                .annotate(wkb=AsWKB('geometry'))
+                .values_list('feature_id', 'wkb', 'properties')
+                .iterator(chunk_size=self.chunk_size)
+            )
+
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    count, missed = self._write_chunk(writer, chunk, family, fields)
+                    written += count
+                    skipped += missed
+                    chunk = []
+            if chunk:
+                count, missed = self._write_chunk(writer, chunk, family, fields)
+                written += count
+                skipped += missed
+        finally:
+            writer.close()
+
+        with open(f"{base_path}.prj", 'w') as prj:
+            prj.write(WGS84_PRJ)
+        with open(f"{base_path}.cpg", 'w') as cpg:
+            cpg.write('UTF-8')
+
+        return {'features_count': written, 'skipped': skipped, 'shape_type': family}
+
+    def _write_chunk(self, writer, chunk, family: Optional[str], fields: List[DBFField]) -> Tuple[int, int]:
+        geometries = shapely.from_wkb([bytes(wkb) for _feature_id, wkb, _properties in chunk])
+        property_fields = fields[:-1]
+        written = 0
+
+        for (feature_id, _wkb, properties), geom in zip(chunk, geometries):
+            if family is None or geom is None or geom.is_empty:
+                continue
+            parts = geometry_parts(geom, family)
+            if not parts:
+                continue
+
+            if family == 'POINT':
+                writer.point(*parts[0][:2])
+            elif family == 'MULTIPOINT':
+                writer.multipoint(parts)
+            elif family == 'POLYLINE':
+                writer.line(parts)
+            else:
+                writer.poly(parts)
+
+            properties = properties or {}
+            writer.record(
+                *[coerce_value(field.type, properties.get(field.key)) for field in property_fields],
+                feature_id or ''
+            )
+            written += 1
+
+        return written, len(chunk) - written
+
+    def write_layer_files(self, layer, directory: str, name: str) -> Dict:
+        """
+        Escribe el shapefile de una capa y su metadata en un directorio, sin ZIP.
+
+        Lo usan las exportaciones de datasets en paralelo: cada capa se
+        escribe en su carpeta y el ZIP final se arma una sola vez.
+
+        Args:
+            layer: Layer
+            directory: Carpeta destino (se crea si no existe)
+            name: Nombre base de los archivos
+
+        Returns:
+            Dict con features_count, skipped y shape_type
+        """
+        os.makedirs(directory, exist_ok=True)
+        base_path = os.path.join(directory, name)
+        result = self.write_shapefile(layer, layer.features.filter(is_active=True), base_path)
+        with open(f"{base_path}_metadata.txt", 'w', encoding='utf-8') as metadata:
+            metadata.write(self._metadata(layer, result))
+        return result
+
+    def _zip_parts(self, zipf: zipfile.ZipFile, base_path: str, arc_prefix: str = ''):
+        """Comprime cada parte en el ZIP y la borra en cuanto termina."""
+        for ext in SHAPEFILE_PARTS:
+            path = f"{base_path}{ext}"
+            if os.path.exists(path):
+                zipf.write(path, f"{arc_prefix}{os.path.basename(path)}")
+                os.remove(path)
+
+    def _metadata(self, layer, result: Dict) -> str:
+        return f"""Shapefile Export Metadata
+========================
+
+Layer: {layer.name}
+Description: {layer.description or 'N/A'}
+Type: {layer.get_layer_type_display()}
+Geometry: {layer.get_geometry_type_display() if layer.geometry_type else 'N/A'}
+Shape type: {result['shape_type'] or 'N/A'}
+SRID: {layer.srid}
+Features: {result['features_count']}
+Skipped: {result['skipped']}
+Exported: {datetime.now()}
+
+Generated by: SMGI Backend
+"""
+
+    def _zip_path(self, filename: str) -> Tuple[str, str]:
+        zip_path = os.path.join(self.output_dir, f"{filename}.zip")
+        if os.path.exists(zip_path):
+            filename = f"{filename}_{uuid.uuid4().hex[:8]}"
+            zip_path = os.path.join(self.output_dir, f"{filename}.zip")
+        return filename, zip_path
+
+    def export_layer(self, layer, filename: Optional[str] = None,
+                     user_id: Optional[int] = None, features=None) -> dict:
         """
         Exporta capa con file locking.
-        
+
+        Args:
+            layer: Layer model instance
+            filename: Nombre del archivo (sin extensión)
+            user_id: Usuario que registra el archivo
+            features: QuerySet a exportar (por defecto los features activos)
+
         Returns:
             dict con información del archivo generado
         """
         if filename is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"{layer.name.replace(' ', '_')}_{timestamp}"
-        
-        # Ruta final
-        zip_path = os.path.join(self.output_dir, f"{filename}.zip")
-        
-        # Verificar duplicado
-        if os.path.exists(zip_path):
-            import uuid
-            filename = f"{filename}_{uuid.uuid4().hex[:8]}"
-            zip_path = os.path.join(self.output_dir, f"{filename}.zip")
-        
+
+        filename, zip_path = self._zip_path(filename)
+        if features is None:
+            features = layer.features.filter(is_active=True)
+
         logger.info(f"Exportando {layer.name} con file locking...")
-        
+
         # LOCK el archivo durante la exportación
         with file_lock(zip_path, timeout=60):
-            features = layer.features.filter(is_active=True)
-            
-            if not features.exists():
-                raise ValueError(f"No hay features en {layer.name}")
-            
             temp_dir = tempfile.mkdtemp(prefix='smgi_')
             shp_path = os.path.join(temp_dir, filename)
-            
-            try:
-                w = shapefile.Writer(shp_path)
-                
-                first = features.first()
-                geom = GEOSGeometry(first.geometry.json)
-                
-                if geom.geom_type == 'Point':
-                    w.shapeType = shapefile.POINT
-                elif geom.geom_type == 'LineString':
-                    w.shapeType = shapefile.POLYLINE
-                else:
-                    w.shapeType = shapefile.POLYGON
-                
-                if first.properties:
-                    for k, v in first.properties.items():
-                        if isinstance(v, int):
-                            w.field(k[:10], 'N', size=19)
-                        elif isinstance(v, float):
-                            w.field(k[:10], 'F', size=19, decimal=8)
-                        else:
-                            w.field(k[:10], 'C', size=254)
-                w.field('feature_id', 'C', size=254)
-                
-                for f in features:
-                    if not f.geometry:
-                        continue
-                    
-                    g = GEOSGeometry(f.geometry.json)
-                    
-                    if g.geom_type == 'Point':
-                        w.point(g.x, g.y)
-                    elif g.geom_type == 'LineString':
-                        w.line([list(g.coords)])
-                    elif g.geom_type == 'Polygon':
-                        w.poly([list(g[0].coords)])
-                    
-                    vals = []
-                    if first.properties:
-                        for k in first.properties.keys():
-                            vals.append(f.properties.get(k, '') if f.properties else '')
-                    vals.append(f.feature_id or '')
-                    w.record(*vals)
-                
-                w.close()
-                
-                # Archivos auxiliares
-                with open(f"{shp_path}.prj", 'w') as prj:
-                    prj.write('GEOGCS["WGS84",DATUM["WGS_1984",SPHEROID["WGS84",6378137,298.257223563]],PRIMEM["Greenwich",0],UNIT["Degree",0.0174532925199433]]')
-                
-                with open(f"{shp_path}.cpg", 'w') as cpg:
-                    cpg.write('UTF-8')
-                
-                # Metadata
-                metadata_content = f"""Shapefile Export Metadata
-========================
 
-Layer: {layer.name}
-Description: {layer.description or 'N/A'}
-Type: {layer.get_layer_type_display()}
-Geometry: {layer.get_geometry_type_display() if layer.geometry_type else 'N/A'}
-SRID: {layer.srid}
-Features: {features.count()}
-Exported: {datetime.now()}
+            try:
+                result = self.write_shapefile(layer, features, shp_path)
+                if not result['features_count']:
+                    raise ValueError(f"No hay features en {layer.name}")
 
-Generated by: SMGI Backend
-"""
-                
-                # Crear ZIP
                 with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for ext in ['.shp', '.shx', '.dbf', '.prj', '.cpg']:
-                        fp = f"{shp_path}{ext}"
-                        if os.path.exists(fp):
-                            zipf.write(fp, os.path.basename(fp))
-                    
-                    zipf.writestr(f"{filename}_metadata.txt", metadata_content)
-                
+                    self._zip_parts(zipf, shp_path)
+                    zipf.writestr(f"{filename}_metadata.txt", self._metadata(layer, result))
+
                 # Registrar en BD
                 file_record = FileRegistry.register_file(
                     file_path=zip_path,
@@ -140,65 +354,84 @@ Generated by: SMGI Backend
                     metadata={
                         'layer_id': layer.id,
                         'layer_name': layer.name,
-                        'feature_count': features.count(),
+                        'feature_count': result['features_count'],
                         'format': 'shapefile'
                     }
                 )
-                
-                logger.info(f"Export completado: {zip_path}")
-                
+
+                logger.info(
+                    f"Export completado: {zip_path} ({result['features_count']} features, "
+                    f"{result['skipped']} omitidos)"
+                )
+
                 return {
                     'success': True,
                     'file_path': zip_path,
                     'filename': os.path.basename(zip_path),
                     'size': os.path.getsize(zip_path),
                     'format': 'shapefile',
-                    'features_count': features.count(),
+                    'features_count': result['features_count'],
+                    'skipped': result['skipped'],
                     'file_id': file_record.id
                 }
-                
+
             except Exception as e:
                 logger.error(f"Error exportando: {e}")
                 if os.path.exists(zip_path):
                     os.remove(zip_path)
                 raise
-                
+
             finally:
-                if os.path.exists(temp_dir):
-                    shutil.rmtree(temp_dir)
-    
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
     def export_features(self, features, filename: str, crs: str = "EPSG:4326") -> dict:
-        """Exporta un conjunto de features."""
-        if features.exists():
-            return self.export_layer(features.first().layer, filename)
-        raise ValueError("No features to export")
-    
+        """Exporta un conjunto de features (de una misma capa)."""
+        first = features.select_related('layer').first()
+        if first is None:
+            raise ValueError("No features to export")
+        return self.export_layer(first.layer, filename, features=features)
+
     def export_dataset(self, dataset, filename: Optional[str] = None) -> dict:
-        """Exporta un dataset completo."""
+        """
+        Exporta un dataset completo en un único ZIP.
+
+        Cada capa va en su propia carpeta del ZIP; sus partes se escriben y
+        comprimen directamente, sin generar un ZIP por capa.
+        """
         if filename is None:
             filename = f"{dataset.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        temp_dir = tempfile.mkdtemp()
+
+        filename, final_zip = self._zip_path(f"{filename}_complete")
+        temp_dir = tempfile.mkdtemp(prefix='smgi_')
+        exports = []
         try:
-            exports = []
-            for layer in dataset.layers.filter(is_active=True):
-                result = self.export_layer(layer, f"{filename}_{layer.name.replace(' ', '_')}")
-                exports.append(result)
-            
-            # Crear ZIP con todos los exports
-            final_zip = os.path.join(self.output_dir, f"{filename}_complete.zip")
-            with zipfile.ZipFile(final_zip, 'w') as zipf:
-                for exp in exports:
-                    zipf.write(exp['file_path'], os.path.basename(exp['file_path']))
-            
-            return {
-                'success': True,
-                'file_path': final_zip,
-                'exports': exports
-            }
+            with file_lock(final_zip, timeout=60):
+                with zipfile.ZipFile(final_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                    for layer in dataset.layers.filter(is_active=True).order_by('id'):
+                        layer_name = layer.name.replace(' ', '_').replace('/', '_')
+                        shp_path = os.path.join(temp_dir, layer_name)
+                        result = self.write_shapefile(layer, layer.features.filter(is_active=True), shp_path)
+                        arc_prefix = f"{layer_name}_{layer.id}/"
+                        self._zip_parts(zipf, shp_path, arc_prefix)
+                        zipf.writestr(f"{arc_prefix}{layer_name}_metadata.txt", self._metadata(layer, result))
+                        exports.append({'layer_id': layer.id, 'layer_name': layer.name, **result})
+        except Exception:
+            if os.path.exists(final_zip):
+                os.remove(final_zip)
+            raise
         finally:
             shutil.rmtree(temp_dir, ignore_errors=True)
-    
+
+        return {
+            'success': True,
+            'file_path': final_zip,
+            'filename': os.path.basename(final_zip),
+            'size': os.path.getsize(final_zip),
+            'format': 'shapefile',
+            'features_count': sum(export['features_count'] for export in exports),
+            'exports': exports
+        }
+
     def cleanup(self):
         """Limpia el directorio de salida."""
         if self.output_dir and os.path.exists(self.output_dir):
@@ -1,8 +1,124 @@
 """
 Filters for Geodata app.
 """
+import math
+
+from django import forms
+from django.contrib.gis.geos import GEOSGeometry, GEOSException, Point, Polygon
+from django.db.models import Subquery
 from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
 from .models import DataSource, Layer, Feature, Dataset
+from .functions import DWithinMeters, KNNDistance
+
+METERS_PER_DEGREE = 111320.0
+MAX_NEAREST = 1000
+
+
+def has_active_filters(filterset) -> bool:
+    """Indica si algún filtro del filterset (ya validado) tiene valor."""
+    return any(value not in EMPTY_VALUES for value in filterset.form.cleaned_data.values())
+
+
+def _parse_numbers(value, count, label):
+    parts = [p.strip() for p in value.split(',')]
+    if len(parts) != count:
+        raise forms.ValidationError(f'{label}: se esperaban {count} valores separados por coma')
+    try:
+        numbers = [float(p) for p in parts]
+    except ValueError:
+        raise forms.ValidationError(f'{label}: valores numéricos no válidos')
+    if not all(math.isfinite(n) for n in numbers):
+        raise forms.ValidationError(f'{label}: valores numéricos no válidos')
+    return numbers
+
+
+class BBoxField(forms.CharField):
+    """minx,miny,maxx,maxy en EPSG:4326 -> Polygon."""
+
+    def clean(self, value):
+        value = super().clean(value)
+        if not value:
+            return None
+        minx, miny, maxx, maxy = _parse_numbers(value, 4, 'bbox')
+        if minx > maxx or miny > maxy:
+            raise forms.ValidationError('bbox: el mínimo debe ser menor que el máximo')
+        polygon = Polygon.from_bbox((minx, miny, maxx, maxy))
+        polygon.srid = 4326
+        return polygon
+
+
+class GeometryTextField(forms.CharField):
+    """Geometría en GeoJSON, WKT o EWKT -> GEOSGeometry (EPSG:4326 por defecto)."""
+
+    def clean(self, value):
+        value = super().clean(value)
+        if not value:
+            return None
+        try:
+            geom = GEOSGeometry(value)
+        except (GEOSException, ValueError, TypeError):
+            raise forms.ValidationError('intersects: geometría no válida (GeoJSON o WKT)')
+        if not geom.srid:
+            geom.srid = 4326
+        elif geom.srid != 4326:
+            geom.transform(4326)
+        return geom
+
+
+class DWithinField(forms.CharField):
+    """lon,lat,metros -> (Point, metros)."""
+
+    def clean(self, value):
+        value = super().clean(value)
+        if not value:
+            return None
+        lon, lat, meters = _parse_numbers(value, 3, 'dwithin')
+        if meters < 0:
+            raise forms.ValidationError('dwithin: la distancia no puede ser negativa')
+        return Point(lon, lat, srid=4326), meters
+
+
+class NearestField(forms.CharField):
+    """lon,lat,k -> (Point, k)."""
+
+    def clean(self, value):
+        value = super().clean(value)
+        if not value:
+            return None
+        lon, lat, k = _parse_numbers(value, 3, 'nearest')
+        if k != int(k) or not 1 <= k <= MAX_NEAREST:
+            raise forms.ValidationError(f'nearest: k debe ser un entero entre 1 y {MAX_NEAREST}')
+        return Point(lon, lat, srid=4326), int(k)
+
+
+class BBoxFilter(filters.Filter):
+    field_class = BBoxField
+
+
+class GeometryFilter(filters.Filter):
+    field_class = GeometryTextField
+
+
+class DWithinFilter(filters.Filter):
+    field_class = DWithinField
+
+
+class NearestFilter(filters.Filter):
+    field_class = NearestField
+
+
+def expanded_bbox(point: Point, meters: float) -> Polygon:
+    """Bbox en grados que contiene el círculo de radio 'meters' alrededor de point."""
+    dlat = meters / METERS_PER_DEGREE
+    dlon = meters / (METERS_PER_DEGREE * max(math.cos(math.radians(point.y)), 0.01))
+    margin = 1.01
+    polygon = Polygon.from_bbox((
+        point.x - dlon * margin, point.y - dlat * margin,
+        point.x + dlon * margin, point.y + dlat * margin,
+    ))
+    polygon.srid = 4326
+    return polygon
 
 
 class DataSourceFilter(filters.FilterSet):
@@ -59,9 +175,51 @@ class FeatureFilter(filters.FilterSet):
     created_after = filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
     created_before = filters.DateTimeFilter(field_name='created_at', lookup_expr='lte')
     
+    # Filtros espaciales (EPSG:4326); todos usan el índice GiST de geometry
+    bbox = BBoxFilter(method='filter_bbox', help_text='minx,miny,maxx,maxy')
+    intersects = GeometryFilter(method='filter_intersects', help_text='Geometría GeoJSON o WKT')
+    dwithin = DWithinFilter(method='filter_dwithin', help_text='lon,lat,metros')
+    # Debe declararse el último: limita a k sobre el resultado de los demás filtros
+    nearest = NearestFilter(method='filter_nearest', help_text='lon,lat,k')
+    
     class Meta:
         model = Feature
         fields = ['layer', 'feature_id', 'is_active']
+    
+    def filter_bbox(self, queryset, name, value):
+        """Features que intersectan el bbox."""
+        return queryset.filter(geometry__intersects=value)
+    
+    def filter_intersects(self, queryset, name, value):
+        """Features que intersectan la geometría dada."""
+        return queryset.filter(geometry__intersects=value)
+    
+    def filter_dwithin(self, queryset, name, value):
+        """
+        Features a menos de N metros de un punto.
+        
+        El && contra un bbox ampliado usa el índice GiST; ST_DWithin sobre
+        geography solo se evalúa para los candidatos.
+        """
+        point, meters = value
+        return queryset.filter(
+            geometry__bboverlaps=expanded_bbox(point, meters)
+        ).filter(DWithinMeters('geometry', point, meters))
+    
+    def filter_nearest(self, queryset, name, value):
+        """
+        Los k features más cercanos a un punto, ordenados por distancia.
+        
+        ORDER BY geometry <-> punto LIMIT k en una subconsulta usa el índice
+        GiST (KNN). El resultado son como mucho MAX_NEAREST filas ordenadas
+        por distancia: FeatureViewSet no las pagina (la paginación keyset
+        reordenaría por fecha) y streaming.feature_rows respeta el orden.
+        """
+        point, k = value
+        nearest_ids = queryset.order_by(KNNDistance('geometry', point)).values('pk')[:k]
+        return queryset.filter(pk__in=Subquery(nearest_ids)).annotate(
+            nearest_distance=KNNDistance('geometry', point)
+        ).order_by('nearest_distance', 'pk')
 
 
 class DatasetFilter(filters.FilterSet):
@@ -0,0 +1,64 @@
+"""
+Funciones espaciales de base de datos no incluidas en Django.
+"""
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.db.models.functions import GeomOutputGeoFunc
+from django.db.models import BooleanField, CharField, FloatField, Func, Value
+
+
+class SimplifyPreserveTopology(GeomOutputGeoFunc):
+    """ST_SimplifyPreserveTopology(geometría, tolerancia)."""
+
+    arity = 2
+
+    def __init__(self, expression, tolerance, **extra):
+        if not hasattr(tolerance, 'resolve_expression'):
+            tolerance = Value(float(tolerance), output_field=FloatField())
+        super().__init__(expression, tolerance, **extra)
+
+
+class KNNDistance(Func):
+    """
+    Operador de distancia <-> de PostGIS.
+
+    En ORDER BY ... LIMIT k usa el índice GiST (búsqueda KNN) en lugar de
+    calcular ST_Distance para todas las filas.
+    """
+
+    arg_joiner = ' <-> '
+    template = '(%(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, geometry, **extra):
+        if not hasattr(geometry, 'resolve_expression'):
+            geometry = Value(geometry, output_field=GeometryField(srid=geometry.srid))
+        super().__init__(expression, geometry, **extra)
+
+
+class DWithinMeters(Func):
+    """
+    ST_DWithin sobre geography (distancia en metros) como expresión booleana.
+
+    El cast a geography no puede usar el índice GiST de la geometría, así que
+    debe combinarse con un filtro && sobre un bbox ampliado (ver
+    filters.FeatureFilter).
+    """
+
+    output_field = BooleanField()
+
+    def __init__(self, expression, point, meters, **extra):
+        self.point = point
+        self.meters = float(meters)
+        super().__init__(expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        geom_sql, geom_params = compiler.compile(self.source_expressions[0])
+        sql = 'ST_DWithin((%s)::geography, ST_GeogFromText(%%s), %%s)' % geom_sql
+        return sql, [*geom_params, self.point.ewkt, self.meters]
+
+
+class GeometryType(Func):
+    """GeometryType(geometría): 'POINT', 'MULTIPOLYGON', ... (sin prefijo ST_)."""
+
+    function = 'GeometryType'
+    output_field = CharField()
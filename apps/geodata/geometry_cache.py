@@ -0,0 +1,227 @@
+"""
+Caché compacta de geometrías por capa.
+
+Guarda las geometrías activas de una capa como un único buffer WKB contiguo
+con un índice de offsets y un array paralelo de ids de Feature:
+
+    <GEODATA_GEOMETRY_CACHE_DIR>/<layer_id>/v<content_version>/
+        geometries.wkb   WKB concatenados
+        offsets.npy      int64, n + 1 offsets dentro de geometries.wkb
+        ids.npy          int64, id de Feature de cada geometría
+
+Los archivos se abren con memory-map, así que varios procesos del mismo
+host comparten las páginas y cargar una capa entera en un array de shapely
+es una sola llamada a shapely.from_wkb, sin consultas ni ida y vuelta por
+GeoJSON. Layer.content_version forma parte de la ruta: cualquier cambio en
+los features hace que la siguiente lectura reconstruya la caché y borre las
+versiones anteriores.
+"""
+import logging
+import mmap
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import shapely
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Capas abiertas (memory-maps) que se mantienen por proceso
+DEFAULT_MAX_OPEN = 8
+
+BUILD_CHUNK_SIZE = 5000
+
+
+def cache_root() -> Path:
+    return Path(getattr(settings, 'GEODATA_GEOMETRY_CACHE_DIR', settings.BASE_DIR / 'data' / 'geometry_cache'))
+
+
+def version_dir(layer_id, version) -> Path:
+    """Directorio de la caché de una versión de la capa."""
+    return cache_root() / str(layer_id) / f'v{version}'
+
+
+class LayerGeometries:
+    """
+    Geometrías de una versión de capa abiertas con memory-map.
+
+    Attributes:
+        ids: Array int64 de ids de Feature (memory-map de solo lectura)
+        offsets: Array int64 de n + 1 offsets dentro del buffer WKB
+        buffer: Buffer WKB contiguo (mmap)
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.ids = np.load(directory / 'ids.npy', mmap_mode='r')
+        self.offsets = np.load(directory / 'offsets.npy', mmap_mode='r')
+        with open(directory / 'geometries.wkb', 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b''
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets[-1])
+
+    def wkb(self, index: int) -> bytes:
+        """WKB de la geometría en la posición index."""
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def geometries(self, indexes: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Construye las geometrías shapely en una sola llamada vectorizada.
+
+        Args:
+            indexes: Posiciones a cargar (por defecto todas)
+
+        Returns:
+            Array de geometrías shapely, alineado con ids (o con indexes)
+        """
+        positions = range(len(self)) if indexes is None else indexes
+        offsets = self.offsets
+        return shapely.from_wkb([self.buffer[offsets[i]:offsets[i + 1]] for i in positions])
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+
+def build_geometry_cache(layer, version: int) -> Path:
+    """
+    Escribe la caché de una versión de la capa (sin cargarla en memoria).
+
+    Se escribe en un directorio temporal y se renombra al final; si otro
+    proceso ya la construyó se conserva la suya. Las versiones anteriores de
+    la capa se eliminan.
+
+    Args:
+        layer: Layer
+        version: content_version que se está cacheando
+
+    Returns:
+        Directorio de la caché
+    """
+    from django.contrib.gis.db.models.functions import AsWKB
+
+    target = version_dir(layer.id, version)
+    temp = target.parent / f'.build-{uuid.uuid4().hex}'
+    temp.mkdir(parents=True)
+
+    ids = []
+    offsets = [0]
+    rows = (
+        layer.features.filter(is_active=True, geometry__isnull=False)
+        .order_by('id')
+        .annotate(wkb=AsWKB('geometry'))
+        .values_list('id', 'wkb')
+        .iterator(chunk_size=BUILD_CHUNK_SIZE)
+    )
+
+    try:
+        with open(temp / 'geometries.wkb', 'wb') as f:
+            for feature_id, wkb in rows:
+                data = bytes(wkb)
+                f.write(data)
+                ids.append(feature_id)
+                offsets.append(offsets[-1] + len(data))
+
+        np.save(temp / 'ids.npy', np.asarray(ids, dtype=np.int64))
+        np.save(temp / 'offsets.npy', np.asarray(offsets, dtype=np.int64))
+
+        try:
+            os.rename(temp, target)
+        except OSError:
+            if not target.exists():
+                raise
+    finally:
+        shutil.rmtree(temp, ignore_errors=True)
+
+    # Solo versiones anteriores: otro proceso pudo construir ya una más nueva
+    for child in target.parent.iterdir():
+        if child.name.startswith('v') and child.name[1:].isdigit() and int(child.name[1:]) < version:
+            shutil.rmtree(child, ignore_errors=True)
+
+    logger.info(f"Geometry cache for layer {layer.id} v{version}: {len(ids)} geometries, {offsets[-1]} bytes")
+    return target
+
+
+_open = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def get_layer_geometries(layer) -> LayerGeometries:
+    """
+    Retorna las geometrías cacheadas de la versión actual de la capa.
+
+    La versión se lee de la base de datos (no de la instancia) para no
+    servir una caché vieja; si no existe en disco se construye.
+
+    Args:
+        layer: Layer
+
+    Returns:
+        LayerGeometries abierto (compartido en el proceso; no cerrarlo)
+    """
+    from .models import Layer
+
+    version = Layer.objects.filter(id=layer.id).values_list('content_version', flat=True).get()
+    key = (layer.id, version)
+
+    with _open_lock:
+        entry = _open.get(key)
+        if entry is not None:
+            _open.move_to_end(key)
+            return entry
+
+    directory = version_dir(layer.id, version)
+    if not (directory / 'offsets.npy').exists():
+        build_geometry_cache(layer, version)
+    entry = LayerGeometries(directory)
+
+    with _open_lock:
+        # Otra hebra pudo abrirla mientras se construía
+        existing = _open.get(key)
+        if existing is not None:
+            entry.close()
+            return existing
+
+        # Las entradas que salen no se cierran: un consumidor puede seguir
+        # usándolas y el memory-map se libera cuando deja de referenciarse
+        for stale in [k for k in _open if k[0] == layer.id]:
+            del _open[stale]
+        _open[key] = entry
+        max_open = getattr(settings, 'GEODATA_GEOMETRY_CACHE_MAX_OPEN', DEFAULT_MAX_OPEN)
+        while len(_open) > max_open:
+            _open.popitem(last=False)
+    return entry
+
+
+def load_layer_geometries(layer) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Carga todas las geometrías activas de una capa en un array de shapely.
+
+    Args:
+        layer: Layer
+
+    Returns:
+        Tupla (ids de Feature, geometrías shapely en el SRID de la capa)
+    """
+    entry = get_layer_geometries(layer)
+    return np.asarray(entry.ids), entry.geometries()
+
+
+def clear_geometry_cache(layer_id=None):
+    """Elimina la caché de una capa (o toda) del disco y del proceso."""
+    with _open_lock:
+        for key in [k for k in _open if layer_id is None or k[0] == layer_id]:
+            del _open[key]
+    target = cache_root() / str(layer_id) if layer_id is not None else cache_root()
+    shutil.rmtree(target, ignore_errors=True)
@@ -0,0 +1,29 @@
+"""
+Ingest pipeline for geodata app.
+"""
+from .columnar import (
+    FeatureIngestor,
+    INGEST_BACKENDS,
+    column_to_python,
+    frame_properties,
+    frame_geometries_wkb,
+    resolve_backend,
+)
+from .copy_loader import FeatureCopyLoader
+from .hashing import content_hash, content_hashes
+from .stages import GeometryStage
+from .upsert import FeatureUpserter
+
+__all__ = [
+    'FeatureIngestor',
+    'FeatureCopyLoader',
+    'FeatureUpserter',
+    'GeometryStage',
+    'INGEST_BACKENDS',
+    'column_to_python',
+    'content_hash',
+    'content_hashes',
+    'frame_properties',
+    'frame_geometries_wkb',
+    'resolve_backend',
+]
@@ -0,0 +1,78 @@
+"""
+Hash de contenido de features.
+
+El hash cubre la geometría normalizada (WKB 2D little-endian) y las
+propiedades serializadas de forma canónica (claves ordenadas), de modo que
+el mismo feature produce el mismo hash venga de un GeoDataFrame o de la
+base de datos.
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import shapely
+
+HASH_DIGEST_SIZE = 16
+
+
+def canonical_properties(properties: Optional[Dict]) -> bytes:
+    """Serialización estable de las propiedades (claves ordenadas, sin espacios)."""
+    return json.dumps(
+        properties or {},
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+        default=str
+    ).encode('utf-8')
+
+
+def normalize_wkb(geometries) -> np.ndarray:
+    """
+    Re-codifica geometrías a un WKB canónico (2D, little-endian).
+
+    Args:
+        geometries: Array de geometrías shapely o de WKB (bytes)
+
+    Returns:
+        Array de bytes WKB
+    """
+    geoms = np.asarray(geometries, dtype=object)
+    if len(geoms) and isinstance(geoms[0], (bytes, bytearray, memoryview)):
+        geoms = shapely.from_wkb([bytes(g) for g in geoms])
+    return shapely.to_wkb(geoms, output_dimension=2, byte_order=1, include_srid=False)
+
+
+def content_hash(wkb: bytes, properties: Optional[Dict]) -> str:
+    """
+    Hash de un feature a partir de su WKB canónico y sus propiedades.
+
+    Args:
+        wkb: Geometría en WKB canónico (ver normalize_wkb)
+        properties: Propiedades del feature
+
+    Returns:
+        Hash hexadecimal (32 caracteres)
+    """
+    digest = hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+    digest.update(bytes(wkb))
+    digest.update(b'\x00')
+    digest.update(canonical_properties(properties))
+    return digest.hexdigest()
+
+
+def content_hashes(geometries, properties: Iterable[Optional[Dict]]) -> List[str]:
+    """
+    Calcula los hashes de un lote de features.
+
+    Args:
+        geometries: Geometrías shapely o WKB del lote
+        properties: Propiedades del lote, en el mismo orden
+
+    Returns:
+        Lista de hashes
+    """
+    return [
+        content_hash(wkb, props)
+        for wkb, props in zip(normalize_wkb(geometries), properties)
+    ]
@@ -0,0 +1,310 @@
+"""
+Lector por bloques de archivos geoespaciales.
+
+En lugar de cargar el archivo completo con gpd.read_file, produce
+GeoDataFrames de tamaño fijo (rangos de filas con pyogrio, o lectura
+secuencial con Fiona) ya reproyectados a EPSG:4326, de modo que la memoria
+del worker no crece con el tamaño del archivo.
+
+Los rangos de filas solo se usan con drivers de acceso aleatorio: en los
+secuenciales (GeoJSON, KML) cada skip_features recorre el archivo desde el
+principio y el costo total crece de forma cuadrática.
+"""
+import logging
+import zipfile
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import geopandas as gpd
+
+try:
+    import pyogrio
+except ImportError:  # pragma: no cover - dependencia opcional
+    pyogrio = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 20000
+
+ZIP_PATTERNS = ['*.shp', '*.geojson', '*.json', '*.gpkg', '*.kml']
+
+# Extensiones de dataset de un solo archivo (la capa es el archivo)
+SINGLE_LAYER_EXTENSIONS = {'.shp': None, '.geojson': None, '.json': None, '.kml': 'KML'}
+
+# Drivers en los que skip_features salta directamente a la fila
+RANDOM_ACCESS_DRIVERS = {'GPKG', 'ESRI Shapefile'}
+
+GEOMETRY_TYPES = {
+    'POINT', 'LINESTRING', 'POLYGON', 'MULTIPOINT',
+    'MULTILINESTRING', 'MULTIPOLYGON', 'GEOMETRYCOLLECTION',
+}
+
+
+def resolve_dataset_path(file_path: str, filename: str, temp_dir: str) -> Tuple[str, Optional[str]]:
+    """
+    Localiza el archivo geoespacial a leer (extrayendo ZIPs si hace falta).
+
+    Args:
+        file_path: Ruta del archivo subido
+        filename: Nombre original del archivo
+        temp_dir: Directorio temporal para extraer ZIPs
+
+    Returns:
+        Tupla (ruta del dataset, driver OGR explícito o None)
+    """
+    filename_lower = filename.lower()
+
+    if filename_lower.endswith('.zip'):
+        with zipfile.ZipFile(file_path) as zf:
+            zf.extractall(temp_dir)
+
+        for pattern in ZIP_PATTERNS:
+            files = sorted(
+                f for f in Path(temp_dir).rglob(pattern)
+                if '__MACOSX' not in f.parts
+            )
+            if files:
+                logger.info(f"Found {pattern} file in ZIP: {files[0]}")
+                driver = 'KML' if pattern == '*.kml' else None
+                return str(files[0]), driver
+
+        raise ValueError('No se encontró archivo geoespacial en el ZIP')
+
+    if filename_lower.endswith(('.geojson', '.json', '.gpkg', '.shp')):
+        return file_path, None
+    if filename_lower.endswith('.kml'):
+        return file_path, 'KML'
+
+    raise ValueError(f'Formato no soportado: {filename}')
+
+
+class ZipDataset(NamedTuple):
+    """Dataset encontrado dentro de un ZIP (un archivo o una capa de GeoPackage)."""
+    path: str
+    name: str
+    layer: Optional[str] = None
+    driver: Optional[str] = None
+
+
+def extract_zip(file_path: str, directory: str) -> str:
+    """
+    Extrae un ZIP descartando metadatos de macOS y rutas fuera del destino.
+
+    Args:
+        file_path: Ruta del ZIP
+        directory: Directorio destino
+
+    Returns:
+        Directorio destino
+    """
+    root = Path(directory).resolve()
+    with zipfile.ZipFile(file_path) as zf:
+        for member in zf.infolist():
+            if member.is_dir() or '__MACOSX' in member.filename:
+                continue
+            target = (root / member.filename).resolve()
+            if root not in target.parents:
+                raise ValueError(f'Ruta no permitida en el ZIP: {member.filename}')
+            zf.extract(member, root)
+    return str(root)
+
+
+def gpkg_layers(path: str) -> List[str]:
+    """Capas con geometría de un GeoPackage."""
+    if pyogrio is not None:
+        return [str(name) for name, geometry_type in pyogrio.list_layers(path) if geometry_type]
+
+    import fiona
+    layers = []
+    for name in fiona.listlayers(path):
+        with fiona.open(path, layer=name) as src:
+            if src.schema.get('geometry') not in (None, 'None'):
+                layers.append(name)
+    return layers
+
+
+def discover_datasets(directory: str) -> List[ZipDataset]:
+    """
+    Lista todos los datasets de un directorio extraído, en orden estable.
+
+    Cada .shp/.geojson/.json/.kml es un dataset; cada capa con geometría de
+    un .gpkg es un dataset distinto. El nombre es la ruta relativa sin
+    extensión (más el nombre de la capa en GeoPackages con varias capas).
+
+    Args:
+        directory: Directorio con el contenido del ZIP
+
+    Returns:
+        Lista de ZipDataset
+    """
+    root = Path(directory)
+    datasets = []
+
+    for path in sorted(p for p in root.rglob('*') if p.is_file() and '__MACOSX' not in p.parts):
+        extension = path.suffix.lower()
+        name = path.relative_to(root).with_suffix('').as_posix()
+
+        if extension in SINGLE_LAYER_EXTENSIONS:
+            datasets.append(ZipDataset(str(path), name, driver=SINGLE_LAYER_EXTENSIONS[extension]))
+        elif extension == '.gpkg':
+            layers = gpkg_layers(str(path))
+            for layer in layers:
+                datasets.append(ZipDataset(
+                    str(path),
+                    f'{name}/{layer}' if len(layers) > 1 else name,
+                    layer=layer
+                ))
+
+    logger.info(f"Found {len(datasets)} datasets in {directory}")
+    return datasets
+
+
+def layer_geometry_type(geom_types: Set[str]) -> str:
+    """
+    Traduce los tipos de geometría vistos al valor de Layer.geometry_type.
+
+    Args:
+        geom_types: Tipos de geometría (nombres de shapely)
+
+    Returns:
+        Tipo normalizado, 'GEOMETRY' si hay mezcla o es desconocido
+    """
+    if len(geom_types) != 1:
+        return 'GEOMETRY'
+    geom_type = str(next(iter(geom_types))).upper()
+    return geom_type if geom_type in GEOMETRY_TYPES else 'GEOMETRY'
+
+
+class ChunkedGeoReader:
+    """
+    Itera un archivo geoespacial en GeoDataFrames de tamaño fijo.
+
+    Con pyogrio y un driver de acceso aleatorio se leen rangos de filas
+    (skip_features/max_features); en el resto se recorre una sola vez la
+    colección de Fiona de forma secuencial. Cada bloque se reproyecta a
+    target_srid antes de entregarse.
+    """
+
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 layer: Optional[str] = None, driver: Optional[str] = None,
+                 target_srid: int = 4326, stage=None):
+        """
+        Args:
+            path: Ruta del dataset
+            chunk_size: Features por bloque
+            layer: Nombre de la capa dentro del dataset (GeoPackage)
+            driver: Driver OGR explícito (p. ej. 'KML')
+            target_srid: SRID de salida
+            stage: GeometryStage que reproyecta y valida cada bloque en
+                paralelo (None: to_crs en el proceso actual)
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.layer = layer
+        self.driver = driver
+        self.target_srid = target_srid
+        self.stage = stage
+        self.geom_types: Set[str] = set()
+        self.chunks_read = 0
+        self.features_read = 0
+        self._total = None
+        self._crs = None
+        self._source_driver = None
+        self._crs_loaded = False
+
+    @property
+    def engine(self) -> str:
+        """Motor de lectura: rangos con pyogrio o recorrido secuencial con Fiona."""
+        self._load_info()
+        if pyogrio is not None and self._source_driver in RANDOM_ACCESS_DRIVERS:
+            return 'pyogrio'
+        return 'fiona'
+
+    def _load_info(self):
+        if self._crs_loaded:
+            return
+
+        if pyogrio is not None:
+            info = pyogrio.read_info(self.path, layer=self.layer)
+            self._total = info.get('features')
+            self._crs = info.get('crs')
+            self._source_driver = info.get('driver')
+        else:
+            import fiona
+            with fiona.open(self.path, layer=self.layer, driver=self.driver) as src:
+                self._total = len(src)
+                self._crs = src.crs.to_wkt() if src.crs else None
+                self._source_driver = src.driver
+
+        if self._total is not None and self._total < 0:
+            self._total = None
+        self._crs_loaded = True
+
+    @property
+    def total(self) -> Optional[int]:
+        """Cantidad total de features (None si el driver no la conoce)."""
+        self._load_info()
+        return self._total
+
+    @property
+    def crs(self):
+        """CRS de origen (WKT o cadena de autoridad) o None."""
+        self._load_info()
+        return self._crs
+
+    @property
+    def geometry_type(self) -> str:
+        """Tipo de geometría de la capa según los bloques ya leídos."""
+        return layer_geometry_type(self.geom_types)
+
+    def _iter_pyogrio(self) -> Iterator[gpd.GeoDataFrame]:
+        offset = 0
+        while True:
+            chunk = pyogrio.read_dataframe(
+                self.path,
+                layer=self.layer,
+                skip_features=offset,
+                max_features=self.chunk_size,
+            )
+            if len(chunk) == 0:
+                break
+            yield chunk
+            offset += len(chunk)
+            if len(chunk) < self.chunk_size:
+                break
+
+    def _iter_fiona(self) -> Iterator[gpd.GeoDataFrame]:
+        import fiona
+
+        with fiona.open(self.path, layer=self.layer, driver=self.driver) as src:
+            crs = src.crs.to_wkt() if src.crs else None
+            columns = list(src.schema['properties'].keys()) + ['geometry']
+            records = iter(src)
+            while True:
+                batch = list(islice(records, self.chunk_size))
+                if not batch:
+                    break
+                yield gpd.GeoDataFrame.from_features(batch, crs=crs, columns=columns)
+
+    def _reproject(self, chunk: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        if chunk.crs is None:
+            if self.chunks_read == 0:
+                logger.warning(f"No CRS found in {self.path}, assuming EPSG:{self.target_srid}")
+            return chunk.set_crs(epsg=self.target_srid)
+        if chunk.crs.to_epsg() != self.target_srid:
+            return chunk.to_crs(epsg=self.target_srid)
+        return chunk
+
+    def __iter__(self) -> Iterator[gpd.GeoDataFrame]:
+        chunks = self._iter_pyogrio() if self.engine == 'pyogrio' else self._iter_fiona()
+
+        for chunk in chunks:
+            if self.stage is not None:
+                chunk = self.stage.process(chunk, offset=self.features_read)
+            else:
+                chunk = self._reproject(chunk)
+            self.geom_types.update(chunk.geometry.geom_type.dropna().unique())
+            self.chunks_read += 1
+            self.features_read += len(chunk)
+            yield chunk
@@ -0,0 +1,253 @@
+"""
+Etapa de geometrías del pipeline de ingesta: reproyección y validación.
+
+Cada bloque del lector se parte en trozos que se procesan en paralelo en un
+ProcessPoolExecutor: reproyección con el Transformer vectorizado de pyproj
+(shapely.transform), validación con shapely.is_valid y reparación con
+shapely.make_valid, todo en bloque. Las geometrías viajan como WKB entre
+procesos. Las filas que no se pueden reparar quedan con geometría nula (el
+ingestor las cuenta como fallidas) y cada incidencia queda en un reporte por
+fila.
+"""
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Por debajo de este número de filas el bloque se procesa en el proceso actual
+DEFAULT_MIN_PARALLEL_ROWS = 5000
+
+# Incidencias guardadas en el reporte (los contadores no tienen límite)
+MAX_REPORTED_ERRORS = 1000
+
+REPAIRED = 'repaired'
+DROPPED = 'dropped'
+
+
+@lru_cache(maxsize=32)
+def _transformer(source_crs: str, target_srid: int):
+    from pyproj import Transformer
+
+    return Transformer.from_crs(source_crs, f'EPSG:{target_srid}', always_xy=True)
+
+
+def reproject_geometries(geoms: np.ndarray, source_crs: str, target_srid: int) -> np.ndarray:
+    """
+    Reproyecta un array de geometrías con un Transformer de pyproj.
+
+    Las coordenadas de todas las geometrías se transforman en una sola
+    llamada (2D y 3D por separado para conservar la Z).
+
+    Args:
+        geoms: Array de geometrías shapely
+        source_crs: CRS de origen (WKT o cadena de autoridad)
+        target_srid: SRID destino
+
+    Returns:
+        Array de geometrías reproyectadas
+    """
+    transformer = _transformer(source_crs, target_srid)
+    result = geoms.copy()
+    has_z = shapely.has_z(geoms)
+
+    def transform_xy(coords):
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([x, y])
+
+    def transform_xyz(coords):
+        x, y, z = transformer.transform(coords[:, 0], coords[:, 1], coords[:, 2])
+        return np.column_stack([x, y, z])
+
+    flat = ~has_z
+    if flat.any():
+        result[flat] = shapely.transform(geoms[flat], transform_xy)
+    if has_z.any():
+        result[has_z] = shapely.transform(geoms[has_z], transform_xyz, include_z=True)
+    return result
+
+
+def process_geometries(wkb: np.ndarray, source_crs: Optional[str], target_srid: int,
+                       repair: bool = True) -> Tuple[np.ndarray, List[Tuple[int, str, str]]]:
+    """
+    Reproyecta, valida y repara un trozo de geometrías (se ejecuta en el pool).
+
+    Args:
+        wkb: Array de WKB (None para filas sin geometría)
+        source_crs: CRS de origen; None si ya están en target_srid
+        target_srid: SRID destino
+        repair: Aplicar make_valid a las geometrías inválidas
+
+    Returns:
+        Tupla (array de WKB resultante, incidencias (fila, acción, motivo))
+    """
+    geoms = shapely.from_wkb(wkb, on_invalid='ignore')
+    errors = []
+
+    present = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms))
+    for i in np.flatnonzero(~present):
+        errors.append((int(i), DROPPED, 'Geometría vacía o nula'))
+
+    if source_crs is not None and present.any():
+        geoms[present] = reproject_geometries(geoms[present], source_crs, target_srid)
+        bounds = shapely.bounds(geoms[present])
+        finite = np.isfinite(bounds).all(axis=1)
+        if not finite.all():
+            out_of_domain = np.flatnonzero(present)[~finite]
+            geoms[out_of_domain] = None
+            present[out_of_domain] = False
+            errors.extend((int(i), DROPPED, 'Coordenadas fuera del dominio de la proyección') for i in out_of_domain)
+
+    invalid = present & ~shapely.is_valid(geoms)
+    if invalid.any():
+        indexes = np.flatnonzero(invalid)
+        reasons = shapely.is_valid_reason(geoms[indexes])
+
+        if repair:
+            repaired = shapely.make_valid(geoms[indexes])
+            unusable = shapely.is_missing(repaired) | shapely.is_empty(repaired)
+            geoms[indexes] = np.where(unusable, None, repaired)
+            for i, reason, lost in zip(indexes, reasons, unusable):
+                errors.append((int(i), DROPPED if lost else REPAIRED, reason))
+        else:
+            geoms[indexes] = None
+            errors.extend((int(i), DROPPED, reason) for i, reason in zip(indexes, reasons))
+
+    return shapely.to_wkb(geoms), sorted(errors)
+
+
+class GeometryStage:
+    """
+    Reproyecta y valida los bloques del lector usando todos los núcleos.
+
+    Cada llamada a process() parte el bloque en tantos trozos como workers
+    y los procesa en paralelo; el pool se crea en la primera llamada y se
+    reutiliza hasta close(). Dentro de un worker de Celery prefork (proceso
+    daemon, que no puede tener hijos) se usa un pool de hilos: GEOS y PROJ
+    liberan el GIL en las operaciones vectorizadas.
+    """
+
+    def __init__(self, target_srid: int = 4326, workers: Optional[int] = None, repair: bool = True,
+                 min_parallel_rows: int = DEFAULT_MIN_PARALLEL_ROWS):
+        """
+        Args:
+            target_srid: SRID de salida
+            workers: Procesos del pool (por defecto os.cpu_count())
+            repair: Reparar geometrías inválidas con make_valid (si no, se descartan)
+            min_parallel_rows: Filas mínimas para repartir un bloque en el pool
+        """
+        self.target_srid = target_srid
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.repair = repair
+        self.min_parallel_rows = min_parallel_rows
+        self.repaired = 0
+        self.dropped = 0
+        self.errors: List[Dict] = []
+        self._executor: Optional[Executor] = None
+
+    @classmethod
+    def from_settings(cls, target_srid: int = 4326) -> 'GeometryStage':
+        """Etapa configurada con GEODATA_GEOMETRY_WORKERS y GEODATA_REPAIR_GEOMETRIES."""
+        return cls(
+            target_srid=target_srid,
+            workers=getattr(settings, 'GEODATA_GEOMETRY_WORKERS', None),
+            repair=getattr(settings, 'GEODATA_REPAIR_GEOMETRIES', True)
+        )
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if multiprocessing.current_process().daemon:
+                logger.info(f"Daemon process, using {self.workers} threads for the geometry stage")
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='geometry')
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _source_crs(self, gdf: gpd.GeoDataFrame, offset: int) -> Optional[str]:
+        if gdf.crs is None:
+            if offset == 0:
+                logger.warning(f"No CRS found, assuming EPSG:{self.target_srid}")
+            return None
+        if gdf.crs.to_epsg() == self.target_srid:
+            return None
+        return gdf.crs.to_wkt()
+
+    def process(self, gdf: gpd.GeoDataFrame, offset: int = 0) -> gpd.GeoDataFrame:
+        """
+        Reproyecta y valida las geometrías de un bloque.
+
+        Args:
+            gdf: Bloque leído del archivo
+            offset: Posición de la primera fila del bloque en el archivo
+
+        Returns:
+            GeoDataFrame en target_srid con las mismas filas; las geometrías
+            irrecuperables quedan nulas
+        """
+        source_crs = self._source_crs(gdf, offset)
+        wkb = shapely.to_wkb(np.asarray(gdf.geometry.values, dtype=object))
+
+        parts = 1
+        if self.workers > 1 and len(wkb) >= self.min_parallel_rows:
+            parts = min(self.workers, math.ceil(len(wkb) / (self.min_parallel_rows // 2 or 1)))
+
+        if parts == 1:
+            results = [process_geometries(wkb, source_crs, self.target_srid, self.repair)]
+            starts = [0]
+        else:
+            chunks = np.array_split(wkb, parts)
+            starts = np.cumsum([0] + [len(chunk) for chunk in chunks[:-1]])
+            executor = self._get_executor()
+            futures = [
+                executor.submit(process_geometries, chunk, source_crs, self.target_srid, self.repair)
+                for chunk in chunks
+            ]
+            results = [future.result() for future in futures]
+
+        for start, (_wkb, errors) in zip(starts, results):
+            for row, action, reason in errors:
+                if action == REPAIRED:
+                    self.repaired += 1
+                else:
+                    self.dropped += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append({
+                        'row': offset + int(start) + row,
+                        'action': action,
+                        'reason': reason,
+                    })
+
+        geometry = shapely.from_wkb(np.concatenate([part for part, _errors in results]))
+        result = gdf.copy()
+        result[gdf.geometry.name] = gpd.GeoSeries(geometry, index=gdf.index, crs=f'EPSG:{self.target_srid}')
+        return result.set_crs(epsg=self.target_srid, allow_override=True)
+
+    def report(self) -> Dict:
+        """Reporte acumulado: contadores y primeras MAX_REPORTED_ERRORS incidencias."""
+        return {
+            'repaired': self.repaired,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'truncated': self.repaired + self.dropped > len(self.errors),
+        }
+
+    def close(self):
+        """Cierra el pool de workers."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
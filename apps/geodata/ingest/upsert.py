@@ -0,0 +1,265 @@
+"""
+Upsert de features por feature_id con detección de cambios por hash.
+
+Para sincronizaciones de fuentes externas (WFS, API): cada lote se compara
+con el hash almacenado (Feature.content_hash) de los features de la capa con
+el mismo feature_id, en una sola consulta por lote, y solo se escriben los
+nuevos (insert) y los que cambiaron (update). Al terminar una sincronización
+completa, deactivate_missing() desactiva (soft-delete) los features que la
+fuente ya no devuelve. Los features sin cambios no generan escrituras.
+"""
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import shapely
+from django.contrib.gis.db.models.functions import AsWKB
+from django.contrib.gis.geos import GEOSGeometry
+from django.utils import timezone
+
+from ..bulk import record_layer_delta
+from ..models import Feature
+from ..statistics import StatsDelta, frame_bounds, frame_statistics
+from .columnar import frame_properties, resolve_backend
+from .copy_loader import FeatureCopyLoader
+from .hashing import content_hashes, normalize_wkb
+
+logger = logging.getLogger(__name__)
+
+UPDATE_FIELDS = ['geometry', 'properties', 'content_hash', 'is_active', 'updated_by', 'updated_at']
+
+
+class FeatureUpserter:
+    """
+    Inserta o actualiza features de una capa identificándolos por feature_id.
+
+    Se puede llamar varias veces a upsert() con páginas sucesivas de la misma
+    fuente; los contadores se acumulan en la instancia.
+    """
+
+    def __init__(self, layer, user=None, backend: Optional[str] = None,
+                 batch_size: int = 1000, srid: int = 4326, using: str = 'default'):
+        """
+        Args:
+            layer: Layer destino
+            user: Usuario responsable de los cambios
+            backend: 'copy', 'orm' o None para usar GEODATA_INGEST_BACKEND (inserts)
+            batch_size: Tamaño de lote de bulk_create/bulk_update
+            srid: SRID de las geometrías de entrada
+            using: Alias de la base de datos
+        """
+        self.layer = layer
+        self.user = user
+        self.srid = srid
+        self.using = using
+        self.batch_size = batch_size
+        self.backend = resolve_backend(backend, using)
+        self.copy_loader = FeatureCopyLoader(using) if self.backend == 'copy' else None
+        self.processed = 0
+        self.added = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.deleted = 0
+        self.seen = set()
+
+    def existing_hashes(self, feature_ids: Sequence[str]) -> Dict[str, tuple]:
+        """
+        Hashes almacenados de los features de la capa con esos feature_id.
+
+        Los features sin hash (anteriores a la columna o editados a mano) se
+        hashean a partir de su geometría y propiedades.
+
+        Returns:
+            Dict {feature_id: (pk, hash, is_active)}
+        """
+        rows = list(
+            Feature.objects.using(self.using)
+            .filter(layer_id=self.layer.id, feature_id__in=list(feature_ids))
+            .values_list('id', 'feature_id', 'content_hash', 'is_active')
+        )
+        existing = {feature_id: (pk, digest, is_active) for pk, feature_id, digest, is_active in rows}
+
+        missing = [pk for pk, _fid, digest, _active in rows if not digest]
+        if missing:
+            legacy = list(
+                Feature.objects.using(self.using)
+                .filter(id__in=missing)
+                .annotate(wkb=AsWKB('geometry'))
+                .values_list('id', 'feature_id', 'wkb', 'properties', 'is_active')
+            )
+            hashes = content_hashes([row[2] for row in legacy], [row[3] for row in legacy])
+            for (pk, feature_id, _wkb, _props, is_active), digest in zip(legacy, hashes):
+                existing[feature_id] = (pk, digest, is_active)
+        return existing
+
+    def upsert(self, gdf, feature_ids: Sequence) -> Dict[str, int]:
+        """
+        Inserta los features nuevos y actualiza los que cambiaron.
+
+        Args:
+            gdf: GeoDataFrame en el SRID de la capa
+            feature_ids: ID externo de cada fila (mismo orden que gdf)
+
+        Returns:
+            Dict con contadores acumulados
+        """
+        total = len(gdf)
+        self.processed += total
+        if total == 0:
+            return self.summary()
+
+        ids = np.array(['' if fid is None else str(fid) for fid in feature_ids], dtype=object)
+        # Los ids con geometría inválida también cuentan como vistos: no se desactivan
+        self.seen.update(fid for fid in ids if fid)
+        geoms = np.asarray(gdf.geometry.values, dtype=object)
+        valid = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms)) & (ids != '')
+
+        # Si un feature_id se repite en la página, gana la última aparición
+        positions = {}
+        for pos in np.flatnonzero(valid):
+            positions[ids[pos]] = pos
+        keep = np.array(sorted(positions.values()), dtype=int)
+        self.failed += int(total - valid.sum())
+        if len(keep) < valid.sum():
+            logger.warning(f"Layer {self.layer.id}: {int(valid.sum()) - len(keep)} duplicated feature_id in page")
+
+        if len(keep) == 0:
+            return self.summary()
+
+        batch = gdf.iloc[keep]
+        batch_ids = [ids[pos] for pos in keep]
+        properties = frame_properties(batch)
+        wkb_values = normalize_wkb(np.asarray(batch.geometry.values, dtype=object))
+        hashes = content_hashes(wkb_values, properties)
+
+        existing = self.existing_hashes(batch_ids)
+
+        new_rows = []
+        changed_rows = []
+        reactivated = []
+        for i, (feature_id, digest) in enumerate(zip(batch_ids, hashes)):
+            current = existing.get(feature_id)
+            if current is None:
+                new_rows.append(i)
+            elif not current[2]:
+                changed_rows.append((i, current[0]))
+                reactivated.append(i)
+            elif current[1] != digest:
+                changed_rows.append((i, current[0]))
+            else:
+                self.unchanged += 1
+
+        delta = StatsDelta()
+        if new_rows:
+            created = self._insert(batch_ids, wkb_values, properties, hashes, new_rows)
+            self.added += created
+            inserted = batch.iloc[new_rows]
+            delta.add(created, frame_bounds(inserted), frame_statistics(inserted))
+        if changed_rows:
+            self._update(wkb_values, properties, hashes, changed_rows)
+            self.updated += len(changed_rows)
+            delta.change(frame_bounds(batch.iloc[[i for i, _pk in changed_rows]]))
+        if reactivated:
+            # Vuelven a contar en la capa (estaban desactivados)
+            restored = batch.iloc[reactivated]
+            delta.add(len(reactivated), frame_bounds(restored), frame_statistics(restored))
+
+        if delta:
+            record_layer_delta(self.layer.id, delta, using=self.using)
+
+        return self.summary()
+
+    def deactivate_missing(self) -> int:
+        """
+        Desactiva los features activos de la capa cuyo feature_id no se vio
+        en esta sincronización.
+
+        Llamar solo tras recorrer la fuente completa.
+
+        Returns:
+            Cantidad de features desactivados
+        """
+        active = (
+            Feature.objects.using(self.using)
+            .filter(layer_id=self.layer.id, is_active=True)
+            .exclude(feature_id='')
+            .values_list('id', 'feature_id')
+        )
+        stale = [pk for pk, feature_id in active.iterator(chunk_size=5000) if feature_id not in self.seen]
+        if not stale:
+            return 0
+
+        now = timezone.now()
+        user_id = self.user.id if self.user else None
+        for start in range(0, len(stale), self.batch_size):
+            Feature.objects.using(self.using).filter(id__in=stale[start:start + self.batch_size]).update(
+                is_active=False,
+                updated_by_id=user_id,
+                updated_at=now
+            )
+
+        delta = StatsDelta()
+        delta.remove(len(stale))
+        record_layer_delta(self.layer.id, delta, using=self.using)
+
+        self.deleted += len(stale)
+        logger.info(f"Layer {self.layer.id}: deactivated {len(stale)} features missing from source")
+        return len(stale)
+
+    def _insert(self, batch_ids, wkb_values, properties, hashes, rows: List[int]) -> int:
+        user_id = self.user.id if self.user else None
+
+        if self.copy_loader is not None:
+            geoms = shapely.set_srid(shapely.from_wkb([wkb_values[i] for i in rows]), self.srid)
+            ewkb = shapely.to_wkb(geoms, hex=True, include_srid=True)
+            return self.copy_loader.copy_rows(
+                self.layer.id,
+                ewkb,
+                [properties[i] for i in rows],
+                user_id=user_id,
+                feature_ids=[batch_ids[i] for i in rows],
+                hashes=[hashes[i] for i in rows]
+            )
+
+        features = [
+            Feature(
+                layer_id=self.layer.id,
+                geometry=GEOSGeometry(memoryview(wkb_values[i]), srid=self.srid),
+                properties=properties[i],
+                feature_id=batch_ids[i],
+                content_hash=hashes[i],
+                created_by_id=user_id
+            )
+            for i in rows
+        ]
+        Feature.objects.using(self.using).bulk_create(features, batch_size=self.batch_size)
+        return len(features)
+
+    def _update(self, wkb_values, properties, hashes, rows):
+        now = timezone.now()
+        user_id = self.user.id if self.user else None
+        features = [
+            Feature(
+                pk=pk,
+                geometry=GEOSGeometry(memoryview(wkb_values[i]), srid=self.srid),
+                properties=properties[i],
+                content_hash=hashes[i],
+                is_active=True,
+                updated_by_id=user_id,
+                updated_at=now
+            )
+            for i, pk in rows
+        ]
+        Feature.objects.using(self.using).bulk_update(features, UPDATE_FIELDS, batch_size=self.batch_size)
+
+    def summary(self) -> Dict[str, int]:
+        """Retorna los contadores acumulados."""
+        return {
+            'processed': self.processed,
+            'added': self.added,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'failed': self.failed,
+            'deleted': self.deleted,
+        }
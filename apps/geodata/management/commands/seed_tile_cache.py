@@ -0,0 +1,72 @@
+"""
+Management command para precargar la caché de teselas vectoriales.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.geodata.models import Layer
+from apps.geodata.tile_cache import cached_tile, get_tile_cache
+from apps.geodata.tiles import tiles_for_bounds, tiles_supported
+
+
+class Command(BaseCommand):
+    help = 'Genera y guarda en caché las teselas de los zooms bajos de las capas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--layer',
+            type=int,
+            action='append',
+            dest='layers',
+            help='ID de capa a precargar (repetible; por defecto todas las activas)',
+        )
+        parser.add_argument(
+            '--min-zoom',
+            type=int,
+            default=0,
+            help='Zoom mínimo (por defecto 0)',
+        )
+        parser.add_argument(
+            '--max-zoom',
+            type=int,
+            default=6,
+            help='Zoom máximo (por defecto 6)',
+        )
+        parser.add_argument(
+            '--properties',
+            default='',
+            help='Claves de properties a incluir, separadas por coma',
+        )
+
+    def handle(self, *args, **options):
+        if not tiles_supported():
+            raise CommandError('Las teselas vectoriales requieren PostGIS')
+        if get_tile_cache() is None:
+            raise CommandError('La caché de teselas está desactivada (GEODATA_TILE_CACHE_BACKEND)')
+
+        min_zoom = options['min_zoom']
+        max_zoom = options['max_zoom']
+        if not 0 <= min_zoom <= max_zoom:
+            raise CommandError('Rango de zoom no válido')
+
+        keys = [k.strip() for k in options['properties'].split(',') if k.strip()]
+
+        layers = Layer.objects.filter(is_active=True, extent__isnull=False)
+        if options['layers']:
+            layers = layers.filter(id__in=options['layers'])
+
+        total_tiles = 0
+        for layer in layers.iterator():
+            bounds = layer.get_bounds()
+            self.stdout.write(f'\nCapa {layer.id} ({layer.name}) v{layer.content_version}')
+
+            for z in range(min_zoom, max_zoom + 1):
+                count = 0
+                empty = 0
+                for _z, x, y in tiles_for_bounds(bounds, z):
+                    if not cached_tile(layer, z, x, y, properties=keys):
+                        empty += 1
+                    count += 1
+                total_tiles += count
+                self.stdout.write(f'   z{z}: {count} teselas ({empty} vacías)')
+
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Teselas precargadas: {total_tiles}'))
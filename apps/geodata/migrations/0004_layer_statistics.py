@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geodata", "0003_remove_layer_geodata_lay_data_so_bb35b8_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="layer",
+            name="statistics",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Conteos, nulos y rango por atributo (mantenido incrementalmente)",
+                verbose_name="estadísticas",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geodata", "0004_layer_statistics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="layer",
+            name="content_version",
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text="Se incrementa cada vez que cambian los features (invalida cachés)",
+                verbose_name="versión de contenido",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+# Garantiza un índice GiST sobre geodata_feature.geometry aunque la tabla se
+# haya creado sin el índice espacial de GeoDjango (restauraciones, cargas
+# manuales). Solo crea uno nuevo si no existe ningún GiST sobre la columna.
+ENSURE_GEOMETRY_GIST = """
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_class ix ON ix.oid = i.indexrelid
+        JOIN pg_am am ON am.oid = ix.relam
+        JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(i.indkey)
+        WHERE t.relname = 'geodata_feature'
+          AND a.attname = 'geometry'
+          AND am.amname = 'gist'
+    ) THEN
+        CREATE INDEX geodata_feature_geometry_gist ON geodata_feature USING GIST (geometry);
+    END IF;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geodata", "0005_layer_content_version"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="feature",
+            name="geodata_fea_layer_i_f6ae3a_idx",
+        ),
+        migrations.AddIndex(
+            model_name="feature",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["layer", "is_active"],
+                name="geodata_feature_layer_active",
+            ),
+        ),
+        migrations.RunSQL(ENSURE_GEOMETRY_GIST, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geodata", "0006_feature_spatial_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="feature",
+            index=models.Index(
+                fields=["layer", "created_at", "id"], name="geodata_feature_keyset"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="synclog",
+            name="geodata_syn_started_ae8895_idx",
+        ),
+        migrations.AddIndex(
+            model_name="synclog",
+            index=models.Index(
+                fields=["started_at", "id"], name="geodata_synclog_keyset"
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def clear_duplicate_feature_ids(apps, schema_editor):
+    """Deja feature_id solo en el feature más reciente de cada (capa, feature_id) repetido."""
+    Feature = apps.get_model("geodata", "Feature")
+    duplicates = (
+        Feature.objects.exclude(feature_id="")
+        .values("layer_id", "feature_id")
+        .annotate(n=Count("id"), keep=Max("id"))
+        .filter(n__gt=1)
+    )
+    for row in duplicates.iterator():
+        Feature.objects.filter(
+            layer_id=row["layer_id"], feature_id=row["feature_id"]
+        ).exclude(id=row["keep"]).update(feature_id="")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geodata", "0007_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feature",
+            name="content_hash",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Hash de geometría y propiedades de la última sincronización",
+                max_length=32,
+                verbose_name="hash de contenido",
+            ),
+        ),
+        migrations.RunPython(clear_duplicate_feature_ids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="feature",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("feature_id", ""), _negated=True),
+                fields=("layer", "feature_id"),
+                name="geodata_feature_layer_feature_id_uniq",
+            ),
+        ),
+    ]
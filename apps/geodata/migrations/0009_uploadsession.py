@@ -0,0 +1,94 @@
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("geodata", "0008_feature_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("filename", models.CharField(max_length=500, verbose_name="nombre de archivo")),
+                ("total_size", models.BigIntegerField(verbose_name="tamaño total (bytes)")),
+                ("chunk_size", models.PositiveIntegerField(verbose_name="tamaño de fragmento (bytes)")),
+                (
+                    "checksum",
+                    models.CharField(
+                        blank=True,
+                        help_text="Opcional; se verifica al ensamblar",
+                        max_length=64,
+                        verbose_name="SHA-256 del archivo",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendiente"),
+                            ("completed", "Completado"),
+                            ("failed", "Fallido"),
+                            ("aborted", "Cancelado"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="estado",
+                    ),
+                ),
+                (
+                    "options",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="name, description, is_public, tags, ingest_backend",
+                        verbose_name="opciones de la capa",
+                    ),
+                ),
+                ("task_id", models.CharField(blank=True, max_length=255, verbose_name="ID de tarea")),
+                ("error_message", models.TextField(blank=True, verbose_name="mensaje de error")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="fecha de creación")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="fecha de actualización")),
+                ("expires_at", models.DateTimeField(verbose_name="expira")),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="creado por",
+                    ),
+                ),
+                (
+                    "layer",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="upload_sessions",
+                        to="geodata.layer",
+                        verbose_name="capa",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "sesión de subida",
+                "verbose_name_plural": "sesiones de subida",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(fields=["status", "expires_at"], name="geodata_upload_status_expires")
+                ],
+            },
+        ),
+    ]
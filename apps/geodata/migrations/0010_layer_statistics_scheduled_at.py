@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geodata", "0009_uploadsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="layer",
+            name="statistics_scheduled_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Debounce compartido entre procesos de update_layer_statistics",
+                null=True,
+                verbose_name="recálculo de estadísticas programado",
+            ),
+        ),
+    ]
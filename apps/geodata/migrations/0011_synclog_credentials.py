@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geodata", "0010_layer_statistics_scheduled_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="synclog",
+            name="credentials",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Credenciales de una carga en segundo plano; la tarea las borra al leerlas",
+                verbose_name="credenciales",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geodata", "0011_synclog_credentials"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="uploadsession",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pendiente"),
+                    ("assembling", "Ensamblando"),
+                    ("completed", "Completado"),
+                    ("failed", "Fallido"),
+                    ("aborted", "Cancelado"),
+                ],
+                default="pending",
+                max_length=20,
+                verbose_name="estado",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("geodata", "0012_uploadsession_assembling_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="synclog",
+            name="requested_by",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Usuario que inició el job (visibilidad de jobs sin capa)",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="requested_jobs",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="solicitado por",
+            ),
+        ),
+    ]
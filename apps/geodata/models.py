@@ -2,6 +2,7 @@
 Models for Geodata app.
 SMGI - Sistema de Monitoreo Geoespacial Inteligente
 """
+import uuid
 from django.contrib.gis.db import models as gis_models
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -244,6 +245,23 @@ class Layer(BaseModel):
         blank=True,
         help_text=_('Definición de campos y tipos de datos')
     )
+    content_version = models.PositiveIntegerField(
+        _('versión de contenido'),
+        default=1,
+        help_text=_('Se incrementa cada vez que cambian los features (invalida cachés)')
+    )
+    statistics = models.JSONField(
+        _('estadísticas'),
+        default=dict,
+        blank=True,
+        help_text=_('Conteos, nulos y rango por atributo (mantenido incrementalmente)')
+    )
+    statistics_scheduled_at = models.DateTimeField(
+        _('recálculo de estadísticas programado'),
+        null=True,
+        blank=True,
+        help_text=_('Debounce compartido entre procesos de update_layer_statistics')
+    )
     is_public = models.BooleanField(
         _('público'),
         default=False
@@ -290,9 +308,18 @@ class Layer(BaseModel):
         return self.name
     
     def update_feature_count(self):
-        """Actualiza el conteo de features."""
-        self.feature_count = self.features.filter(is_active=True).count()
-        self.save(update_fields=['feature_count'])
+        """
+        Recalcula conteo, extent y estadísticas desde cero (modo reparación).
+
+        El mantenimiento normal es incremental (ver geodata.statistics).
+        """
+        from .statistics import recompute_layer_statistics
+        recompute_layer_statistics(self)
+    
+    def bump_content_version(self):
+        """Incrementa la versión de contenido (invalida teselas y GeoJSON en caché)."""
+        Layer.objects.filter(pk=self.pk).update(content_version=models.F('content_version') + 1)
+        self.refresh_from_db(fields=['content_version'])
     
     def get_bounds(self):
         """Retorna los límites de la capa en formato [minx, miny, maxx, maxy]."""
@@ -336,18 +363,69 @@ class Feature(BaseModel):
         blank=True,
         help_text=_('ID externo del feature')
     )
+    content_hash = models.CharField(
+        _('hash de contenido'),
+        max_length=32,
+        blank=True,
+        default='',
+        help_text=_('Hash de geometría y propiedades de la última sincronización')
+    )
     
     class Meta:
         verbose_name = _('feature')
         verbose_name_plural = _('features')
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['layer', 'is_active']),
+            # Parcial: las consultas de mapa solo leen features activos
+            models.Index(
+                fields=['layer', 'is_active'],
+                condition=models.Q(is_active=True),
+                name='geodata_feature_layer_active'
+            ),
             models.Index(fields=['feature_id']),
+            # Paginación por keyset de FeatureViewSet (?layer=...)
+            models.Index(fields=['layer', 'created_at', 'id'], name='geodata_feature_keyset'),
+        ]
+        constraints = [
+            # Un feature_id externo identifica un único feature por capa (upsert de syncs)
+            models.UniqueConstraint(
+                fields=['layer', 'feature_id'],
+                condition=~models.Q(feature_id=''),
+                name='geodata_feature_layer_feature_id_uniq'
+            ),
         ]
     
     def __str__(self):
         return f"Feature {self.id} - {self.layer.name}"
+    
+    def save(self, *args, **kwargs):
+        # Una edición individual deja el hash desactualizado: la próxima
+        # sincronización lo recalcula desde la geometría y las propiedades
+        self.content_hash = ''
+        self._previous_values = self._stored_values(kwargs.get('using') or self._state.db)
+        super().save(*args, **kwargs)
+    
+    def _stored_values(self, using):
+        """
+        Geometría, propiedades y estado guardados antes de esta escritura.
+        
+        El signal post_save los compara con los actuales para distinguir un
+        cambio de geometría de uno solo de propiedades (ver
+        statistics.feature_changed_delta). Se leen al guardar y no al cargar,
+        así las lecturas no pagan la comparación. Dentro de bulk_operation no
+        se consultan: el cambio cuenta como completo y la capa se recalcula
+        una sola vez al salir.
+        """
+        from .bulk import in_bulk_operation
+        
+        if self._state.adding or self.pk is None or in_bulk_operation():
+            return None
+        return (
+            type(self)._base_manager.using(using)
+            .filter(pk=self.pk)
+            .values('geometry', 'properties', 'is_active')
+            .first()
+        )
 
 
 class Dataset(BaseModel):
@@ -460,6 +538,21 @@ class SyncLog(models.Model):
         default=dict,
         blank=True
     )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='requested_jobs',
+        verbose_name=_('solicitado por'),
+        help_text=_('Usuario que inició el job (visibilidad de jobs sin capa)')
+    )
+    credentials = models.JSONField(
+        _('credenciales'),
+        default=dict,
+        blank=True,
+        help_text=_('Credenciales de una carga en segundo plano; la tarea las borra al leerlas')
+    )
     
     class Meta:
         verbose_name = _('log de sincronización')
@@ -468,7 +561,7 @@ class SyncLog(models.Model):
         indexes = [
             models.Index(fields=['data_source', 'status']),
             models.Index(fields=['layer', 'status']),
-            models.Index(fields=['started_at']),
+            models.Index(fields=['started_at', 'id'], name='geodata_synclog_keyset'),
         ]
     
     def __str__(self):
@@ -487,4 +580,111 @@ class SyncLog(models.Model):
         if self.records_processed == 0:
             return 0.0
         successful = self.records_added + self.records_updated
-        return round((successful / self.records_processed) * 100, 2)
\ No newline at end of file
+        return round((successful / self.records_processed) * 100, 2)
+
+
+class UploadSession(models.Model):
+    """
+    Subida reanudable de un archivo de capa en fragmentos (chunks).
+    
+    Los fragmentos se guardan en disco (GEODATA_UPLOAD_DIR/sessions/<id>/) y
+    se verifican con SHA-256; al completar se ensamblan y el archivo pasa a
+    process_layer_upload.
+    """
+    
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pendiente')
+        ASSEMBLING = 'assembling', _('Ensamblando')
+        COMPLETED = 'completed', _('Completado')
+        FAILED = 'failed', _('Fallido')
+        ABORTED = 'aborted', _('Cancelado')
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name=_('creado por')
+    )
+    filename = models.CharField(
+        _('nombre de archivo'),
+        max_length=500
+    )
+    total_size = models.BigIntegerField(
+        _('tamaño total (bytes)')
+    )
+    chunk_size = models.PositiveIntegerField(
+        _('tamaño de fragmento (bytes)')
+    )
+    checksum = models.CharField(
+        _('SHA-256 del archivo'),
+        max_length=64,
+        blank=True,
+        help_text=_('Opcional; se verifica al ensamblar')
+    )
+    status = models.CharField(
+        _('estado'),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    options = models.JSONField(
+        _('opciones de la capa'),
+        default=dict,
+        blank=True,
+        help_text=_('name, description, is_public, tags, ingest_backend')
+    )
+    layer = models.ForeignKey(
+        Layer,
+        on_delete=models.SET_NULL,
+        related_name='upload_sessions',
+        verbose_name=_('capa'),
+        null=True,
+        blank=True
+    )
+    task_id = models.CharField(
+        _('ID de tarea'),
+        max_length=255,
+        blank=True
+    )
+    error_message = models.TextField(
+        _('mensaje de error'),
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        _('fecha de creación'),
+        auto_now_add=True
+    )
+    updated_at = models.DateTimeField(
+        _('fecha de actualización'),
+        auto_now=True
+    )
+    expires_at = models.DateTimeField(
+        _('expira')
+    )
+    
+    class Meta:
+        verbose_name = _('sesión de subida')
+        verbose_name_plural = _('sesiones de subida')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='geodata_upload_status_expires'),
+        ]
+    
+    def __str__(self):
+        return f"Upload {self.filename} ({self.status})"
+    
+    @property
+    def total_chunks(self):
+        """Cantidad de fragmentos esperados."""
+        return max(1, -(-self.total_size // self.chunk_size))
+    
+    def expected_chunk_size(self, index):
+        """Tamaño esperado del fragmento index (el último puede ser menor)."""
+        if index == self.total_chunks - 1:
+            return self.total_size - self.chunk_size * index
+        return self.chunk_size
@@ -6,7 +6,7 @@ from rest_framework import serializers
 from rest_framework_gis.fields import GeometryField
 from django.contrib.gis.geos import GEOSGeometry
 import json
-from .models import DataSource, Layer, Feature, Dataset, SyncLog
+from .models import DataSource, Layer, Feature, Dataset, SyncLog, UploadSession
 
 
 class DataSourceSerializer(serializers.ModelSerializer):
@@ -42,12 +42,12 @@ class LayerSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'data_source', 'data_source_name', 'name', 'description',
             'layer_type', 'geometry_type', 'srid', 'feature_count', 'extent', 'style',
-            'properties_schema', 'metadata', 'is_public', 'is_queryable', 'is_active',
+            'properties_schema', 'statistics', 'metadata', 'is_public', 'is_queryable', 'is_active',
             'tags', 'original_filename', 'file_size',
             'created_by', 'created_by_username', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'created_at', 'updated_at', 'feature_count',
+            'id', 'created_at', 'updated_at', 'feature_count', 'statistics',
             'original_filename', 'file_size'
         ]
     
@@ -158,6 +158,11 @@ class URLLayerSerializer(serializers.Serializer):
         default='geojson',
         help_text="Tipo de servicio o formato del archivo"
     )
+    ingest_backend = serializers.ChoiceField(
+        choices=['copy', 'orm'],
+        required=False,
+        help_text="Backend de inserción: copy (COPY FROM STDIN) u orm (bulk_create)"
+    )
     is_public = serializers.BooleanField(default=False)
     tags = serializers.ListField(
         child=serializers.CharField(max_length=50),
@@ -189,6 +194,11 @@ class ArcGISLayerSerializer(serializers.Serializer):
         write_only=True,
         help_text="Contraseña para servicios protegidos"
     )
+    ingest_backend = serializers.ChoiceField(
+        choices=['copy', 'orm'],
+        required=False,
+        help_text="Backend de inserción: copy (COPY FROM STDIN) u orm (bulk_create)"
+    )
     is_public = serializers.BooleanField(default=False)
     tags = serializers.ListField(
         child=serializers.CharField(max_length=50),
@@ -239,6 +249,24 @@ class DatabaseLayerSerializer(serializers.Serializer):
         default=4326,
         help_text="Sistema de referencia espacial (SRID)"
     )
+    columns = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False,
+        allow_empty=False,
+        help_text="Columnas de atributos a importar (por defecto todas)"
+    )
+    bbox = serializers.ListField(
+        child=serializers.FloatField(),
+        required=False,
+        min_length=4,
+        max_length=4,
+        help_text="Filtro espacial [minx, miny, maxx, maxy] en EPSG:4326"
+    )
+    ingest_backend = serializers.ChoiceField(
+        choices=['copy', 'orm'],
+        required=False,
+        help_text="Backend de inserción: copy (COPY FROM STDIN) u orm (bulk_create)"
+    )
     is_public = serializers.BooleanField(default=False)
     tags = serializers.ListField(
         child=serializers.CharField(max_length=50),
@@ -246,8 +274,85 @@ class DatabaseLayerSerializer(serializers.Serializer):
         allow_empty=True
     )
     
+    def validate_bbox(self, value):
+        """Validate bounding box."""
+        minx, miny, maxx, maxy = value
+        if minx >= maxx or miny >= maxy:
+            raise serializers.ValidationError("El bbox debe ser [minx, miny, maxx, maxy] con min < max")
+        return value
+    
     def validate_port(self, value):
         """Validate port number."""
         if value < 1 or value > 65535:
             raise serializers.ValidationError("El puerto debe estar entre 1 y 65535")
-        return value
\ No newline at end of file
+        return value
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable upload sessions."""
+    total_chunks = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'total_size', 'chunk_size', 'total_chunks',
+            'checksum', 'status', 'layer', 'task_id', 'error_message',
+            'created_at', 'updated_at', 'expires_at'
+        ]
+        read_only_fields = fields
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    """Serializer for starting a resumable upload."""
+    filename = serializers.CharField(max_length=500)
+    total_size = serializers.IntegerField(min_value=1, help_text="Tamaño total del archivo en bytes")
+    chunk_size = serializers.IntegerField(
+        required=False,
+        min_value=256 * 1024,
+        max_value=64 * 1024 * 1024,
+        help_text="Tamaño de fragmento en bytes (por defecto GEODATA_UPLOAD_CHUNK_SIZE)"
+    )
+    checksum = serializers.RegexField(
+        r'^[0-9a-fA-F]{64}$',
+        required=False,
+        allow_blank=True,
+        help_text="SHA-256 del archivo completo (opcional)"
+    )
+    name = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    description = serializers.CharField(required=False, allow_blank=True)
+    ingest_backend = serializers.ChoiceField(
+        choices=['copy', 'orm'],
+        required=False,
+        help_text="Backend de inserción: copy (COPY FROM STDIN) u orm (bulk_create)"
+    )
+    is_public = serializers.BooleanField(default=False)
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        required=False,
+        allow_empty=True
+    )
+    split_datasets = serializers.BooleanField(
+        default=False,
+        help_text="ZIP: importar cada dataset del archivo como una capa propia"
+    )
+    dataset_name = serializers.CharField(
+        max_length=255,
+        required=False,
+        allow_blank=True,
+        help_text="Dataset que agrupa las capas importadas con split_datasets"
+    )
+    
+    def validate_filename(self, value):
+        """Validate supported file extension."""
+        if not value.lower().endswith(('.zip', '.geojson', '.json', '.gpkg', '.kml', '.shp')):
+            raise serializers.ValidationError("Formato no soportado. Use ZIP (Shapefile), GeoJSON, GeoPackage o KML")
+        return value
+    
+    def validate_total_size(self, value):
+        """Validate maximum upload size."""
+        from django.conf import settings
+        
+        max_size = getattr(settings, 'GEODATA_UPLOAD_MAX_SIZE', 5 * 1024 * 1024 * 1024)
+        if value > max_size:
+            raise serializers.ValidationError(f"El archivo excede el tamaño máximo ({max_size // (1024 * 1024)}MB)")
+        return value
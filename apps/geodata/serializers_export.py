@@ -7,9 +7,17 @@ from rest_framework import serializers
 class ExportRequestSerializer(serializers.Serializer):
     """Serializer para solicitudes de exportación."""
     format = serializers.ChoiceField(
-        choices=['shapefile', 'geojson', 'both'],
+        choices=['shapefile', 'geojson', 'geojsonseq', 'gpkg', 'flatgeobuf', 'both'],
         default='shapefile',
-        help_text="Formato de exportación"
+        help_text="Formato de exportación (geojsonseq: un Feature por línea; gpkg y flatgeobuf con índice espacial)"
+    )
+    compress = serializers.BooleanField(
+        default=False,
+        help_text="Comprimir la salida GeoJSON con gzip"
+    )
+    pretty = serializers.BooleanField(
+        default=False,
+        help_text="GeoJSON con un feature por línea (por defecto compacto)"
     )
     filename = serializers.CharField(
         required=False,
@@ -2,5 +2,7 @@
 from .url_loader import URLLayerLoader
 from .arcgis_loader import ArcGISLoader
 from .database_loader import DatabaseLoader
+from .wfs_loader import WFSLoader
+from .api_loader import GeoJSONAPILoader
 
-__all__ = ['URLLayerLoader', 'ArcGISLoader', 'DatabaseLoader']
\ No newline at end of file
+__all__ = ['URLLayerLoader', 'ArcGISLoader', 'DatabaseLoader', 'WFSLoader', 'GeoJSONAPILoader']
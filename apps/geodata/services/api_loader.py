@@ -0,0 +1,107 @@
+from .url_loader import URLLayerLoader
+from .wfs_loader import feature_collection_frame
+import json
+import logging
+import requests
+import geopandas as gpd
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES = 10000
+
+
+class GeoJSONAPILoader(URLLayerLoader):
+    """
+    Loader for REST APIs returning GeoJSON FeatureCollections.
+
+    Follows 'next' links (OGC API - Features style) when the response
+    provides them; otherwise the single response is the whole layer.
+    """
+
+    def __init__(self, url: str, id_property: Optional[str] = None,
+                 params: Optional[Dict[str, Any]] = None,
+                 session: Optional[requests.Session] = None, timeout: int = 60):
+        """
+        Initialize API loader.
+
+        Args:
+            url: Endpoint returning a FeatureCollection
+            id_property: Property holding the external ID (default: GeoJSON feature id)
+            params: Query parameters for the first request
+            session: Shared requests.Session (auth, headers)
+            timeout: Per-request timeout in seconds
+        """
+        super().__init__(url)
+        self.id_property = id_property
+        self.params = params or {}
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.pages_read = 0
+        # Motivo por el que la lectura no cubre la colección completa (None si la cubre)
+        self.incomplete = None
+
+    @staticmethod
+    def next_link(collection: Dict[str, Any]) -> Optional[str]:
+        """Return the href of the rel='next' link, if any."""
+        for link in collection.get('links') or []:
+            if link.get('rel') == 'next' and link.get('href'):
+                return link['href']
+        return None
+
+    def fetch(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fetch and parse one FeatureCollection response."""
+        response = self.session.get(url, params=params, timeout=self.timeout, stream=True)
+        response.raise_for_status()
+        response.raw.decode_content = True
+
+        try:
+            collection = json.load(response.raw)
+        except ValueError:
+            raise Exception(f'Respuesta de la API no es JSON (Content-Type: {response.headers.get("Content-Type")})')
+        finally:
+            response.close()
+
+        if collection.get('type') != 'FeatureCollection':
+            raise Exception('Respuesta de la API sin FeatureCollection')
+        return collection
+
+    def iter_pages(self) -> Iterator[Tuple[gpd.GeoDataFrame, List[Optional[str]]]]:
+        """
+        Iterate all pages of the collection.
+
+        Yields:
+            Tuples (GeoDataFrame, feature IDs)
+        """
+        url, params = self.url, self.params
+        visited = set()
+        self.incomplete = 'lectura interrumpida'
+
+        while url and len(visited) < MAX_PAGES:
+            visited.add(url)
+            collection = self.fetch(url, params)
+            if not collection.get('features'):
+                url = None
+                break
+
+            self.pages_read += 1
+            yield feature_collection_frame(collection, self.id_property)
+
+            url, params = self.next_link(collection), None
+            if url in visited:
+                logger.warning(f"API next link loops back to {url}, stopping")
+                break
+
+        self.incomplete = f'quedaron páginas sin leer ({url})' if url else None
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Load the whole collection (small layers only; prefer iter_pages).
+
+        Returns:
+            Dict containing features and metadata
+        """
+        return {
+            'features': [gdf for gdf, _ids in self.iter_pages()],
+            'type': 'api'
+        }
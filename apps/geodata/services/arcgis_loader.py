@@ -1,36 +1,230 @@
 from .url_loader import URLLayerLoader
+from .wfs_loader import feature_collection_frame
+import json
+import logging
 import requests
-from typing import Dict, Any
+import geopandas as gpd
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RECORD_COUNT = 1000
+DEFAULT_MAX_WORKERS = 4
+
+# Tipo de geometría Esri -> Layer.GeometryType
+ESRI_GEOMETRY_TYPES = {
+    'esriGeometryPoint': 'POINT',
+    'esriGeometryMultipoint': 'MULTIPOINT',
+    'esriGeometryPolyline': 'MULTILINESTRING',
+    'esriGeometryPolygon': 'MULTIPOLYGON',
+}
 
 
 class ArcGISLoader(URLLayerLoader):
     """
-    Loader for ArcGIS REST API layers.
+    Loader for ArcGIS REST API layers (MapServer/FeatureServer).
+
+    Reads maxRecordCount from the layer metadata, splits the object IDs
+    (returnIdsOnly) into ranges of at most maxRecordCount and fetches the
+    pages concurrently with a bounded thread pool over a shared session.
+    Falls back to resultOffset paging, or to a single query, when the
+    service does not return object IDs.
     """
-    
+
+    def __init__(self, url: str, username: Optional[str] = None, password: Optional[str] = None,
+                 token: Optional[str] = None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 page_size: Optional[int] = None, where: str = '1=1',
+                 session: Optional[requests.Session] = None, timeout: int = 60):
+        """
+        Initialize ArcGIS loader.
+
+        Args:
+            url: Layer URL (.../FeatureServer/0 or .../MapServer/0)
+            username: User for protected services
+            password: Password for protected services
+            token: ArcGIS token (alternative to username/password)
+            max_workers: Concurrent page requests
+            page_size: Features per request (default: service maxRecordCount)
+            where: Attribute filter
+            session: Shared requests.Session
+            timeout: Per-request timeout in seconds
+        """
+        super().__init__(url.rstrip('/'))
+        self.max_workers = max(1, max_workers)
+        self.page_size = page_size
+        self.where = where
+        self.timeout = timeout
+        self.token = token
+        self.metadata = None
+        self.total = None
+        self.pages_read = 0
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        if username and password:
+            session.auth = (username, password)
+        self.session = session
+
+    def _params(self, **params) -> Dict[str, Any]:
+        if self.token:
+            params['token'] = self.token
+        return params
+
+    def _get_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        # POST evita URLs largas en filtros; la API REST admite ambos
+        response = self.session.post(url, data=self._params(**params), timeout=self.timeout, stream=True)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        try:
+            payload = json.load(response.raw)
+        except ValueError:
+            raise Exception(f'Respuesta ArcGIS no es JSON (Content-Type: {response.headers.get("Content-Type")})')
+        finally:
+            response.close()
+
+        # ArcGIS reporta errores con HTTP 200 y un objeto 'error'
+        if isinstance(payload, dict) and 'error' in payload:
+            error = payload['error']
+            raise Exception(f"ArcGIS error {error.get('code')}: {error.get('message')}")
+        return payload
+
+    def fetch_metadata(self) -> Dict[str, Any]:
+        """
+        Fetch the layer metadata (f=json).
+
+        Returns:
+            Layer metadata dict
+        """
+        if self.metadata is None:
+            self.metadata = self._get_json(self.url, {'f': 'json'})
+        return self.metadata
+
+    @property
+    def max_record_count(self) -> int:
+        metadata = self.fetch_metadata()
+        return int(metadata.get('maxRecordCount') or DEFAULT_MAX_RECORD_COUNT)
+
+    @property
+    def supports_pagination(self) -> bool:
+        metadata = self.fetch_metadata()
+        advanced = metadata.get('advancedQueryCapabilities') or {}
+        return bool(advanced.get('supportsPagination', metadata.get('supportsPagination', False)))
+
+    @property
+    def geometry_type(self) -> str:
+        """Layer.GeometryType equivalent to the service geometryType."""
+        return ESRI_GEOMETRY_TYPES.get(self.fetch_metadata().get('geometryType'), 'GEOMETRY')
+
+    def object_ids(self) -> Tuple[Optional[str], List[int]]:
+        """
+        Fetch all object IDs matching the filter (returnIdsOnly).
+
+        Returns:
+            Tuple (object ID field name, sorted IDs)
+        """
+        payload = self._get_json(f'{self.url}/query', {
+            'where': self.where,
+            'returnIdsOnly': 'true',
+            'f': 'json',
+        })
+        return payload.get('objectIdFieldName'), sorted(payload.get('objectIds') or [])
+
+    @staticmethod
+    def id_ranges(ids: List[int], size: int) -> List[Tuple[int, int]]:
+        """Split sorted IDs into (first, last) ranges of at most size IDs."""
+        return [(ids[i], ids[min(i + size, len(ids)) - 1]) for i in range(0, len(ids), size)]
+
+    def page_queries(self) -> List[Dict[str, Any]]:
+        """
+        Build the query parameters of every page.
+
+        Returns:
+            List of query parameter dicts (one per page)
+        """
+        page_size = min(self.page_size or self.max_record_count, self.max_record_count)
+        base = {'outFields': '*', 'returnGeometry': 'true', 'outSR': 4326, 'f': 'geojson'}
+
+        try:
+            oid_field, ids = self.object_ids()
+        except Exception as e:
+            logger.warning(f"returnIdsOnly not available for {self.url}: {e}")
+            oid_field, ids = None, []
+
+        if oid_field and ids:
+            self.total = len(ids)
+            return [
+                dict(base, where=f'({self.where}) AND {oid_field} >= {first} AND {oid_field} <= {last}')
+                for first, last in self.id_ranges(ids, page_size)
+            ]
+
+        if self.supports_pagination:
+            count = self._get_json(f'{self.url}/query', {
+                'where': self.where, 'returnCountOnly': 'true', 'f': 'json'
+            }).get('count', 0)
+            self.total = count
+            return [
+                dict(base, where=self.where, resultOffset=offset, resultRecordCount=page_size)
+                for offset in range(0, count, page_size)
+            ]
+
+        logger.warning(f"ArcGIS service {self.url} supports neither ID ranges nor paging; single query")
+        return [dict(base, where=self.where)]
+
+    def fetch_page(self, params: Dict[str, Any]) -> Tuple[gpd.GeoDataFrame, List[Optional[str]]]:
+        """Fetch one page and convert it into a GeoDataFrame with its object IDs."""
+        collection = self._get_json(f'{self.url}/query', params)
+        return feature_collection_frame(collection)
+
+    def iter_pages(self) -> Iterator[Tuple[gpd.GeoDataFrame, List[Optional[str]]]]:
+        """
+        Fetch all pages concurrently, yielding them as they complete.
+
+        At most 2 * max_workers pages are in flight or waiting, so memory is
+        bounded even when the consumer is slower than the network.
+
+        Yields:
+            Tuples (GeoDataFrame, object IDs)
+        """
+        queries = iter(self.page_queries())
+        max_pending = self.max_workers * 2
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='arcgis') as executor:
+            pending = set()
+            try:
+                while True:
+                    for params in queries:
+                        pending.add(executor.submit(self.fetch_page, params))
+                        if len(pending) >= max_pending:
+                            break
+                    if not pending:
+                        break
+
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.pages_read += 1
+                        yield future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
     def load(self) -> Dict[str, Any]:
         """
-        Load layer from ArcGIS REST API.
-        
+        Load layer from ArcGIS REST API (small layers only; prefer iter_pages).
+
         Returns:
             Dict containing layer metadata and features
         """
         try:
-            # Fetch layer metadata
-            metadata_url = f"{self.url}?f=json"
-            response = requests.get(metadata_url, timeout=30)
-            response.raise_for_status()
-            
-            metadata = response.json()
-            
-            # TODO: Implement feature fetching
-            # This is a basic implementation that can be extended
+            metadata = self.fetch_metadata()
             return {
                 'metadata': metadata,
-                'features': [],
+                'features': [gdf for gdf, _ids in self.iter_pages()],
                 'type': 'arcgis'
             }
         except requests.RequestException as e:
             raise Exception(f"Error loading ArcGIS layer: {str(e)}")
-        except Exception as e:
-            raise Exception(f"Unexpected error: {str(e)}")
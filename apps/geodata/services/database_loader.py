@@ -1,37 +1,296 @@
-from typing import Dict, Any
-from django.contrib.gis.db import models
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Set
+
+import geopandas as gpd
+import shapely
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FETCH_SIZE = 5000
+
+# Dialecto de SQLAlchemy por db_type
+DIALECTS = {
+    'postgresql': 'postgresql+psycopg2',
+    'mysql': 'mysql+pymysql',
+    'oracle': 'oracle+cx_oracle',
+    'sqlserver': 'mssql+pyodbc',
+}
+
+# Expresión que devuelve la geometría como WKB en cada motor
+WKB_EXPRESSIONS = {
+    'postgresql': 'ST_AsBinary({column})',
+    'mysql': 'ST_AsBinary({column})',
+    'oracle': 'SDO_UTIL.TO_WKBGEOMETRY({column})',
+    'sqlserver': '{column}.STAsBinary()',
+}
+
+GEOMETRY_ALIAS = '__smgi_geom_wkb'
+
+DEFAULT_ENGINE_CACHE_SIZE = 8
+
+# LRU de engines por huella de conexión; los expulsados se cierran (dispose)
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def connection_fingerprint(connection_params: Dict[str, Any]) -> str:
+    """Huella de los parámetros de conexión (clave de la caché de engines)."""
+    key = '\x00'.join(
+        str(connection_params.get(name, ''))
+        for name in ('db_type', 'host', 'port', 'database', 'username', 'password')
+    )
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def get_engine(connection_params: Dict[str, Any]):
+    """
+    Engine de SQLAlchemy con pool, compartido por conexiones con los mismos parámetros.
+
+    Se conservan como mucho GEODATA_DB_ENGINE_CACHE_SIZE engines por proceso:
+    al superarlo se cierra el pool del menos usado, así los parámetros
+    distintos que llegan desde la API no dejan conexiones abiertas para siempre.
+
+    Args:
+        connection_params: db_type, host, port, database, username, password
+
+    Returns:
+        Engine de SQLAlchemy
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import URL
+
+    db_type = connection_params.get('db_type', 'postgresql')
+    if db_type not in DIALECTS:
+        raise ValueError(f'Tipo de base de datos no soportado: {db_type}')
+
+    from django.conf import settings
+
+    max_engines = max(1, getattr(settings, 'GEODATA_DB_ENGINE_CACHE_SIZE', DEFAULT_ENGINE_CACHE_SIZE))
+    fingerprint = connection_fingerprint(connection_params)
+    evicted = []
+    with _engines_lock:
+        engine = _engines.get(fingerprint)
+        if engine is not None:
+            _engines.move_to_end(fingerprint)
+        else:
+            url = URL.create(
+                DIALECTS[db_type],
+                username=connection_params.get('username'),
+                password=connection_params.get('password'),
+                host=connection_params.get('host'),
+                port=connection_params.get('port'),
+                database=connection_params.get('database'),
+            )
+            engine = create_engine(
+                url,
+                pool_size=2,
+                max_overflow=2,
+                pool_pre_ping=True,
+                pool_recycle=1800
+            )
+            _engines[fingerprint] = engine
+            logger.info(f"Created engine for {db_type}://{url.host}:{url.port}/{url.database}")
+            while len(_engines) > max_engines:
+                evicted.append(_engines.popitem(last=False)[1])
+
+    # Fuera del lock: dispose() cierra las conexiones libres del pool; las que
+    # estén en uso se descartan al devolverse
+    for old_engine in evicted:
+        old_engine.dispose()
+        logger.info(f"Disposed engine for {old_engine.url.host}:{old_engine.url.port}/{old_engine.url.database}")
+    return engine
+
+
+def dispose_engines():
+    """Cierra todos los engines cacheados (p. ej. al terminar un worker)."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
 
 
 class DatabaseLoader:
     """
     Loader for database-based layers.
+
+    Lee la tabla con un cursor del lado del servidor (stream_results; en
+    PostgreSQL un cursor con nombre) en bloques de fetch_size filas, con las
+    columnas y el bbox aplicados en la consulta. Cada bloque se entrega como
+    GeoDataFrame en EPSG:4326, así que la memoria depende de fetch_size y no
+    del tamaño de la tabla.
     """
-    
-    def __init__(self, connection_params: Dict[str, Any]):
+
+    def __init__(self, connection_params: Dict[str, Any], table: Optional[str] = None,
+                 schema: str = 'public', geometry_column: str = 'geom', srid: int = 4326,
+                 columns: Optional[Sequence[str]] = None, bbox: Optional[Sequence[float]] = None,
+                 fetch_size: int = DEFAULT_FETCH_SIZE):
         """
         Initialize database loader.
-        
+
         Args:
             connection_params: Database connection parameters
+            table: Tabla con datos geoespaciales
+            schema: Schema de la tabla
+            geometry_column: Columna de geometría
+            srid: SRID de la geometría en la tabla
+            columns: Columnas de atributos a leer (None: todas)
+            bbox: Filtro (minx, miny, maxx, maxy) en EPSG:4326
+            fetch_size: Filas por fetchmany
         """
         self.connection_params = connection_params
-    
-    def load(self) -> Dict[str, Any]:
-        """
-        Load layer from database.
-        
-        Returns:
-            Dict containing layer data
-        """
-        # TODO: Implement database loading logic
-        raise NotImplementedError("Database loader not yet implemented")
-    
+        self.db_type = connection_params.get('db_type', 'postgresql')
+        self.table = table
+        self.schema = schema
+        self.geometry_column = geometry_column
+        self.srid = srid
+        self.columns = list(columns) if columns else None
+        self.bbox = tuple(bbox) if bbox else None
+        self.fetch_size = max(1, fetch_size)
+        self.geom_types: Set[str] = set()
+        self.rows_read = 0
+        self.chunks_read = 0
+
+    @property
+    def engine(self):
+        return get_engine(self.connection_params)
+
     def validate_connection(self) -> bool:
         """
         Validate database connection.
-        
+
         Returns:
             True if connection is valid
         """
-        # TODO: Implement connection validation
-        return False
+        from sqlalchemy import text
+
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text('SELECT 1' if self.db_type != 'oracle' else 'SELECT 1 FROM DUAL'))
+            return True
+        except Exception as e:
+            logger.warning(f"Database connection failed: {e}")
+            return False
+
+    def table_columns(self) -> List[str]:
+        """Columnas de la tabla (vía inspector; valida que la tabla exista)."""
+        from sqlalchemy import inspect
+
+        columns = inspect(self.engine).get_columns(self.table, schema=self.schema)
+        if not columns:
+            raise ValueError(f'Tabla no encontrada: {self.schema}.{self.table}')
+        return [column['name'] for column in columns]
+
+    def resolve_columns(self) -> List[str]:
+        """
+        Columnas de atributos a leer, validadas contra la tabla.
+
+        Raises:
+            ValueError: Si la geometría o alguna columna pedida no existe
+        """
+        available = self.table_columns()
+        if self.geometry_column not in available:
+            raise ValueError(f'Columna de geometría no encontrada: {self.geometry_column}')
+
+        if self.columns is None:
+            return [name for name in available if name != self.geometry_column]
+
+        missing = [name for name in self.columns if name not in available]
+        if missing:
+            raise ValueError(f'Columnas no encontradas: {", ".join(missing)}')
+        return [name for name in self.columns if name != self.geometry_column]
+
+    def build_query(self, columns: List[str]):
+        """
+        Consulta con las columnas pedidas, la geometría en WKB y el bbox.
+
+        Returns:
+            Tupla (SQL, parámetros)
+        """
+        quote = self.engine.dialect.identifier_preparer.quote
+        geom = quote(self.geometry_column)
+        select = [quote(name) for name in columns]
+        select.append(f'{WKB_EXPRESSIONS[self.db_type].format(column=geom)} AS {quote(GEOMETRY_ALIAS)}')
+
+        sql = f'SELECT {", ".join(select)} FROM {quote(self.schema)}.{quote(self.table)}'
+        params = {}
+
+        if self.bbox and self.db_type == 'postgresql':
+            # El bbox se transforma al SRID de la tabla para usar su índice espacial
+            sql += (
+                f' WHERE {geom} && ST_Transform('
+                f'ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326), :srid)'
+            )
+            params = dict(zip(('minx', 'miny', 'maxx', 'maxy'), self.bbox), srid=self.srid)
+
+        return sql, params
+
+    def estimated_rows(self) -> Optional[int]:
+        """Filas estimadas de la tabla (pg_class.reltuples, sin COUNT(*)); None si no se conoce."""
+        if self.db_type != 'postgresql' or self.bbox:
+            return None
+
+        from sqlalchemy import text
+
+        try:
+            with self.engine.connect() as conn:
+                value = conn.execute(
+                    text('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)'),
+                    {'name': f'"{self.schema}"."{self.table}"'}
+                ).scalar()
+            return int(value) if value is not None and value >= 0 else None
+        except Exception:
+            return None
+
+    def _frame(self, rows, columns: List[str]) -> gpd.GeoDataFrame:
+        data = {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+        wkb = [row[-1] for row in rows]
+        geometry = shapely.from_wkb([bytes(value) if value is not None else None for value in wkb])
+        gdf = gpd.GeoDataFrame(data, geometry=geometry, crs=f'EPSG:{self.srid}')
+
+        if self.srid != 4326:
+            gdf = gdf.to_crs(epsg=4326)
+        if self.bbox and self.db_type != 'postgresql':
+            gdf = gdf.cx[self.bbox[0]:self.bbox[2], self.bbox[1]:self.bbox[3]]
+        return gdf
+
+    def iter_chunks(self) -> Iterator[gpd.GeoDataFrame]:
+        """
+        Itera la tabla en GeoDataFrames de hasta fetch_size filas.
+
+        Yields:
+            GeoDataFrames en EPSG:4326
+        """
+        from sqlalchemy import text
+
+        columns = self.resolve_columns()
+        sql, params = self.build_query(columns)
+        logger.info(f"Streaming {self.schema}.{self.table} ({len(columns)} columns, fetch {self.fetch_size})")
+
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=self.fetch_size).execute(
+                text(sql), params
+            )
+            try:
+                for rows in result.partitions(self.fetch_size):
+                    chunk = self._frame(rows, columns)
+                    self.geom_types.update(chunk.geometry.geom_type.dropna().unique())
+                    self.rows_read += len(rows)
+                    self.chunks_read += 1
+                    yield chunk
+            finally:
+                result.close()
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Load layer from database (small tables only; prefer iter_chunks).
+
+        Returns:
+            Dict containing layer data
+        """
+        return {
+            'features': list(self.iter_chunks()),
+            'type': 'database'
+        }
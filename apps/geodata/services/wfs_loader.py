@@ -0,0 +1,236 @@
+from .url_loader import URLLayerLoader
+import json
+import logging
+import requests
+import geopandas as gpd
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+
+def feature_collection_frame(collection: Dict[str, Any],
+                             id_property: Optional[str] = None) -> Tuple[gpd.GeoDataFrame, List[Optional[str]]]:
+    """
+    Convert a GeoJSON FeatureCollection into a GeoDataFrame and its feature IDs.
+
+    Args:
+        collection: FeatureCollection dict
+        id_property: Property holding the external ID (default: GeoJSON feature id)
+
+    Returns:
+        Tuple (GeoDataFrame in EPSG:4326, list of external IDs)
+    """
+    features = collection.get('features', [])
+
+    if id_property:
+        ids = [(f.get('properties') or {}).get(id_property) for f in features]
+    else:
+        ids = [f.get('id') for f in features]
+
+    crs = 'EPSG:4326'
+    crs_member = collection.get('crs') or {}
+    crs_name = (crs_member.get('properties') or {}).get('name')
+    if crs_name:
+        crs = crs_name
+
+    gdf = gpd.GeoDataFrame.from_features(features, crs=crs)
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs(epsg=4326)
+    return gdf, ids
+
+
+class WFSLoader(URLLayerLoader):
+    """
+    Loader for WFS 2.0 layers with paged GetFeature requests.
+
+    Pages with startIndex/count (ImplementsResultPaging) and requests GeoJSON
+    output. Each page is parsed straight from the response stream into a
+    GeoDataFrame, so memory depends on the page size, not on the layer size.
+    """
+
+    def __init__(self, url: str, type_name: str, page_size: Optional[int] = None,
+                 srs_name: str = 'EPSG:4326', id_property: Optional[str] = None,
+                 sort_by: Optional[str] = None, session: Optional[requests.Session] = None,
+                 timeout: int = 60, version: str = '2.0.0'):
+        """
+        Initialize WFS loader.
+
+        Args:
+            url: WFS endpoint
+            type_name: Feature type (typeNames)
+            page_size: Features per GetFeature request (default: server CountDefault)
+            srs_name: Requested output CRS
+            id_property: Property holding the external ID (default: GeoJSON feature id)
+            sort_by: Property for a stable paging order (recommended)
+            session: Shared requests.Session (auth, headers)
+            timeout: Per-request timeout in seconds
+            version: WFS version
+        """
+        super().__init__(url)
+        self.type_name = type_name
+        self.page_size = page_size
+        self.srs_name = srs_name
+        self.id_property = id_property
+        self.sort_by = sort_by
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.version = version
+        self.number_matched = None
+        self.pages_read = 0
+        self.features_read = 0
+        # Motivo por el que la lectura no cubre la fuente completa (None si la cubre)
+        self.incomplete = None
+
+    def server_count_default(self) -> Optional[int]:
+        """
+        Read the server CountDefault constraint from GetCapabilities.
+
+        Returns:
+            Server page limit, or None if the capabilities do not declare one
+        """
+        try:
+            from owslib.wfs import WebFeatureService
+
+            wfs = WebFeatureService(self.url, version=self.version, timeout=self.timeout)
+            type_names = list(wfs.contents)
+            constraint = getattr(wfs, 'constraints', {}).get('CountDefault')
+            value = getattr(constraint, 'value', None)
+        except Exception as e:
+            logger.warning(f"Could not read WFS capabilities for {self.url}: {e}")
+            return None
+
+        if self.type_name not in type_names:
+            raise ValueError(f'Feature type no encontrado en el servicio: {self.type_name}')
+        if value:
+            logger.info(f"WFS CountDefault for {self.url}: {value}")
+            return int(value)
+        return None
+
+    def discover_page_size(self) -> int:
+        """
+        Page size to use: the configured value (or the default), never above
+        the server CountDefault.
+
+        Returns:
+            Page size
+        """
+        server_limit = self.server_count_default()
+        page_size = self.page_size or server_limit or DEFAULT_PAGE_SIZE
+        if server_limit:
+            page_size = min(page_size, server_limit)
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        return self.page_size
+
+    def get_feature_params(self, start_index: int, count: int) -> Dict[str, Any]:
+        """Build GetFeature query parameters for a page."""
+        params = {
+            'service': 'WFS',
+            'version': self.version,
+            'request': 'GetFeature',
+            'typeNames': self.type_name,
+            'outputFormat': 'application/json',
+            'srsName': self.srs_name,
+            'startIndex': start_index,
+            'count': count,
+        }
+        if self.sort_by:
+            params['sortBy'] = self.sort_by
+        return params
+
+    def fetch_page(self, start_index: int, count: int) -> Dict[str, Any]:
+        """
+        Fetch one GetFeature page as a parsed FeatureCollection.
+
+        Args:
+            start_index: Zero-based index of the first feature
+            count: Maximum features in the page
+
+        Returns:
+            FeatureCollection dict
+        """
+        response = self.session.get(
+            self.url,
+            params=self.get_feature_params(start_index, count),
+            timeout=self.timeout,
+            stream=True
+        )
+        response.raise_for_status()
+        response.raw.decode_content = True
+
+        try:
+            collection = json.load(response.raw)
+        except ValueError:
+            raise Exception(f'Respuesta WFS no es GeoJSON (Content-Type: {response.headers.get("Content-Type")})')
+        finally:
+            response.close()
+
+        if collection.get('type') != 'FeatureCollection':
+            raise Exception('Respuesta WFS sin FeatureCollection')
+        return collection
+
+    def page_to_frame(self, collection: Dict[str, Any]) -> Tuple[gpd.GeoDataFrame, List[Optional[str]]]:
+        """Convert a FeatureCollection page into a GeoDataFrame and its feature IDs."""
+        return feature_collection_frame(collection, self.id_property)
+
+    def iter_pages(self) -> Iterator[Tuple[gpd.GeoDataFrame, List[Optional[str]]]]:
+        """
+        Iterate all pages of the feature type.
+
+        A short page does not end the read (the server may cap pages below
+        the requested count): paging stops on an empty page or once
+        numberMatched features were read. When it ends, self.incomplete is
+        None only if the whole type was read in a stable order (sort_by).
+
+        Yields:
+            Tuples (GeoDataFrame, feature IDs)
+        """
+        page_size = self.discover_page_size()
+        start_index = 0
+        previous_first = None
+        self.incomplete = 'lectura interrumpida'
+
+        while True:
+            collection = self.fetch_page(start_index, page_size)
+            if self.number_matched is None:
+                matched = collection.get('numberMatched')
+                self.number_matched = matched if isinstance(matched, int) else None
+
+            features = collection.get('features', [])
+            if not features:
+                break
+            # Un servidor que ignora startIndex repetiría la misma página sin fin
+            if features[0] == previous_first:
+                raise Exception(f'El servidor WFS repite la página en startIndex={start_index}')
+            previous_first = features[0]
+
+            self.pages_read += 1
+            yield self.page_to_frame(collection)
+
+            start_index += len(features)
+            if self.number_matched is not None and start_index >= self.number_matched:
+                break
+
+        self.features_read = start_index
+        if not self.sort_by:
+            self.incomplete = 'sin sort_by el orden entre páginas no es estable'
+        else:
+            self.incomplete = None
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Load the whole feature type (small layers only; prefer iter_pages).
+
+        Returns:
+            Dict containing features and metadata
+        """
+        features = []
+        for gdf, _ids in self.iter_pages():
+            features.append(gdf)
+        return {
+            'features': features,
+            'number_matched': self.number_matched,
+            'type': 'wfs'
+        }
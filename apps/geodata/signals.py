@@ -1,10 +1,10 @@
 """
 Signals for Geodata app.
 """
-from django.db.models.signals import post_save, pre_delete, m2m_changed
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
 from .models import DataSource, Layer, Feature, Dataset
-from .tasks import update_layer_statistics
+from .bulk import record_feature_saved, record_feature_deleted
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,15 +31,24 @@ def layer_post_save(sender, instance, created, **kwargs):
         logger.info(f"New layer created: {instance.name}")
 
 
+@receiver(post_delete, sender=Layer)
+def layer_post_delete(sender, instance, **kwargs):
+    """
+    Actions after Layer is deleted.
+    """
+    from .geometry_cache import clear_geometry_cache
+    
+    clear_geometry_cache(instance.id)
+
+
 @receiver(post_save, sender=Feature)
 def feature_post_save(sender, instance, created, **kwargs):
     """
     Actions after Feature is saved.
     Update layer statistics.
     """
-    if created:
-        # Trigger async task to update layer statistics
-        update_layer_statistics.delay(instance.layer.id)
+    # Delta incremental de conteo/extent/atributos (sin recorrer la capa)
+    record_feature_saved(instance, created)
 
 
 @receiver(pre_delete, sender=Feature)
@@ -48,7 +57,7 @@ def feature_pre_delete(sender, instance, **kwargs):
     Actions before Feature is deleted.
     """
     # Update layer statistics after deletion
-    update_layer_statistics.delay(instance.layer.id)
+    record_feature_deleted(instance)
 
 
 @receiver(m2m_changed, sender=Dataset.layers.through)
@@ -0,0 +1,355 @@
+"""
+Estadísticas incrementales de capas.
+
+Mantiene Layer.feature_count, Layer.extent y Layer.statistics (conteo,
+nulos, mínimo y máximo por atributo) aplicando deltas durante la ingesta y
+los borrados, sin recorrer toda la capa. Cada delta incrementa además
+Layer.content_version, que invalida las cachés derivadas de la capa.
+
+Los borrados y los cambios de geometría no pueden encoger el extent ni los
+mínimos/máximos, así que marcan la capa como 'stale' y una recomputación
+completa (modo reparación) los ajusta después. Un cambio solo de
+propiedades se aplica como delta de atributos, sin recomputación.
+"""
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from django.contrib.gis.geos import Polygon
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+Bounds = Tuple[float, float, float, float]
+
+
+def union_bounds(a: Optional[Bounds], b: Optional[Bounds]) -> Optional[Bounds]:
+    """Une dos bounding boxes (minx, miny, maxx, maxy)."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _scalar(value):
+    """Convierte un escalar NumPy a tipo Python."""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def merge_attribute_stats(current: Dict, other: Dict) -> Dict:
+    """
+    Combina estadísticas de atributos de dos conjuntos de features.
+
+    Args:
+        current: Estadísticas acumuladas {atributo: {count, null_count, min, max}}
+        other: Estadísticas a sumar
+
+    Returns:
+        Nuevo dict combinado
+    """
+    merged = {name: dict(entry) for name, entry in current.items()}
+    for name, entry in other.items():
+        target = merged.setdefault(name, {'count': 0, 'null_count': 0})
+        target['count'] = target.get('count', 0) + entry.get('count', 0)
+        target['null_count'] = target.get('null_count', 0) + entry.get('null_count', 0)
+        for key, pick in (('min', min), ('max', max)):
+            if entry.get(key) is None:
+                continue
+            target[key] = entry[key] if target.get(key) is None else pick(target[key], entry[key])
+    return merged
+
+
+def subtract_attribute_stats(current: Dict, removed: Dict) -> Dict:
+    """
+    Descuenta conteos de features eliminados (min/max no se pueden encoger).
+
+    Args:
+        current: Estadísticas acumuladas
+        removed: Estadísticas de los features eliminados
+
+    Returns:
+        Nuevo dict con los conteos descontados
+    """
+    result = {name: dict(entry) for name, entry in current.items()}
+    for name, entry in removed.items():
+        if name not in result:
+            continue
+        target = result[name]
+        target['count'] = max(0, target.get('count', 0) - entry.get('count', 0))
+        target['null_count'] = max(0, target.get('null_count', 0) - entry.get('null_count', 0))
+    return result
+
+
+def properties_statistics(properties_list: Iterable[Dict]) -> Dict:
+    """
+    Calcula estadísticas de atributos a partir de dicts de propiedades.
+
+    Args:
+        properties_list: Iterable de dicts de propiedades
+
+    Returns:
+        Dict {atributo: {count, null_count, min, max}}
+    """
+    stats = {}
+    for props in properties_list:
+        for name, value in (props or {}).items():
+            entry = stats.setdefault(name, {'count': 0, 'null_count': 0})
+            if value is None:
+                entry['null_count'] += 1
+                continue
+            entry['count'] += 1
+            if _is_number(value):
+                entry['min'] = value if entry.get('min') is None else min(entry['min'], value)
+                entry['max'] = value if entry.get('max') is None else max(entry['max'], value)
+    return stats
+
+
+def frame_statistics(gdf) -> Dict:
+    """
+    Calcula estadísticas de atributos de un GeoDataFrame columna por columna.
+
+    Args:
+        gdf: GeoDataFrame (solo se usan las columnas no geométricas)
+
+    Returns:
+        Dict {atributo: {count, null_count, min, max}}
+    """
+    geometry_name = gdf.geometry.name
+    stats = {}
+    for col in gdf.columns:
+        if col == geometry_name:
+            continue
+        series = gdf[col]
+        nulls = int(series.isna().sum())
+        entry = {'count': len(series) - nulls, 'null_count': nulls}
+        dtype = series.dtype
+        if (entry['count'] and pd.api.types.is_numeric_dtype(dtype)
+                and not pd.api.types.is_bool_dtype(dtype)
+                and not pd.api.types.is_complex_dtype(dtype)):
+            entry['min'] = _scalar(series.min())
+            entry['max'] = _scalar(series.max())
+        stats[col] = entry
+    return stats
+
+
+def frame_bounds(gdf) -> Optional[Bounds]:
+    """Bounding box de las geometrías no vacías de un GeoDataFrame."""
+    geoms = gdf.geometry
+    geoms = geoms[~(geoms.isna() | geoms.is_empty)]
+    if len(geoms) == 0:
+        return None
+    minx, miny, maxx, maxy = geoms.total_bounds
+    if np.isnan(minx):
+        return None
+    return (float(minx), float(miny), float(maxx), float(maxy))
+
+
+class StatsDelta:
+    """Cambio acumulado en las estadísticas de una capa."""
+
+    def __init__(self):
+        self.added = 0
+        self.removed = 0
+        self.bounds: Optional[Bounds] = None
+        self.attributes: Dict = {}
+        self.removed_attributes: Dict = {}
+        self.stale = False
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.bounds or self.stale
+                    or self.attributes or self.removed_attributes)
+
+    def add(self, count: int, bounds: Optional[Bounds] = None, attributes: Optional[Dict] = None):
+        """Registra features añadidos."""
+        self.added += count
+        self.bounds = union_bounds(self.bounds, bounds)
+        if attributes:
+            self.attributes = merge_attribute_stats(self.attributes, attributes)
+
+    def remove(self, count: int, attributes: Optional[Dict] = None):
+        """Registra features eliminados (deja extent y min/max desactualizados)."""
+        self.removed += count
+        self.stale = True
+        if attributes:
+            self.removed_attributes = merge_attribute_stats(self.removed_attributes, attributes)
+
+    def change(self, bounds: Optional[Bounds] = None):
+        """Registra una geometría modificada (el extent puede crecer o encoger)."""
+        self.bounds = union_bounds(self.bounds, bounds)
+        self.stale = True
+
+    def replace_attributes(self, old: Dict, new: Dict):
+        """Registra propiedades modificadas (ajusta conteos; min/max solo se amplían)."""
+        self.removed_attributes = merge_attribute_stats(self.removed_attributes, old)
+        self.attributes = merge_attribute_stats(self.attributes, new)
+
+    def merge(self, other: 'StatsDelta'):
+        """Suma otro delta a este."""
+        self.add(other.added, other.bounds, other.attributes)
+        self.removed += other.removed
+        self.removed_attributes = merge_attribute_stats(self.removed_attributes, other.removed_attributes)
+        self.stale = self.stale or other.stale
+
+
+def geometry_bounds(geometry) -> Optional[Bounds]:
+    """Bounding box de una geometría GEOS (None si está vacía)."""
+    if geometry is None or geometry.empty:
+        return None
+    return tuple(geometry.extent)
+
+
+def feature_added_delta(feature) -> StatsDelta:
+    """Delta para un Feature recién creado."""
+    delta = StatsDelta()
+    delta.add(1, geometry_bounds(feature.geometry), properties_statistics([feature.properties]))
+    return delta
+
+
+def feature_removed_delta(feature) -> StatsDelta:
+    """Delta para un Feature eliminado."""
+    delta = StatsDelta()
+    delta.remove(1, properties_statistics([feature.properties]))
+    return delta
+
+
+def feature_changed_delta(feature) -> StatsDelta:
+    """
+    Delta para un Feature existente modificado.
+
+    Compara con los valores guardados antes de la escritura
+    (Feature._previous_values): solo un cambio de geometría marca la capa
+    'stale'; un cambio de propiedades se registra como delta de atributos.
+    Sin valores previos (dentro de bulk_operation) o si cambia is_active se
+    asume un cambio completo.
+    """
+    delta = StatsDelta()
+    loaded = getattr(feature, '_previous_values', None)
+    if loaded is None or loaded['is_active'] != feature.is_active:
+        delta.change(geometry_bounds(feature.geometry))
+        return delta
+
+    if loaded['geometry'] != feature.geometry:
+        delta.change(geometry_bounds(feature.geometry))
+    if loaded['properties'] != feature.properties:
+        delta.replace_attributes(
+            properties_statistics([loaded['properties']]),
+            properties_statistics([feature.properties]),
+        )
+    return delta
+
+
+def _bounds_polygon(bounds: Bounds, srid: int) -> Polygon:
+    polygon = Polygon.from_bbox(bounds)
+    polygon.srid = srid
+    return polygon
+
+
+def apply_delta(layer_id, delta: StatsDelta) -> bool:
+    """
+    Aplica un delta a conteo, versión, extent y estadísticas de la capa.
+
+    Args:
+        layer_id: ID de la capa
+        delta: Cambios a aplicar
+
+    Returns:
+        True si la capa existe y se actualizó
+    """
+    from .models import Layer
+
+    if not delta:
+        return False
+
+    with transaction.atomic():
+        # Conteo y versión en un UPDATE relativo, sin leer antes la fila
+        updated = Layer.objects.filter(pk=layer_id).update(
+            feature_count=Greatest(F('feature_count') + (delta.added - delta.removed), 0),
+            content_version=F('content_version') + 1,
+        )
+        if not updated:
+            return False
+
+        needs_statistics = (delta.bounds is not None or delta.removed or delta.stale
+                            or delta.attributes or delta.removed_attributes)
+        if not needs_statistics:
+            return True
+
+        # El UPDATE anterior ya bloquea la fila hasta el final de la
+        # transacción: la lectura y escritura de extent/estadísticas no
+        # pueden intercalarse con otro delta
+        layer = Layer.objects.only('feature_count', 'extent', 'statistics', 'srid').get(pk=layer_id)
+
+        if delta.bounds is not None:
+            current = tuple(layer.extent.extent) if layer.extent else None
+            layer.extent = _bounds_polygon(union_bounds(current, delta.bounds), layer.srid)
+
+        statistics = dict(layer.statistics or {})
+        attributes = merge_attribute_stats(statistics.get('attributes', {}), delta.attributes)
+        if delta.removed_attributes:
+            attributes = subtract_attribute_stats(attributes, delta.removed_attributes)
+        statistics['attributes'] = attributes
+        statistics['stale'] = statistics.get('stale', False) or delta.stale
+        statistics['updated_at'] = timezone.now().isoformat()
+        if layer.feature_count == 0:
+            layer.extent = None
+            statistics = {'attributes': {}, 'stale': False, 'updated_at': statistics['updated_at']}
+        layer.statistics = statistics
+
+        layer.save(update_fields=['extent', 'statistics'])
+    return True
+
+
+def recompute_layer_statistics(layer, chunk_size: int = 5000) -> Dict:
+    """
+    Recalcula conteo, extent y atributos desde cero (modo reparación).
+
+    Args:
+        layer: Layer a recalcular
+        chunk_size: Filas por bloque al recorrer las propiedades
+
+    Returns:
+        Dict con feature_count, bounds y número de atributos
+    """
+    from django.contrib.gis.db.models import Extent
+
+    features = layer.features.filter(is_active=True)
+
+    aggregate = features.aggregate(extent=Extent('geometry'))
+    bounds = aggregate['extent']
+
+    attributes = {}
+    count = 0
+    batch = []
+    for props in features.values_list('properties', flat=True).iterator(chunk_size=chunk_size):
+        batch.append(props)
+        count += 1
+        if len(batch) >= chunk_size:
+            attributes = merge_attribute_stats(attributes, properties_statistics(batch))
+            batch = []
+    if batch:
+        attributes = merge_attribute_stats(attributes, properties_statistics(batch))
+
+    layer.feature_count = count
+    layer.extent = _bounds_polygon(bounds, layer.srid) if bounds else None
+    layer.statistics = {
+        'attributes': attributes,
+        'stale': False,
+        'updated_at': timezone.now().isoformat(),
+    }
+    layer.save(update_fields=['feature_count', 'extent', 'statistics'])
+
+    logger.info(f"Recomputed statistics for layer {layer.id}: {count} features")
+    return {
+        'feature_count': count,
+        'bounds': list(bounds) if bounds else None,
+        'attributes': len(attributes),
+    }
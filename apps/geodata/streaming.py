@@ -0,0 +1,117 @@
+"""
+Respuestas GeoJSON en streaming.
+
+Genera el FeatureCollection de una capa por fragmentos: la base de datos
+produce el texto de la geometría (AsGeoJSON) y de las propiedades (cast a
+texto), y las filas se leen con un cursor por bloques (.iterator), de modo
+que la memoria es constante y los primeros bytes salen de inmediato.
+"""
+import json
+import logging
+from typing import Iterator, Optional, Tuple
+
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+from .functions import SimplifyPreserveTopology
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STREAM_CHUNK_SIZE = 2000
+
+GEOJSON_CONTENT_TYPE = 'application/geo+json'
+
+
+def feature_collection_header(layer) -> str:
+    """Cabecera del FeatureCollection hasta la apertura de 'features'."""
+    header = {
+        'type': 'FeatureCollection',
+        'name': layer.name,
+        'crs': {
+            'type': 'name',
+            'properties': {
+                'name': f'urn:ogc:def:crs:EPSG::{layer.srid}'
+            }
+        },
+    }
+    return json.dumps(header, ensure_ascii=False)[:-1] + ', "features": ['
+
+
+def feature_rows(queryset, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+                 precision: Optional[int] = None,
+                 tolerance: Optional[float] = None) -> Iterator[Tuple[int, str, int, Optional[str], Optional[str]]]:
+    """
+    Lee features con la geometría y las propiedades ya serializadas a texto.
+
+    Args:
+        queryset: Features a leer
+        chunk_size: Filas por bloque leídas del cursor
+        precision: Decimales de las coordenadas (por defecto los de AsGeoJSON)
+        tolerance: Si se indica, simplifica en la base de datos con
+            ST_SimplifyPreserveTopology antes de serializar
+
+    Yields:
+        Tuplas (id, feature_id, layer_id, geometría GeoJSON, propiedades JSON)
+    """
+    geojson_kwargs = {'precision': precision} if precision is not None else {}
+    geometry = SimplifyPreserveTopology('geometry', tolerance) if tolerance else 'geometry'
+    # Un orden explícito (p. ej. por distancia en ?nearest=) se conserva
+    if not queryset.query.order_by:
+        queryset = queryset.order_by('id')
+    return (
+        queryset
+        .annotate(
+            geometry_json=AsGeoJSON(geometry, **geojson_kwargs),
+            properties_json=Cast('properties', output_field=TextField()),
+        )
+        .values_list('id', 'feature_id', 'layer_id', 'geometry_json', 'properties_json')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def iter_feature_collection(layer, queryset=None, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+                            precision: Optional[int] = None,
+                            tolerance: Optional[float] = None) -> Iterator[str]:
+    """
+    Produce el FeatureCollection de una capa como fragmentos de texto.
+
+    Args:
+        layer: Layer a serializar
+        queryset: Features a incluir (por defecto los activos de la capa)
+        chunk_size: Filas por bloque leídas del cursor y por fragmento emitido
+        precision: Decimales de las coordenadas (por defecto los de AsGeoJSON)
+        tolerance: Si se indica, simplifica en la base de datos con
+            ST_SimplifyPreserveTopology antes de serializar
+
+    Yields:
+        Fragmentos de texto JSON
+    """
+    if queryset is None:
+        queryset = layer.features.filter(is_active=True)
+
+    rows = feature_rows(queryset, chunk_size=chunk_size, precision=precision, tolerance=tolerance)
+
+    yield feature_collection_header(layer)
+
+    buffer = []
+    separator = ''
+    written = 0
+    for feature_id, _external_id, _layer_id, geometry_json, properties_json in rows:
+        if geometry_json is None:
+            continue
+        buffer.append(
+            f'{separator}{{"type": "Feature", "id": {feature_id}, '
+            f'"geometry": {geometry_json}, "properties": {properties_json or "{}"}}}'
+        )
+        separator = ', '
+        written += 1
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+
+    if buffer:
+        yield ''.join(buffer)
+
+    yield ']}'
+    logger.debug(f"Streamed {written} features for layer {layer.id}")
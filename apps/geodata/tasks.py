@@ -2,6 +2,7 @@
 Celery tasks for Geodata app.
 """
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from .models import DataSource, Layer, Feature, SyncLog
 import logging
@@ -70,39 +71,128 @@ def sync_data_source(data_source_id):
         return {'status': 'failed', 'error': str(e)}
 
 
+def resolve_sync_layer(data_source, name):
+    """
+    Capa destino de una sincronización.
+
+    Usa configuration['layer_id'] si existe; si no, la capa de la fuente con
+    ese nombre, creándola la primera vez.
+    """
+    layer_id = data_source.configuration.get('layer_id')
+    if layer_id:
+        return data_source.layers.get(id=layer_id)
+
+    layer, _created = data_source.layers.get_or_create(
+        name=name,
+        defaults={
+            'layer_type': Layer.LayerType.VECTOR,
+            'geometry_type': Layer.GeometryType.GEOMETRY,
+            'created_by': data_source.created_by,
+        }
+    )
+    return layer
+
+
+def source_session(data_source):
+    """requests.Session con las credenciales de la fuente (usuario/contraseña o API key)."""
+    session = requests.Session()
+    credentials = data_source.credentials or {}
+    if credentials.get('username'):
+        session.auth = (credentials['username'], credentials.get('password', ''))
+    if credentials.get('api_key'):
+        session.headers['Authorization'] = f"Bearer {credentials['api_key']}"
+    return session
+
+
+def upsert_source_pages(data_source, sync_log, layer, loader):
+    """
+    Upsert por feature_id de todas las páginas de un loader.
+
+    Solo escribe los features nuevos o modificados (comparando hashes) y, si
+    la fuente se recorrió completa, desactiva los que ya no devuelve
+    (configuration.deactivate_missing, activo por defecto).
+
+    Returns:
+        Resultado para sync_data_source
+    """
+    from .bulk import bulk_operation
+    from .ingest import FeatureUpserter
+
+    upserter = FeatureUpserter(layer, user=data_source.created_by)
+
+    with bulk_operation():
+        for gdf, feature_ids in loader.iter_pages():
+            counts = upserter.upsert(gdf, feature_ids)
+            sync_log.records_processed = counts['processed']
+            sync_log.details = {'layer_id': layer.id, 'pages': loader.pages_read}
+            sync_log.save(update_fields=['records_processed', 'details'])
+
+        # Solo con la fuente leída completa: un feature ausente de una lectura
+        # parcial no se borró en la fuente
+        warning = None
+        if data_source.configuration.get('deactivate_missing', True):
+            incomplete = getattr(loader, 'incomplete', None)
+            if incomplete:
+                warning = f'No se desactivaron features ausentes: {incomplete}'
+                logger.warning(f"Source {data_source.id}: {warning}")
+            else:
+                upserter.deactivate_missing()
+
+    counts = upserter.summary()
+    return {
+        'status': 'success',
+        'processed': counts['processed'],
+        'added': counts['added'],
+        'updated': counts['updated'],
+        'failed': counts['failed'],
+        'details': {
+            'layer_id': layer.id,
+            'unchanged': counts['unchanged'],
+            'deleted': counts['deleted'],
+            'pages': loader.pages_read,
+            'warning': warning,
+        }
+    }
+
+
 def sync_wfs_source(data_source, sync_log):
     """
     Sync data from a WFS (Web Feature Service) source.
+
+    Recorre el feature type con GetFeature paginado (startIndex/count) y hace
+    upsert por feature_id de cada página (ver upsert_source_pages).
+
+    Configuración (DataSource.configuration):
+        layer_name: Feature type (typeNames), obligatorio
+        layer_id: Capa destino (opcional; por defecto una capa con el nombre del feature type)
+        page_size: Features por página (opcional; por defecto CountDefault del servidor)
+        id_property: Propiedad con el ID externo (opcional; por defecto el id GeoJSON)
+        sort_by: Propiedad para un orden estable entre páginas; sin ella no
+            se desactivan los features ausentes
     """
+    from .services import WFSLoader
+
     try:
-        # TODO: Implement actual WFS sync logic
-        # This is a placeholder implementation
-        
         logger.info(f"Syncing WFS source: {data_source.url}")
-        
-        # Example: Get features from WFS
-        # params = {
-        #     'service': 'WFS',
-        #     'version': '2.0.0',
-        #     'request': 'GetFeature',
-        #     'typeName': data_source.configuration.get('layer_name'),
-        #     'outputFormat': 'application/json'
-        # }
-        # response = requests.get(data_source.url, params=params, timeout=30)
-        # response.raise_for_status()
-        # geojson_data = response.json()
-        
-        # Process features...
-        
-        return {
-            'status': 'success',
-            'processed': 0,
-            'added': 0,
-            'updated': 0,
-            'failed': 0,
-            'details': {'message': 'WFS sync placeholder'}
-        }
-        
+
+        config = data_source.configuration or {}
+        type_name = config.get('layer_name')
+        if not type_name:
+            raise ValueError('configuration.layer_name es obligatorio para fuentes WFS')
+
+        layer = resolve_sync_layer(data_source, type_name)
+        loader = WFSLoader(
+            data_source.url,
+            type_name,
+            page_size=config.get('page_size'),
+            id_property=config.get('id_property'),
+            sort_by=config.get('sort_by'),
+            session=source_session(data_source)
+        )
+        result = upsert_source_pages(data_source, sync_log, layer, loader)
+        result['details']['number_matched'] = loader.number_matched
+        return result
+
     except Exception as e:
         logger.error(f"Error syncing WFS source: {str(e)}")
         return {
@@ -118,36 +208,31 @@ def sync_wfs_source(data_source, sync_log):
 def sync_api_source(data_source, sync_log):
     """
     Sync data from a REST API source.
+
+    La API debe devolver un FeatureCollection GeoJSON; se siguen los enlaces
+    rel='next' si los hay. Upsert por feature_id (ver upsert_source_pages).
+
+    Configuración (DataSource.configuration):
+        layer_name: Nombre de la capa destino (opcional; por defecto el de la fuente)
+        layer_id: Capa destino (opcional)
+        id_property: Propiedad con el ID externo (opcional; por defecto el id GeoJSON)
+        params: Parámetros de la primera petición (opcional)
     """
+    from .services import GeoJSONAPILoader
+
     try:
         logger.info(f"Syncing API source: {data_source.url}")
-        
-        # Get authentication headers if needed
-        headers = {}
-        if 'api_key' in data_source.credentials:
-            headers['Authorization'] = f"Bearer {data_source.credentials['api_key']}"
-        
-        # Make API request
-        response = requests.get(
+
+        config = data_source.configuration or {}
+        layer = resolve_sync_layer(data_source, config.get('layer_name') or data_source.name)
+        loader = GeoJSONAPILoader(
             data_source.url,
-            headers=headers,
-            timeout=30
+            id_property=config.get('id_property'),
+            params=config.get('params'),
+            session=source_session(data_source)
         )
-        response.raise_for_status()
-        data = response.json()
-        
-        # TODO: Process API response and create/update features
-        # This depends on the API structure
-        
-        return {
-            'status': 'success',
-            'processed': 0,
-            'added': 0,
-            'updated': 0,
-            'failed': 0,
-            'details': {'message': 'API sync placeholder'}
-        }
-        
+        return upsert_source_pages(data_source, sync_log, layer, loader)
+
     except Exception as e:
         logger.error(f"Error syncing API source: {str(e)}")
         return {
@@ -246,28 +331,54 @@ def cleanup_old_sync_logs(days=30):
     return f"Deleted {deleted[0]} sync logs"
 
 
+@shared_task
+def cleanup_upload_sessions():
+    """
+    Delete expired resumable upload sessions and their chunks on disk.
+    """
+    from .models import UploadSession
+    from . import uploads
+    
+    expired = UploadSession.objects.filter(expires_at__lt=timezone.now())
+    count = 0
+    for session in expired.iterator():
+        uploads.discard(session)
+        count += 1
+    expired.delete()
+    
+    logger.info(f"Deleted {count} expired upload sessions")
+    return f"Deleted {count} upload sessions"
+
+
 @shared_task
 def update_layer_statistics(layer_id):
     """
-    Update statistics for a layer.
+    Recompute statistics for a layer from scratch (repair mode).
+    
+    Las estadísticas se mantienen de forma incremental; esta tarea se
+    programa tras borrados o cambios de geometría para ajustar el extent y
+    los rangos de atributos, que los deltas no pueden encoger.
     
     Args:
         layer_id: ID of the Layer
     """
+    from .bulk import enqueue_layer_statistics, release_statistics_schedule
+    from .statistics import recompute_layer_statistics
+    
+    # Liberar el debounce: cambios posteriores programan una nueva tarea
+    release_statistics_schedule(layer_id)
+    
     try:
         layer = Layer.objects.get(id=layer_id)
+        result = recompute_layer_statistics(layer)
         
-        # Update feature count and other statistics
-        feature_count = layer.features.filter(is_active=True).count()
+        # Un cambio durante el recálculo pudo quedar fuera: se repite
+        if Layer.objects.filter(id=layer_id).exclude(content_version=layer.content_version).exists():
+            logger.info(f"Layer {layer_id} changed while recomputing statistics, rescheduling")
+            enqueue_layer_statistics([layer_id])
         
-        # Calculate extent if not set
-        if not layer.extent and feature_count > 0:
-            from django.contrib.gis.db.models.functions import Extent
-            extent = layer.features.filter(is_active=True).aggregate(Extent('geometry'))
-            # TODO: Set layer.extent with calculated extent
-        
-        logger.info(f"Updated statistics for layer {layer.name}: {feature_count} features")
-        return {'status': 'success', 'feature_count': feature_count}
+        logger.info(f"Updated statistics for layer {layer.name}: {result['feature_count']} features")
+        return {'status': 'success', **result}
         
     except Layer.DoesNotExist:
         logger.error(f"Layer {layer_id} not found")
@@ -280,24 +391,27 @@ def update_layer_statistics(layer_id):
 # PROCESAMIENTO ASÍNCRONO DE UPLOADS GRANDES
 # ============================================================================
 
-@shared_task(bind=True, max_retries=2, default_retry_delay=120)
-def process_layer_upload(self, layer_id, file_path, original_filename, user_id):
+@shared_task(bind=True)
+def process_layer_upload(self, layer_id, file_path, original_filename, user_id, backend=None):
     """
     Procesa la subida de una capa de forma asíncrona.
     Optimizado para archivos grandes (1GB+, 100k+ features).
+    
+    Args:
+        backend: Backend de inserción ('copy' u 'orm'); None usa GEODATA_INGEST_BACKEND
     """
-    from django.contrib.gis.geos import GEOSGeometry
     from apps.users.models import User
-    import geopandas as gpd
+    from .ingest import FeatureIngestor, resolve_backend
+    from .ingest.readers import ChunkedGeoReader, resolve_dataset_path, DEFAULT_CHUNK_SIZE
+    from .ingest.stages import GeometryStage
     import tempfile
     import shutil
-    import zipfile
     import os
     import gc
-    from pathlib import Path
     
     sync_log = None
     temp_dir = None
+    stage = GeometryStage.from_settings()
     
     try:
         layer = Layer.objects.get(id=layer_id)
@@ -320,116 +434,82 @@ def process_layer_upload(self, layer_id, file_path, original_filename, user_id):
         # Directorio temporal
         temp_dir = tempfile.mkdtemp(prefix='smgi_upload_')
         
-        # Leer archivo
-        logger.info(f"[Task {self.request.id}] Leyendo archivo...")
-        gdf = _read_upload_file(file_path, original_filename, temp_dir)
+        # Abrir lector por bloques (el archivo nunca se carga completo en memoria)
+        dataset_path, driver = resolve_dataset_path(file_path, original_filename, temp_dir)
+        reader = ChunkedGeoReader(
+            dataset_path,
+            chunk_size=getattr(settings, 'GEODATA_READ_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+            driver=driver,
+            stage=stage
+        )
         
-        total_features = len(gdf)
-        logger.info(f"[Task {self.request.id}] Total features: {total_features}")
+        total_features = reader.total
+        logger.info(f"[Task {self.request.id}] Total features: {total_features} ({reader.engine})")
         
         if total_features == 0:
             raise ValueError('El archivo no contiene features')
         
-        # Reproyectar si es necesario
-        if gdf.crs and gdf.crs.to_epsg() != 4326:
-            logger.info(f"[Task {self.request.id}] Reproyectando de {gdf.crs} a EPSG:4326...")
-            gdf = gdf.to_crs(epsg=4326)
-        elif gdf.crs is None:
-            logger.warning(f"[Task {self.request.id}] Sin CRS, asumiendo EPSG:4326")
-            gdf = gdf.set_crs(epsg=4326)
-        
-        # Detectar tipo de geometría
-        geom_types = gdf.geometry.geom_type.unique()
-        geom_type = 'GEOMETRY' if len(geom_types) > 1 else str(geom_types[0]).upper()
-        
-        layer.geometry_type = geom_type
-        layer.save(update_fields=['geometry_type'])
-        
-        # Tamaño de lote según cantidad de features
-        if total_features > 50000:
+        # Tamaño de lote: COPY usa su valor por defecto, bulk_create según cantidad de features
+        backend = resolve_backend(backend)
+        if backend == 'copy':
+            batch_size = None
+        elif (total_features or 0) > 50000:
             batch_size = 250
-        elif total_features > 10000:
+        elif (total_features or 0) > 10000:
             batch_size = 500
         else:
             batch_size = 1000
         
-        features_created = 0
-        features_failed = 0
-        
-        logger.info(f"[Task {self.request.id}] Procesando en lotes de {batch_size}...")
+        ingestor = FeatureIngestor(layer, user, batch_size=batch_size, backend=backend)
+        logger.info(f"[Task {self.request.id}] Procesando en bloques de {reader.chunk_size}, lotes de {ingestor.batch_size} ({backend})...")
         
-        columns = [col for col in gdf.columns if col != 'geometry']
-        
-        for start_idx in range(0, total_features, batch_size):
-            end_idx = min(start_idx + batch_size, total_features)
-            batch_gdf = gdf.iloc[start_idx:end_idx]
-            
-            features_batch = []
-            
-            for idx, row in batch_gdf.iterrows():
-                if row.geometry is None or row.geometry.is_empty:
-                    features_failed += 1
-                    continue
-                
-                # Extraer propiedades
-                props = {}
-                for col in columns:
-                    val = row[col]
-                    if hasattr(val, 'item'):
-                        val = val.item()
-                    if val != val:  # NaN
-                        val = None
-                    if val is not None and not isinstance(val, (str, int, float, bool, list, dict)):
-                        val = str(val)
-                    props[col] = val
-                
-                try:
-                    geom = GEOSGeometry(row.geometry.wkt, srid=4326)
-                    features_batch.append(Feature(
-                        layer=layer,
-                        geometry=geom,
-                        properties=props,
-                        created_by=user
-                    ))
-                except Exception as e:
-                    features_failed += 1
-                    continue
-            
-            # Insertar lote
-            if features_batch:
-                Feature.objects.bulk_create(features_batch, batch_size=batch_size)
-                features_created += len(features_batch)
-            
-            # Progreso
-            progress = int((end_idx / total_features) * 100)
+        def report_progress(processed, created, failed):
+            progress = int((processed / total_features) * 100) if total_features else None
             
             self.update_state(
                 state='PROGRESS',
                 meta={
-                    'current': end_idx,
+                    'current': processed,
                     'total': total_features,
                     'percent': progress,
-                    'created': features_created,
-                    'failed': features_failed
+                    'created': created,
+                    'failed': failed,
+                    'chunk': reader.chunks_read,
                 }
             )
             
             # Actualizar log
-            sync_log.records_processed = end_idx
-            sync_log.records_added = features_created
-            sync_log.records_failed = features_failed
+            sync_log.records_processed = processed
+            sync_log.records_added = created
+            sync_log.records_failed = failed
             sync_log.details['progress'] = progress
+            sync_log.details['chunks_processed'] = reader.chunks_read
             sync_log.save(update_fields=['records_processed', 'records_added', 'records_failed', 'details'])
+        
+        for chunk in reader:
+            chunk_created = ingestor.created
+            ingestor.ingest(chunk, progress_callback=report_progress)
             
-            if progress % 10 == 0:
-                logger.info(f"[Task {self.request.id}] Progreso: {progress}% ({features_created} features)")
+            logger.info(
+                f"[Task {self.request.id}] Bloque {reader.chunks_read}: "
+                f"{len(chunk)} leídos, {ingestor.created - chunk_created} creados "
+                f"(total {ingestor.processed}/{total_features or '?'})"
+            )
             
-            # Liberar memoria
-            del features_batch
+            # Liberar memoria del bloque
+            del chunk
             gc.collect()
         
-        # Finalizar
-        layer.feature_count = features_created
+        if ingestor.processed == 0:
+            raise ValueError('El archivo no contiene features')
+        
+        total_features = ingestor.processed
+        features_created = ingestor.created
+        features_failed = ingestor.failed
+        
+        # Finalizar (tipo de geometría según los bloques leídos)
+        layer.refresh_from_db(fields=['feature_count', 'extent', 'statistics'])
+        layer.geometry_type = reader.geometry_type
         layer.metadata = {
             'processed_at': timezone.now().isoformat(),
             'task_id': self.request.id,
@@ -437,7 +517,7 @@ def process_layer_upload(self, layer_id, file_path, original_filename, user_id):
             'features_created': features_created,
             'features_failed': features_failed
         }
-        layer.save(update_fields=['feature_count', 'metadata'])
+        layer.save(update_fields=['geometry_type', 'metadata'])
         
         sync_log.status = 'success'
         sync_log.completed_at = timezone.now()
@@ -446,9 +526,12 @@ def process_layer_upload(self, layer_id, file_path, original_filename, user_id):
         sync_log.records_failed = features_failed
         sync_log.details['message'] = f'Completado: {features_created} features'
         sync_log.details['completed_at'] = timezone.now().isoformat()
+        sync_log.details['geometry_report'] = stage.report()
         sync_log.save()
         
         logger.info(f"[Task {self.request.id}] ✓ COMPLETADO: {features_created} features, {features_failed} fallidos")
+        if stage.repaired or stage.dropped:
+            logger.info(f"[Task {self.request.id}] Geometrías reparadas: {stage.repaired}, descartadas: {stage.dropped}")
         
         return {
             'success': True,
@@ -459,27 +542,13 @@ def process_layer_upload(self, layer_id, file_path, original_filename, user_id):
         }
         
     except Exception as e:
-        error_msg = str(e)
-        logger.error(f"[Task {self.request.id}] ✗ ERROR: {error_msg}", exc_info=True)
-        
-        if sync_log:
-            sync_log.status = 'failed'
-            sync_log.completed_at = timezone.now()
-            sync_log.error_message = error_msg
-            sync_log.save()
-        
-        try:
-            layer = Layer.objects.get(id=layer_id)
-            if layer.feature_count == 0:
-                layer.delete()
-        except:
-            pass
-        
-        if self.request.retries < self.max_retries:
-            raise self.retry(exc=e)
+        # Sin reintento: los bloques ya confirmados se duplicarían y el
+        # archivo se elimina en el finally
+        fail_load(self, layer_id, sync_log, e)
         raise
         
     finally:
+        stage.close()
         if temp_dir and os.path.exists(temp_dir):
             shutil.rmtree(temp_dir, ignore_errors=True)
         if file_path and os.path.exists(file_path):
@@ -490,36 +559,842 @@ def process_layer_upload(self, layer_id, file_path, original_filename, user_id):
         gc.collect()
 
 
-def _read_upload_file(file_path, filename, temp_dir):
-    """Lee archivos geoespaciales para upload."""
-    import geopandas as gpd
-    import zipfile
+# ============================================================================
+# CARGAS DESDE FUENTES REMOTAS (URL, ArcGIS, base de datos)
+# ============================================================================
+
+def start_load_log(task, layer, sync_log_id=None, **details):
+    """
+    SyncLog de una carga en segundo plano.
+
+    La vista crea el SyncLog antes de encolar la tarea (su id es el job id
+    que consulta el cliente); si no se pasa, se crea aquí.
+    """
+    details['task_id'] = task.request.id
+    if sync_log_id:
+        sync_log = SyncLog.objects.get(id=sync_log_id)
+        sync_log.details.update(details)
+        sync_log.status = SyncLog.Status.PROCESSING
+        sync_log.save(update_fields=['details', 'status'])
+        return sync_log
+    return SyncLog.objects.create(layer=layer, status=SyncLog.Status.PROCESSING, details=details)
+
+
+def pop_job_credentials(sync_log_id):
+    """
+    Lee y borra las credenciales que la vista guardó en el SyncLog del job.
+
+    Returns:
+        Dict de credenciales (vacío si no hay)
+    """
+    if not sync_log_id:
+        return {}
+    credentials = SyncLog.objects.filter(id=sync_log_id).values_list('credentials', flat=True).first() or {}
+    if credentials:
+        SyncLog.objects.filter(id=sync_log_id).update(credentials={})
+    return credentials
+
+
+def stream_chunks_into_layer(task, layer, user, chunks, sync_log, backend=None, total=None):
+    """
+    Inserta bloques de features en una capa a medida que llegan, con progreso.
+
+    Args:
+        task: Tarea Celery (bind=True) para update_state
+        layer: Capa destino
+        user: Usuario creador de los features
+        chunks: Iterable de GeoDataFrames en EPSG:4326
+        sync_log: SyncLog de la carga
+        backend: Backend de inserción ('copy' u 'orm')
+        total: Callable que retorna el total esperado (o None si se desconoce)
+
+    Returns:
+        FeatureIngestor con los contadores finales
+    """
+    from .bulk import bulk_operation
+    from .ingest import FeatureIngestor
+
+    ingestor = FeatureIngestor(layer, user, backend=backend)
+
+    with bulk_operation():
+        for chunk in chunks:
+            ingestor.ingest(chunk)
+
+            expected = total() if total else None
+            percent = min(int(ingestor.processed / expected * 100), 100) if expected else None
+            task.update_state(
+                state='PROGRESS',
+                meta={
+                    'job_id': sync_log.id,
+                    'current': ingestor.processed,
+                    'total': expected,
+                    'percent': percent,
+                    'created': ingestor.created,
+                    'failed': ingestor.failed,
+                }
+            )
+            sync_log.records_processed = ingestor.processed
+            sync_log.records_added = ingestor.created
+            sync_log.records_failed = ingestor.failed
+            sync_log.details['progress'] = percent
+            sync_log.details['total'] = expected
+            sync_log.save(update_fields=['records_processed', 'records_added', 'records_failed', 'details'])
+
+    return ingestor
+
+
+def finish_load(task, layer, sync_log, ingestor, geometry_type=None):
+    """Cierra una carga correcta: estadísticas, metadata de la capa y SyncLog."""
+    if ingestor.created == 0:
+        raise ValueError('La fuente no contiene features válidos')
+
+    layer.refresh_from_db(fields=['feature_count', 'extent', 'statistics'])
+    update_fields = ['metadata']
+    if geometry_type:
+        layer.geometry_type = geometry_type
+        update_fields.append('geometry_type')
+    layer.metadata['processed_at'] = timezone.now().isoformat()
+    layer.metadata['task_id'] = task.request.id
+    layer.metadata['features_created'] = ingestor.created
+    layer.metadata['features_failed'] = ingestor.failed
+    layer.save(update_fields=update_fields)
+
+    sync_log.status = SyncLog.Status.SUCCESS
+    sync_log.completed_at = timezone.now()
+    sync_log.details['progress'] = 100
+    sync_log.details['message'] = f'Completado: {ingestor.created} features'
+    sync_log.save()
+
+    logger.info(f"[Task {task.request.id}] {layer.name}: {ingestor.created} features, {ingestor.failed} fallidos")
+
+    return {
+        'success': True,
+        'job_id': sync_log.id,
+        'layer_id': layer.id,
+        'layer_name': layer.name,
+        'features_created': ingestor.created,
+        'features_failed': ingestor.failed
+    }
+
+
+def fail_load(task, layer_id, sync_log, error):
+    """
+    Registra el fallo de una carga.
+
+    Sin reintento (duplicaría features). Una capa vacía se elimina; el
+    SyncLog se desvincula antes para que el job siga consultable. Una capa
+    parcial se conserva con su SyncLog fallido.
+    """
+    from .bulk import bulk_operation
+
+    logger.error(f"[Task {task.request.id}] Load error: {error}", exc_info=True)
+
+    layer = Layer.objects.filter(id=layer_id).first()
+    empty = layer is not None and not layer.features.exists()
+
+    if sync_log:
+        sync_log.status = SyncLog.Status.FAILED
+        sync_log.completed_at = timezone.now()
+        sync_log.error_message = str(error)
+        if empty:
+            sync_log.layer = None
+            sync_log.details['layer_deleted'] = layer_id
+        sync_log.save()
+
+    if empty:
+        with bulk_operation():
+            layer.delete()
+
+
+def download_to_file(url, directory, filename, session=None, timeout=60):
+    """
+    Descarga una URL a un archivo en streaming (sin cargarla en memoria).
+
+    Args:
+        url: URL a descargar
+        directory: Directorio destino
+        filename: Nombre del archivo destino
+        session: requests.Session opcional
+        timeout: Timeout de conexión/lectura en segundos
+
+    Returns:
+        Ruta del archivo descargado
+
+    Raises:
+        ValueError: Si supera GEODATA_URL_MAX_BYTES
+    """
+    import os
+
+    max_bytes = getattr(settings, 'GEODATA_URL_MAX_BYTES', 1024 * 1024 * 1024)
+    path = os.path.join(directory, filename)
+    written = 0
+
+    with (session or requests).get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            for block in response.iter_content(chunk_size=1024 * 1024):
+                written += len(block)
+                if written > max_bytes:
+                    raise ValueError(f'La descarga excede el tamaño máximo ({max_bytes // (1024 * 1024)}MB)')
+                f.write(block)
+
+    logger.info(f"Downloaded {written} bytes from {url}")
+    return path
+
+
+# Extensión del archivo temporal por service_type de from_url
+URL_SERVICE_EXTENSIONS = {
+    'geojson': 'data.geojson',
+    'kml': 'data.kml',
+}
+
+
+@shared_task(bind=True)
+def load_url_layer(self, layer_id, url, service_type, user_id, backend=None, sync_log_id=None):
+    """
+    Carga un archivo remoto (GeoJSON, KML) en una capa existente.
+
+    El archivo se descarga una sola vez, en streaming, a un directorio
+    temporal y se lee por bloques con ChunkedGeoReader, igual que
+    process_layer_upload.
+
+    Args:
+        layer_id: Capa destino (creada por la vista)
+        url: URL del archivo
+        service_type: 'geojson' o 'kml'
+        user_id: Usuario que solicitó la carga
+        backend: Backend de inserción ('copy' u 'orm'); None usa GEODATA_INGEST_BACKEND
+        sync_log_id: SyncLog creado por la vista (job id)
+    """
+    from apps.users.models import User
+    from .ingest.readers import ChunkedGeoReader, resolve_dataset_path, DEFAULT_CHUNK_SIZE
+    from .ingest.stages import GeometryStage
+    import tempfile
+    import shutil
+
+    sync_log = None
+    temp_dir = tempfile.mkdtemp(prefix='smgi_url_')
+    stage = GeometryStage.from_settings()
+
+    try:
+        layer = Layer.objects.get(id=layer_id)
+        user = User.objects.get(id=user_id)
+        sync_log = start_load_log(self, layer, sync_log_id, source='url', url=url)
+
+        if service_type not in URL_SERVICE_EXTENSIONS:
+            raise ValueError(f'Tipo de servicio no soportado: {service_type}')
+
+        file_path = download_to_file(url, temp_dir, URL_SERVICE_EXTENSIONS[service_type])
+        dataset_path, driver = resolve_dataset_path(file_path, URL_SERVICE_EXTENSIONS[service_type], temp_dir)
+        reader = ChunkedGeoReader(
+            dataset_path,
+            chunk_size=getattr(settings, 'GEODATA_READ_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+            driver=driver,
+            stage=stage
+        )
+
+        ingestor = stream_chunks_into_layer(self, layer, user, reader, sync_log, backend=backend, total=lambda: reader.total)
+        sync_log.details['geometry_report'] = stage.report()
+        return finish_load(self, layer, sync_log, ingestor, geometry_type=reader.geometry_type)
+
+    except Exception as e:
+        fail_load(self, layer_id, sync_log, e)
+        raise
+
+    finally:
+        stage.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@shared_task(bind=True)
+def load_arcgis_layer(self, layer_id, service_url, user_id, backend=None, sync_log_id=None):
+    """
+    Carga los features de un servicio ArcGIS en una capa existente.
+
+    Las páginas se descargan en paralelo (ArcGISLoader) y cada una pasa
+    directamente al ingestor columnar a medida que llega.
+
+    Args:
+        layer_id: Capa destino (creada por la vista)
+        service_url: URL de la capa del servicio (.../FeatureServer/0)
+        user_id: Usuario que solicitó la carga
+        backend: Backend de inserción ('copy' u 'orm'); None usa GEODATA_INGEST_BACKEND
+        sync_log_id: SyncLog creado por la vista (job id); guarda el usuario y la
+            contraseña de servicios protegidos (ver pop_job_credentials)
+    """
+    from apps.users.models import User
+    from .services import ArcGISLoader
+
+    sync_log = None
+    credentials = pop_job_credentials(sync_log_id)
+
+    try:
+        layer = Layer.objects.get(id=layer_id)
+        user = User.objects.get(id=user_id)
+        sync_log = start_load_log(self, layer, sync_log_id, source='arcgis', service_url=service_url)
+
+        loader = ArcGISLoader(
+            service_url,
+            username=credentials.get('username'),
+            password=credentials.get('password'),
+            max_workers=getattr(settings, 'GEODATA_ARCGIS_MAX_WORKERS', 4)
+        )
+        logger.info(f"[Task {self.request.id}] ArcGIS {service_url}: maxRecordCount {loader.max_record_count}")
+
+        pages = (gdf for gdf, _ids in loader.iter_pages())
+        ingestor = stream_chunks_into_layer(self, layer, user, pages, sync_log, backend=backend, total=lambda: loader.total)
+        return finish_load(self, layer, sync_log, ingestor)
+
+    except Exception as e:
+        fail_load(self, layer_id, sync_log, e)
+        raise
+
+
+@shared_task(bind=True)
+def load_database_layer(self, layer_id, connection_params, table, user_id, schema='public',
+                        geometry_column='geom', srid=4326, columns=None, bbox=None, backend=None,
+                        sync_log_id=None):
+    """
+    Carga una tabla de una base de datos externa en una capa existente.
+
+    La tabla se lee con un cursor del lado del servidor (DatabaseLoader) y
+    cada bloque pasa directamente al ingestor columnar.
+
+    Args:
+        layer_id: Capa destino (creada por la vista)
+        connection_params: db_type, host, port, database (usuario y contraseña
+            se leen del SyncLog del job, ver pop_job_credentials)
+        table: Tabla origen
+        user_id: Usuario que solicitó la carga
+        schema: Schema de la tabla
+        geometry_column: Columna de geometría
+        srid: SRID de la geometría en la tabla
+        columns: Columnas de atributos a leer (None: todas)
+        bbox: Filtro (minx, miny, maxx, maxy) en EPSG:4326
+        backend: Backend de inserción ('copy' u 'orm'); None usa GEODATA_INGEST_BACKEND
+        sync_log_id: SyncLog creado por la vista (job id)
+    """
+    from apps.users.models import User
+    from .ingest.readers import layer_geometry_type
+    from .services import DatabaseLoader
+
+    sync_log = None
+    connection_params = {**connection_params, **pop_job_credentials(sync_log_id)}
+
+    try:
+        layer = Layer.objects.get(id=layer_id)
+        user = User.objects.get(id=user_id)
+        sync_log = start_load_log(self, layer, sync_log_id, source='database', table=f'{schema}.{table}')
+
+        loader = DatabaseLoader(
+            connection_params,
+            table=table,
+            schema=schema,
+            geometry_column=geometry_column,
+            srid=srid,
+            columns=columns,
+            bbox=bbox,
+            fetch_size=getattr(settings, 'GEODATA_DB_FETCH_SIZE', 5000)
+        )
+        expected = loader.estimated_rows()
+
+        ingestor = stream_chunks_into_layer(
+            self, layer, user, loader.iter_chunks(), sync_log, backend=backend, total=lambda: expected
+        )
+        return finish_load(self, layer, sync_log, ingestor, geometry_type=layer_geometry_type(loader.geom_types))
+
+    except Exception as e:
+        fail_load(self, layer_id, sync_log, e)
+        raise
+
+
+# ============================================================================
+# IMPORTACIÓN DE ZIP CON VARIOS DATASETS
+# ============================================================================
+
+def zip_extract_dir(sync_log_id):
+    """
+    Directorio de extracción de un ZIP multi-dataset.
+
+    Vive bajo GEODATA_UPLOAD_DIR (no en un temporal del worker) porque los
+    datasets se leen desde tareas que pueden correr en otros workers.
+    """
     from pathlib import Path
-    
-    filename_lower = filename.lower()
-    
-    if filename_lower.endswith('.zip'):
-        with zipfile.ZipFile(file_path) as zf:
-            zf.extractall(temp_dir)
-        
-        for pattern in ['*.shp', '*.geojson', '*.json', '*.gpkg']:
-            files = list(Path(temp_dir).rglob(pattern))
-            if files:
-                return gpd.read_file(str(files[0]))
-        
-        kml_files = list(Path(temp_dir).rglob('*.kml'))
-        if kml_files:
-            return gpd.read_file(str(kml_files[0]), driver='KML')
-        
-        raise ValueError('No se encontró archivo geoespacial en el ZIP')
-    
-    elif filename_lower.endswith(('.geojson', '.json')):
-        return gpd.read_file(file_path)
-    elif filename_lower.endswith('.kml'):
-        return gpd.read_file(file_path, driver='KML')
-    elif filename_lower.endswith('.gpkg'):
-        return gpd.read_file(file_path)
-    elif filename_lower.endswith('.shp'):
-        return gpd.read_file(file_path)
+
+    return Path(settings.GEODATA_UPLOAD_DIR) / 'zip' / f'job_{sync_log_id}'
+
+
+@shared_task(bind=True)
+def process_zip_upload(self, file_path, original_filename, user_id, sync_log_id=None,
+                       dataset_id=None, options=None, backend=None):
+    """
+    Importa cada dataset de un ZIP como una capa propia, en paralelo.
+
+    Extrae el ZIP, lista todos sus datasets (cada .shp/.geojson/.kml y cada
+    capa de cada .gpkg), crea una capa y un SyncLog por dataset y lanza un
+    chord: un ingest_zip_member por dataset y finish_zip_upload al final.
+    El SyncLog del archivo (job id) guarda los SyncLog de cada dataset en
+    details['members'] para agregar el progreso.
+
+    Args:
+        file_path: Ruta del ZIP subido (se elimina al extraerlo)
+        original_filename: Nombre original del ZIP
+        user_id: Usuario que subió el archivo
+        sync_log_id: SyncLog del archivo creado por la vista (job id)
+        dataset_id: Dataset al que se agregan las capas (opcional)
+        options: description, is_public, tags para las capas creadas
+        backend: Backend de inserción ('copy' u 'orm'); None usa GEODATA_INGEST_BACKEND
+    """
+    from celery import chord, group
+    from apps.users.models import User
+    from .bulk import bulk_operation
+    from .ingest.readers import discover_datasets, extract_zip
+    from .models import Dataset
+    import os
+    import shutil
+
+    options = options or {}
+    sync_log = None
+    layers = []
+    extract_dir = None
+
+    try:
+        user = User.objects.get(id=user_id)
+        sync_log = start_load_log(self, None, sync_log_id, source='zip', filename=original_filename)
+        dataset = Dataset.objects.get(id=dataset_id) if dataset_id else None
+
+        extract_dir = zip_extract_dir(sync_log.id)
+        extract_dir.mkdir(parents=True, exist_ok=True)
+        extract_zip(file_path, str(extract_dir))
+        os.remove(file_path)
+
+        datasets = discover_datasets(str(extract_dir))
+        if not datasets:
+            raise ValueError('No se encontró archivo geoespacial en el ZIP')
+
+        members = []
+        header = []
+        for entry in datasets:
+            layer = Layer.objects.create(
+                name=entry.name[:255],
+                description=options.get('description', ''),
+                geometry_type='GEOMETRY',
+                layer_type='vector',
+                srid=4326,
+                created_by=user,
+                feature_count=0,
+                original_filename=original_filename,
+                is_public=options.get('is_public', False),
+                tags=options.get('tags', []),
+                metadata={'source': 'zip', 'archive': original_filename, 'member': entry.name}
+            )
+            layers.append(layer)
+            member_log = SyncLog.objects.create(
+                layer=layer,
+                status=SyncLog.Status.PROCESSING,
+                details={'progress': 0, 'parent_job_id': sync_log.id, 'member': entry.name}
+            )
+            members.append({'job_id': member_log.id, 'layer_id': layer.id, 'name': entry.name})
+            header.append(ingest_zip_member.s(
+                layer.id,
+                entry.path,
+                user_id,
+                gpkg_layer=entry.layer,
+                driver=entry.driver,
+                backend=backend,
+                sync_log_id=member_log.id
+            ))
+
+        if dataset is not None:
+            dataset.layers.add(*layers)
+
+        sync_log.details['members'] = members
+        sync_log.details['datasets'] = len(members)
+        sync_log.save(update_fields=['details'])
+
+        logger.info(f"[Task {self.request.id}] {original_filename}: {len(members)} datasets")
+
+        chord(group(header))(finish_zip_upload.s(sync_log.id, str(extract_dir)))
+        return {'job_id': sync_log.id, 'datasets': len(members)}
+
+    except Exception as e:
+        logger.error(f"[Task {self.request.id}] ZIP error: {e}", exc_info=True)
+        if sync_log:
+            sync_log.status = SyncLog.Status.FAILED
+            sync_log.completed_at = timezone.now()
+            sync_log.error_message = str(e)
+            sync_log.save()
+        if layers:
+            with bulk_operation():
+                Layer.objects.filter(id__in=[layer.id for layer in layers]).delete()
+        if extract_dir:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+
+@shared_task(bind=True)
+def ingest_zip_member(self, layer_id, dataset_path, user_id, gpkg_layer=None, driver=None,
+                      backend=None, sync_log_id=None):
+    """
+    Inserta un dataset extraído de un ZIP en su capa.
+
+    Los errores se registran en el SyncLog del dataset y se retornan en
+    lugar de propagarse, para que un dataset inválido no cancele el chord
+    ni el resto del archivo.
+
+    Args:
+        layer_id: Capa destino
+        dataset_path: Ruta del dataset extraído
+        user_id: Usuario que subió el archivo
+        gpkg_layer: Capa dentro del GeoPackage (None para archivos de una capa)
+        driver: Driver OGR explícito (p. ej. 'KML')
+        backend: Backend de inserción ('copy' u 'orm'); None usa GEODATA_INGEST_BACKEND
+        sync_log_id: SyncLog del dataset
+    """
+    from apps.users.models import User
+    from .ingest.readers import ChunkedGeoReader, DEFAULT_CHUNK_SIZE
+    from .ingest.stages import GeometryStage
+
+    sync_log = None
+    stage = GeometryStage.from_settings()
+
+    try:
+        layer = Layer.objects.get(id=layer_id)
+        user = User.objects.get(id=user_id)
+        sync_log = start_load_log(self, layer, sync_log_id)
+
+        reader = ChunkedGeoReader(
+            dataset_path,
+            chunk_size=getattr(settings, 'GEODATA_READ_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+            layer=gpkg_layer,
+            driver=driver,
+            stage=stage
+        )
+
+        ingestor = stream_chunks_into_layer(self, layer, user, reader, sync_log, backend=backend, total=lambda: reader.total)
+        sync_log.details['geometry_report'] = stage.report()
+        return finish_load(self, layer, sync_log, ingestor, geometry_type=reader.geometry_type)
+
+    except Exception as e:
+        fail_load(self, layer_id, sync_log, e)
+        return {
+            'success': False,
+            'job_id': sync_log.id if sync_log else sync_log_id,
+            'layer_id': layer_id,
+            'error': str(e)
+        }
+
+    finally:
+        stage.close()
+
+
+@shared_task
+def finish_zip_upload(results, sync_log_id, extract_dir):
+    """
+    Cierra la importación de un ZIP multi-dataset (callback del chord).
+
+    Args:
+        results: Resultados de ingest_zip_member
+        sync_log_id: SyncLog del archivo
+        extract_dir: Directorio de extracción a eliminar
+    """
+    import shutil
+
+    shutil.rmtree(extract_dir, ignore_errors=True)
+
+    succeeded = [result for result in results if result.get('success')]
+    failed = [result for result in results if not result.get('success')]
+
+    sync_log = SyncLog.objects.get(id=sync_log_id)
+    if not failed:
+        sync_log.status = SyncLog.Status.SUCCESS
+    elif succeeded:
+        sync_log.status = SyncLog.Status.PARTIAL
     else:
-        raise ValueError(f'Formato no soportado: {filename}')
\ No newline at end of file
+        sync_log.status = SyncLog.Status.FAILED
+        sync_log.error_message = 'Ningún dataset del ZIP pudo importarse'
+
+    sync_log.completed_at = timezone.now()
+    sync_log.records_processed = sum(
+        result['features_created'] + result['features_failed'] for result in succeeded
+    )
+    sync_log.records_added = sum(result['features_created'] for result in succeeded)
+    sync_log.records_failed = sum(result['features_failed'] for result in succeeded)
+    sync_log.details['progress'] = 100
+    sync_log.details['layers'] = [result['layer_id'] for result in succeeded]
+    sync_log.details['errors'] = [
+        {'job_id': result['job_id'], 'error': result['error']} for result in failed
+    ]
+    sync_log.details['message'] = f'{len(succeeded)} de {len(results)} datasets importados'
+    sync_log.save()
+
+    logger.info(f"ZIP job {sync_log_id}: {len(succeeded)}/{len(results)} datasets, {sync_log.records_added} features")
+
+    return {
+        'success': bool(succeeded),
+        'job_id': sync_log_id,
+        'layers': sync_log.details['layers'],
+        'failed': len(failed),
+    }
+
+
+# ============================================================================
+# EXPORTACIONES EN SEGUNDO PLANO
+# ============================================================================
+
+def register_export_file(sync_log, file_path, content_type, export_format, options, export_key, user_id):
+    """
+    Registra el archivo de un job de exportación en GeneratedFile.
+
+    Los exportadores pueden haberlo registrado ya: se conserva su metadata.
+    Con export_key vacío el archivo no se reutiliza en peticiones futuras.
+    """
+    from apps.core.file_locking import FileRegistry
+    from apps.core.models import GeneratedFile
+
+    metadata = GeneratedFile.objects.filter(
+        file_path=file_path,
+        deleted_at__isnull=True
+    ).values_list('metadata', flat=True).first() or {}
+    return FileRegistry.register_file(
+        file_path=file_path,
+        category='export',
+        user_id=user_id,
+        metadata={
+            **metadata,
+            'export_format': export_format,
+            'content_type': content_type,
+            'options': options,
+            'object': sync_log.details.get('object'),
+            'job_id': sync_log.id,
+        },
+        cache_key=export_key
+    )
+
+
+@shared_task(bind=True)
+def run_export_job(self, sync_log_id, model_name, object_id, export_format, options, export_key,
+                   filename=None, user_id=None):
+    """
+    Genera una exportación y la registra en GeneratedFile con su clave.
+
+    Los datasets en PARALLEL_DATASET_FORMATS se delegan a start_dataset_export
+    (un job por capa); el SyncLog lo cierra entonces finish_dataset_export.
+
+    Args:
+        sync_log_id: SyncLog del job
+        model_name: 'layer' o 'dataset'
+        object_id: ID del objeto exportado
+        export_format: Formato de salida
+        options: Opciones que afectan al archivo (ver export_jobs.export_options)
+        export_key: Clave de reutilización de la exportación
+        filename: Nombre del archivo (opcional)
+        user_id: Usuario que la solicitó
+    """
+    from .export_jobs import PARALLEL_DATASET_FORMATS, file_info, run_export
+    from .models import Dataset
+
+    sync_log = SyncLog.objects.get(id=sync_log_id)
+    model = Layer if model_name == 'layer' else Dataset
+
+    try:
+        obj = model.objects.get(id=object_id)
+        if isinstance(obj, Dataset) and export_format in PARALLEL_DATASET_FORMATS:
+            return start_dataset_export(sync_log, obj, export_format, options, export_key, filename, user_id)
+
+        file_path, content_type = run_export(obj, export_format, options, filename, user_id)
+        file_record = register_export_file(
+            sync_log, file_path, content_type, export_format, options, export_key, user_id
+        )
+
+        sync_log.status = SyncLog.Status.SUCCESS
+        sync_log.details['file'] = file_info(file_record)
+        sync_log.details['progress'] = 100
+        logger.info(f"Export job {sync_log_id} completed: {file_path}")
+
+    except Exception as e:
+        logger.error(f"Export job {sync_log_id} failed: {str(e)}", exc_info=True)
+        sync_log.status = SyncLog.Status.FAILED
+        sync_log.error_message = str(e)
+
+    sync_log.completed_at = timezone.now()
+    sync_log.save()
+
+    return {
+        'success': sync_log.status == SyncLog.Status.SUCCESS,
+        'job_id': sync_log_id,
+        'file': sync_log.details.get('file'),
+    }
+
+
+def start_dataset_export(sync_log, dataset, export_format, options, export_key, filename, user_id):
+    """
+    Lanza la exportación de un dataset con un job por capa.
+
+    Crea un SyncLog por capa (details['members'] del job, igual que en
+    process_zip_upload) y un chord: export_dataset_layer escribe cada capa
+    en el directorio de staging del job y finish_dataset_export arma un
+    único ZIP con todas, sin ZIPs anidados.
+    """
+    from celery import chord, group
+    from .export_jobs import dataset_staging_dir
+
+    layers = list(dataset.layers.filter(is_active=True).order_by('id'))
+    if not layers:
+        raise ValueError(f"No hay capas en {dataset.name}")
+
+    staging_dir = dataset_staging_dir(sync_log.id)
+    members = []
+    for layer in layers:
+        member_log = SyncLog.objects.create(
+            layer=layer,
+            status=SyncLog.Status.PROCESSING,
+            details={
+                'job_type': 'export_member',
+                'parent_job_id': sync_log.id,
+                'format': export_format,
+                'total': layer.feature_count,
+                'progress': 0,
+            }
+        )
+        members.append({'job_id': member_log.id, 'layer_id': layer.id, 'name': layer.name})
+
+    sync_log.details['members'] = members
+    sync_log.details['staging_dir'] = staging_dir
+    sync_log.save(update_fields=['details'])
+
+    logger.info(f"Export job {sync_log.id}: {len(members)} layers of {dataset.name}")
+
+    header = [
+        export_dataset_layer.s(member['job_id'], member['layer_id'], export_format, staging_dir)
+        for member in members
+    ]
+    chord(group(header))(finish_dataset_export.s(
+        sync_log.id, dataset.id, export_format, options, export_key, filename, user_id, staging_dir
+    ))
+    return {'success': True, 'job_id': sync_log.id, 'layers': len(members)}
+
+
+@shared_task
+def export_dataset_layer(sync_log_id, layer_id, export_format, staging_dir):
+    """
+    Escribe una capa de un dataset en el staging de su job (miembro del chord).
+
+    Los errores se registran en el SyncLog de la capa y se retornan en lugar
+    de propagarse, para que una capa no cancele el resto del dataset.
+
+    Args:
+        sync_log_id: SyncLog de la capa
+        layer_id: Capa exportada
+        export_format: Formato de salida
+        staging_dir: Directorio de staging del job
+    """
+    from .export_jobs import export_dataset_member
+
+    sync_log = SyncLog.objects.get(id=sync_log_id)
+
+    try:
+        layer = Layer.objects.get(id=layer_id)
+        result = export_dataset_member(layer, export_format, staging_dir)
+
+        sync_log.status = SyncLog.Status.SUCCESS
+        sync_log.records_processed = result['features_count'] + result['skipped']
+        sync_log.records_added = result['features_count']
+        sync_log.records_failed = result['skipped']
+        sync_log.details['progress'] = 100
+        return {
+            'success': True,
+            'job_id': sync_log_id,
+            'layer_id': layer_id,
+            'features_count': result['features_count'],
+            'skipped': result['skipped'],
+        }
+
+    except Exception as e:
+        logger.error(f"Export of layer {layer_id} (job {sync_log_id}) failed: {e}", exc_info=True)
+        sync_log.status = SyncLog.Status.FAILED
+        sync_log.error_message = str(e)
+        return {'success': False, 'job_id': sync_log_id, 'layer_id': layer_id, 'error': str(e)}
+
+    finally:
+        sync_log.completed_at = timezone.now()
+        sync_log.save()
+
+
+@shared_task
+def finish_dataset_export(results, sync_log_id, dataset_id, export_format, options, export_key,
+                          filename, user_id, staging_dir):
+    """
+    Cierra la exportación de un dataset (callback del chord).
+
+    Comprime el staging en el ZIP final y lo registra. Si alguna capa falló
+    el job queda PARTIAL y el archivo no se reutiliza (sin cache_key).
+
+    Args:
+        results: Resultados de export_dataset_layer
+        sync_log_id: SyncLog del job
+        dataset_id: Dataset exportado
+        export_format: Formato de salida
+        options: Opciones de la exportación
+        export_key: Clave de reutilización
+        filename: Nombre del archivo (opcional)
+        user_id: Usuario que la solicitó
+        staging_dir: Directorio de staging a eliminar
+    """
+    import os
+    import shutil
+    from .export_jobs import archive_directory, dataset_archive_path, file_info
+    from .models import Dataset
+
+    succeeded = [result for result in results if result.get('success')]
+    failed = [result for result in results if not result.get('success')]
+
+    sync_log = SyncLog.objects.get(id=sync_log_id)
+    zip_path = None
+
+    try:
+        if not succeeded:
+            raise ValueError('Ninguna capa del dataset pudo exportarse')
+
+        zip_path = dataset_archive_path(Dataset.objects.get(id=dataset_id), export_format, filename)
+        archive_directory(staging_dir, zip_path)
+        file_record = register_export_file(
+            sync_log, zip_path, 'application/zip', export_format, options,
+            '' if failed else export_key, user_id
+        )
+
+        sync_log.status = SyncLog.Status.PARTIAL if failed else SyncLog.Status.SUCCESS
+        sync_log.details['file'] = file_info(file_record)
+
+    except Exception as e:
+        logger.error(f"Export job {sync_log_id} failed: {str(e)}", exc_info=True)
+        sync_log.status = SyncLog.Status.FAILED
+        sync_log.error_message = str(e)
+        if zip_path and os.path.exists(zip_path):
+            os.remove(zip_path)
+
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    sync_log.completed_at = timezone.now()
+    sync_log.records_processed = sum(result['features_count'] + result['skipped'] for result in succeeded)
+    sync_log.records_added = sum(result['features_count'] for result in succeeded)
+    sync_log.records_failed = sum(result['skipped'] for result in succeeded)
+    sync_log.details['progress'] = 100
+    sync_log.details['errors'] = [
+        {'job_id': result['job_id'], 'layer_id': result['layer_id'], 'error': result['error']}
+        for result in failed
+    ]
+    sync_log.details['message'] = f'{len(succeeded)} de {len(results)} capas exportadas'
+    sync_log.save()
+
+    logger.info(f"Export job {sync_log_id}: {len(succeeded)}/{len(results)} layers")
+
+    return {
+        'success': sync_log.status != SyncLog.Status.FAILED,
+        'job_id': sync_log_id,
+        'file': sync_log.details.get('file'),
+        'failed': len(failed),
+    }
@@ -1,6 +1,13 @@
 """
 Tests for geodata app.
 """
+import json
+import re
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 from django.test import TestCase
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
@@ -136,3 +143,1678 @@ class LayerAPITest(APITestCase):
             'geometry_type': 'POINT'
         })
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ColumnarIngestTest(TestCase):
+    """Tests para el motor de ingesta columnar."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.layer = Layer.objects.create(
+            name='Ingest Layer',
+            geometry_type='POINT',
+            created_by=self.user
+        )
+    
+    def _frame(self):
+        import geopandas as gpd
+        import numpy as np
+        from shapely.geometry import Point as ShapelyPoint
+        
+        return gpd.GeoDataFrame({
+            'name': ['a', None, 'c'],
+            'value': [1.5, np.nan, np.float64(2.0)],
+            'count': np.array([1, 2, 3], dtype=np.int64),
+        }, geometry=[ShapelyPoint(0, 0), ShapelyPoint(1, 1), None], crs='EPSG:4326')
+    
+    def test_properties_are_python_values(self):
+        """Test NaN -> None y escalares NumPy -> Python."""
+        from .ingest import frame_properties
+        
+        props = frame_properties(self._frame())
+        self.assertEqual(props[0], {'name': 'a', 'value': 1.5, 'count': 1})
+        self.assertIsNone(props[1]['name'])
+        self.assertIsNone(props[1]['value'])
+        self.assertIs(type(props[2]['count']), int)
+    
+    def test_ingest_skips_missing_geometries(self):
+        """Test ingesta de un GeoDataFrame con geometrías vacías."""
+        from .ingest import FeatureIngestor
+        
+        result = FeatureIngestor(self.layer, self.user, batch_size=2).ingest(self._frame())
+        self.assertEqual(result, {'processed': 3, 'created': 2, 'failed': 1})
+        self.assertEqual(Feature.objects.filter(layer=self.layer).count(), 2)
+    
+    def test_copy_backend_falls_back_outside_postgres(self):
+        """Test COPY cae a bulk_create en bases de datos que no son PostgreSQL."""
+        from django.db import connection
+        from .ingest import FeatureIngestor
+        
+        ingestor = FeatureIngestor(self.layer, self.user, backend='copy')
+        expected = 'copy' if connection.vendor == 'postgresql' else 'orm'
+        self.assertEqual(ingestor.backend, expected)
+        
+        ingestor.ingest(self._frame())
+        self.assertEqual(Feature.objects.filter(layer=self.layer).count(), 2)
+
+
+class LayerStatisticsSchedulingTest(TestCase):
+    """Tests para el agrupamiento de tareas de estadísticas por capa."""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.layer = Layer.objects.create(
+            name='Stats Layer',
+            geometry_type='POINT',
+            created_by=self.user
+        )
+    
+    def _create_features(self, count):
+        for i in range(count):
+            Feature.objects.create(layer=self.layer, geometry=Point(i, i, srid=4326))
+    
+    def test_bulk_operation_enqueues_one_task_per_layer(self):
+        """Test 50 features creados y borrados en bloque encolan una sola tarea."""
+        from unittest import mock
+        from .bulk import bulk_operation
+        
+        with mock.patch('apps.geodata.tasks.update_layer_statistics.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                with bulk_operation():
+                    self._create_features(50)
+                    self.layer.features.all().delete()
+        
+        self.assertEqual(apply_async.call_count, 1)
+        self.assertEqual(apply_async.call_args[0][0], (self.layer.id,))
+    
+    def test_individual_deletes_are_debounced(self):
+        """Test borrados fuera de un bloque masivo se agrupan por debounce."""
+        from unittest import mock
+        
+        self._create_features(10)
+        with mock.patch('apps.geodata.tasks.update_layer_statistics.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                for feature in self.layer.features.all():
+                    feature.delete()
+        
+        self.assertEqual(apply_async.call_count, 1)
+    
+    def test_debounce_marker_is_stored_on_layer(self):
+        """Test la marca de debounce vive en la capa y la tarea la libera."""
+        from unittest import mock
+        from .tasks import update_layer_statistics
+        
+        self._create_features(3)
+        with mock.patch('apps.geodata.tasks.update_layer_statistics.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.layer.features.first().delete()
+            self.layer.refresh_from_db()
+            self.assertIsNotNone(self.layer.statistics_scheduled_at)
+            
+            update_layer_statistics(self.layer.id)
+            self.layer.refresh_from_db()
+            self.assertIsNone(self.layer.statistics_scheduled_at)
+            self.assertFalse(self.layer.statistics['stale'])
+            
+            with self.captureOnCommitCallbacks(execute=True):
+                self.layer.features.first().delete()
+        
+        self.assertEqual(apply_async.call_count, 2)
+    
+    def test_creates_do_not_enqueue_recompute(self):
+        """Test las altas se aplican como delta sin encolar recomputación."""
+        from unittest import mock
+        
+        with mock.patch('apps.geodata.tasks.update_layer_statistics.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._create_features(10)
+        
+        self.assertEqual(apply_async.call_count, 0)
+    
+    def test_layer_delete_enqueues_nothing_for_deleted_layer(self):
+        """Test borrar la capa completa no encola tareas por feature."""
+        from unittest import mock
+        from .bulk import bulk_operation
+        
+        self._create_features(20)
+        with mock.patch('apps.geodata.tasks.update_layer_statistics.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                with bulk_operation():
+                    self.layer.delete()
+        
+        self.assertEqual(apply_async.call_count, 0)
+
+
+class IncrementalLayerStatisticsTest(TestCase):
+    """Tests para el mantenimiento incremental de estadísticas de capa."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.layer = Layer.objects.create(
+            name='Stats Layer',
+            geometry_type='POINT',
+            created_by=self.user
+        )
+    
+    def test_creates_update_count_extent_and_attributes(self):
+        """Test cada alta actualiza conteo, extent y rango de atributos."""
+        Feature.objects.create(layer=self.layer, geometry=Point(1, 2, srid=4326), properties={'pop': 10})
+        Feature.objects.create(layer=self.layer, geometry=Point(5, -3, srid=4326), properties={'pop': None})
+        
+        self.layer.refresh_from_db()
+        self.assertEqual(self.layer.feature_count, 2)
+        self.assertEqual(self.layer.get_bounds(), [1.0, -3.0, 5.0, 2.0])
+        pop = self.layer.statistics['attributes']['pop']
+        self.assertEqual((pop['count'], pop['null_count'], pop['min'], pop['max']), (1, 1, 10, 10))
+    
+    def test_bulk_operation_applies_single_delta(self):
+        """Test dentro de bulk_operation el delta se aplica al salir."""
+        from .bulk import bulk_operation
+        
+        with bulk_operation():
+            for i in range(5):
+                Feature.objects.create(layer=self.layer, geometry=Point(i, i, srid=4326))
+            self.layer.refresh_from_db()
+            self.assertEqual(self.layer.feature_count, 0)
+        
+        self.layer.refresh_from_db()
+        self.assertEqual(self.layer.feature_count, 5)
+    
+    def test_recompute_repairs_extent_after_delete(self):
+        """Test la recomputación encoge el extent tras un borrado."""
+        from .statistics import recompute_layer_statistics
+        
+        Feature.objects.create(layer=self.layer, geometry=Point(0, 0, srid=4326))
+        far = Feature.objects.create(layer=self.layer, geometry=Point(50, 50, srid=4326))
+        far.delete()
+        
+        self.layer.refresh_from_db()
+        self.assertEqual(self.layer.feature_count, 1)
+        self.assertTrue(self.layer.statistics['stale'])
+        
+        recompute_layer_statistics(self.layer)
+        self.layer.refresh_from_db()
+        self.assertEqual(self.layer.get_bounds(), [0.0, 0.0, 0.0, 0.0])
+        self.assertFalse(self.layer.statistics['stale'])
+    
+    def test_property_only_save_applies_attribute_delta(self):
+        """Test editar solo propiedades ajusta atributos sin marcar la capa 'stale'."""
+        feature = Feature.objects.create(layer=self.layer, geometry=Point(1, 1, srid=4326), properties={'pop': 10})
+        feature = Feature.objects.get(pk=feature.pk)
+        self.layer.refresh_from_db()
+        version = self.layer.content_version
+        
+        feature.properties = {'pop': None, 'name': 'a'}
+        feature.save()
+        
+        self.layer.refresh_from_db()
+        self.assertFalse(self.layer.statistics['stale'])
+        self.assertEqual(self.layer.content_version, version + 1)
+        self.assertEqual(self.layer.feature_count, 1)
+        attributes = self.layer.statistics['attributes']
+        self.assertEqual((attributes['pop']['count'], attributes['pop']['null_count']), (0, 1))
+        self.assertEqual(attributes['name']['count'], 1)
+        
+        feature.geometry = Point(2, 2, srid=4326)
+        feature.save()
+        self.layer.refresh_from_db()
+        self.assertTrue(self.layer.statistics['stale'])
+        self.assertEqual(self.layer.get_bounds(), [1.0, 1.0, 2.0, 2.0])
+
+
+class StreamingGeoJSONTest(APITestCase):
+    """Tests para el GeoJSON de capas en streaming."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.layer = Layer.objects.create(
+            name='Stream Layer',
+            geometry_type='POINT',
+            created_by=self.user
+        )
+        for i in range(3):
+            Feature.objects.create(layer=self.layer, geometry=Point(i, i, srid=4326), properties={'n': i})
+    
+    def test_stream_returns_valid_feature_collection(self):
+        """Test el modo streaming produce un FeatureCollection válido."""
+        import json
+        
+        response = self.client.get(f'/api/v1/geodata/layers/{self.layer.id}/geojson/?stream=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['type'], 'FeatureCollection')
+        self.assertEqual(len(data['features']), 3)
+        self.assertEqual(data['features'][0]['properties'], {'n': 0})
+        self.assertEqual(data['features'][2]['geometry']['coordinates'], [2, 2])
+
+
+class SimplifiedGeoJSONTest(APITestCase):
+    """Tests para la simplificación y reducción de precisión del GeoJSON."""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.layer = Layer.objects.create(
+            name='Boundary Layer',
+            geometry_type='POLYGON',
+            created_by=self.user
+        )
+        Feature.objects.create(
+            layer=self.layer,
+            geometry=Polygon.from_bbox((-74.123456789, 4.123456789, -73.987654321, 4.987654321)),
+            properties={'name': 'a'}
+        )
+        self.url = f'/api/v1/geodata/layers/{self.layer.id}/geojson/'
+    
+    def test_zoom_reduces_precision(self):
+        """Test el zoom deriva la precisión de las coordenadas."""
+        import json
+        
+        response = self.client.get(self.url, {'zoom': 8})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        data = json.loads(response.content)
+        x = data['features'][0]['geometry']['coordinates'][0][0][0]
+        self.assertEqual(x, round(x, 3))
+    
+    def test_invalid_params_return_400(self):
+        """Test parámetros fuera de rango retornan 400."""
+        self.assertEqual(self.client.get(self.url, {'zoom': 40}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'tolerance': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_cache_invalidated_when_layer_changes(self):
+        """Test un feature nuevo invalida el GeoJSON simplificado en caché."""
+        import json
+        
+        self.assertEqual(len(json.loads(self.client.get(self.url, {'zoom': 5}).content)['features']), 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Feature.objects.create(layer=self.layer, geometry=Polygon.from_bbox((0, 0, 1, 1)))
+        
+        self.assertEqual(len(json.loads(self.client.get(self.url, {'zoom': 5}).content)['features']), 2)
+
+
+    def test_explicit_tolerance_has_its_own_cache_entry(self):
+        """Test zoom con tolerance explícita no comparte caché con el zoom solo."""
+        import json
+        
+        Feature.objects.create(layer=self.layer, geometry=Point(-70, 5, srid=4326).buffer(1, quadsegs=32))
+        
+        def vertices(params):
+            data = json.loads(self.client.get(self.url, params).content)
+            return sum(len(f['geometry']['coordinates'][0]) for f in data['features'])
+        
+        by_zoom = vertices({'zoom': 5})
+        coarse = vertices({'zoom': 5, 'tolerance': 0.5})
+        self.assertLess(coarse, by_zoom)
+        self.assertEqual(vertices({'zoom': 5}), by_zoom)
+    
+    def test_precision_only(self):
+        """Test solo precision redondea coordenadas sin simplificar."""
+        import json
+        
+        full = json.loads(self.client.get(self.url).content)
+        response = self.client.get(self.url, {'precision': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        data = json.loads(response.content)
+        ring = data['features'][0]['geometry']['coordinates'][0]
+        self.assertEqual(len(ring), len(full['features'][0]['geometry']['coordinates'][0]))
+        self.assertTrue(all(x == round(x, 3) for x, _y in ring))
+    
+    def test_filtered_request_does_not_poison_cache(self):
+        """Test un GeoJSON filtrado no se guarda bajo la clave de la capa completa."""
+        import json
+        
+        Feature.objects.create(layer=self.layer, feature_id='solo', geometry=Point(-70, 5, srid=4326).buffer(1))
+        
+        filtered = json.loads(self.client.get(self.url, {'zoom': 5, 'feature_id': 'solo'}).content)
+        self.assertEqual(len(filtered['features']), 1)
+        full = json.loads(self.client.get(self.url, {'zoom': 5}).content)
+        self.assertEqual(len(full['features']), 2)
+
+
+class VectorTileTest(APITestCase):
+    """Tests para el endpoint de teselas vectoriales."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@test.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.layer = Layer.objects.create(
+            name='Tile Layer',
+            geometry_type='POINT',
+            created_by=self.user
+        )
+        Feature.objects.create(layer=self.layer, geometry=Point(-74.08, 4.6, srid=4326), properties={'name': 'Bogotá'})
+    
+    def test_private_layer_of_other_user_is_not_found(self):
+        """Test las teselas respetan la visibilidad de get_queryset."""
+        private = Layer.objects.create(name='Private', created_by=self.other)
+        response = self.client.get(f'/api/v1/geodata/layers/{private.id}/tiles/0/0/0.mvt')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_tile_contains_feature(self):
+        """Test la tesela que contiene el feature no está vacía."""
+        from django.db import connection
+        
+        if connection.vendor != 'postgresql':
+            self.skipTest('ST_AsMVT requiere PostGIS')
+        
+        response = self.client.get(f'/api/v1/geodata/layers/{self.layer.id}/tiles/0/0/0.mvt?properties=name')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertGreater(len(response.content), 0)
+        
+        response = self.client.get(f'/api/v1/geodata/layers/{self.layer.id}/tiles/3/0/0.mvt')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+    
+    def test_out_of_range_tile_returns_400(self):
+        """Test coordenadas fuera del esquema XYZ retornan 400."""
+        from django.db import connection
+        
+        if connection.vendor != 'postgresql':
+            self.skipTest('ST_AsMVT requiere PostGIS')
+        
+        response = self.client.get(f'/api/v1/geodata/layers/{self.layer.id}/tiles/1/5/0.mvt')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TileCacheTest(TestCase):
+    """Tests para la caché de teselas y su invalidación por versión."""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.layer = Layer.objects.create(
+            name='Cached Layer',
+            geometry_type='POINT',
+            created_by=self.user
+        )
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_disk_cache_evicts_least_recently_used(self):
+        """Test la caché en disco expulsa las teselas menos usadas."""
+        import os
+        import time
+        from .tile_cache import DiskTileCache
+        
+        cache = DiskTileCache(self.tmp_dir, max_bytes=250, evict_every=1000)
+        for y in range(3):
+            cache.set(1, 1, 'none', 5, 0, y, b'x' * 100)
+            path = cache._path(1, 1, 'none', 5, 0, y)
+            os.utime(path, (time.time() - 100 + y, time.time() - 100 + y))
+        cache.get(1, 1, 'none', 5, 0, 0)
+        
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNotNone(cache.get(1, 1, 'none', 5, 0, 0))
+        self.assertIsNone(cache.get(1, 1, 'none', 5, 0, 1))
+    
+    def test_feature_change_bumps_version_and_misses_cache(self):
+        """Test un feature nuevo cambia la versión y la tesela se regenera."""
+        from unittest import mock
+        from .tile_cache import DiskTileCache, cached_tile
+        
+        render = mock.Mock(return_value=b'tile')
+        with mock.patch('apps.geodata.tile_cache.get_tile_cache', return_value=DiskTileCache(self.tmp_dir)):
+            cached_tile(self.layer, 0, 0, 0, render=render)
+            cached_tile(self.layer, 0, 0, 0, render=render)
+            self.assertEqual(render.call_count, 1)
+            
+            version = self.layer.content_version
+            Feature.objects.create(layer=self.layer, geometry=Point(1, 1, srid=4326))
+            self.layer.refresh_from_db()
+            self.assertEqual(self.layer.content_version, version + 1)
+            
+            cached_tile(self.layer, 0, 0, 0, render=render)
+            self.assertEqual(render.call_count, 2)
+    
+    def test_etag_matches(self):
+        """Test If-None-Match con el ETag actual de la tesela."""
+        from .tile_cache import etag_matches, tile_etag
+        
+        etag = tile_etag(self.layer, 3, 1, 2, ['name'])
+        self.assertTrue(etag_matches(f'"other", {etag}', etag))
+        self.assertFalse(etag_matches(None, etag))
+        
+        self.layer.bump_content_version()
+        self.assertNotEqual(tile_etag(self.layer, 3, 1, 2, ['name']), etag)
+    
+    def test_rename_changes_etag_and_cache_key(self):
+        """Test renombrar la capa cambia el ETag y la entrada de caché (nombre MVT)."""
+        from unittest import mock
+        from .tile_cache import DiskTileCache, cached_tile, tile_etag
+        
+        render = mock.Mock(return_value=b'tile')
+        with mock.patch('apps.geodata.tile_cache.get_tile_cache', return_value=DiskTileCache(self.tmp_dir)):
+            cached_tile(self.layer, 0, 0, 0, render=render)
+            etag = tile_etag(self.layer, 0, 0, 0)
+            
+            self.layer.name = 'Renamed Layer'
+            self.assertNotEqual(tile_etag(self.layer, 0, 0, 0), etag)
+            cached_tile(self.layer, 0, 0, 0, render=render)
+            self.assertEqual(render.call_count, 2)
+
+
+class FeatureSpatialFilterTest(APITestCase):
+    """Tests para los filtros espaciales de features."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.layer = Layer.objects.create(
+            name='Spatial Layer',
+            geometry_type='POINT',
+            created_by=self.user
+        )
+        self.near = Feature.objects.create(layer=self.layer, geometry=Point(-74.08, 4.60, srid=4326))
+        self.mid = Feature.objects.create(layer=self.layer, geometry=Point(-74.00, 4.60, srid=4326))
+        self.far = Feature.objects.create(layer=self.layer, geometry=Point(-70.00, 10.00, srid=4326))
+    
+    def _ids(self, response):
+        data = response.data.get('results', response.data)
+        return {item['id'] for item in data}
+    
+    def test_bbox_filter(self):
+        """Test bbox retorna solo los features dentro del rectángulo."""
+        response = self.client.get('/api/v1/geodata/features/', {'bbox': '-75,4,-73,5'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._ids(response), {self.near.id, self.mid.id})
+    
+    def test_intersects_accepts_geojson_and_wkt(self):
+        """Test intersects acepta GeoJSON y WKT."""
+        wkt = 'POLYGON((-71 9, -69 9, -69 11, -71 11, -71 9))'
+        geojson = Polygon.from_bbox((-71, 9, -69, 11)).geojson
+        for value in (wkt, geojson):
+            response = self.client.get('/api/v1/geodata/features/', {'intersects': value})
+            self.assertEqual(self._ids(response), {self.far.id})
+    
+    def test_invalid_bbox_returns_400(self):
+        """Test bbox mal formado retorna 400."""
+        response = self.client.get('/api/v1/geodata/features/', {'bbox': '1,2,3'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_geojson_action_applies_spatial_filters(self):
+        """Test el GeoJSON de la capa admite los mismos filtros."""
+        response = self.client.get(f'/api/v1/geodata/layers/{self.layer.id}/geojson/', {'bbox': '-71,9,-69,11'})
+        self.assertEqual([f['id'] for f in response.json()['features']], [self.far.id])
+    
+    def test_nearest_keeps_distance_order(self):
+        """Test nearest devuelve los k más cercanos ordenados por distancia, sin paginar."""
+        response = self.client.get('/api/v1/geodata/features/', {'nearest': '-74.08,4.60,3'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data], [self.near.id, self.mid.id, self.far.id])
+        
+        response = self.client.get(
+            f'/api/v1/geodata/layers/{self.layer.id}/geojson/',
+            {'nearest': '-70,10,2', 'stream': 'true'}
+        )
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        self.assertEqual([f['id'] for f in json.loads(body)['features']], [self.far.id, self.mid.id])
+
+
+class FeatureSpatialQueryPlanTest(TestCase):
+    """Tests de plan de consulta: los filtros espaciales usan índices (solo PostGIS)."""
+    
+    def setUp(self):
+        from django.db import connection
+        
+        if connection.vendor != 'postgresql':
+            self.skipTest('EXPLAIN de índices GiST requiere PostGIS')
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.layer = Layer.objects.create(name='Plan Layer', created_by=self.user)
+        for i in range(50):
+            Feature.objects.create(layer=self.layer, geometry=Point(i * 0.1, i * 0.1, srid=4326))
+    
+    def _plan(self, queryset):
+        from django.db import connection
+        
+        # Con pocas filas el planificador prefiere seq scan; se desactiva
+        # para comprobar que el índice es utilizable por la consulta
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+        try:
+            return queryset.explain()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = on')
+    
+    def _filtered(self, params):
+        from .filters import FeatureFilter
+        
+        filterset = FeatureFilter(params, queryset=Feature.objects.filter(layer=self.layer, is_active=True))
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return filterset.qs
+    
+    def test_bbox_uses_gist_index(self):
+        """Test bbox usa un index scan sobre geometry."""
+        plan = self._plan(self._filtered({'bbox': '0,0,1,1'}))
+        self.assertIn('Index', plan)
+        self.assertIn('geometry', plan)
+    
+    def test_dwithin_uses_gist_index(self):
+        """Test dwithin filtra candidatos con el índice GiST."""
+        plan = self._plan(self._filtered({'dwithin': '0.5,0.5,5000'}))
+        self.assertIn('Index', plan)
+    
+    def test_nearest_uses_knn_index(self):
+        """Test nearest ordena por <-> usando el índice (KNN)."""
+        plan = self._plan(self._filtered({'nearest': '0,0,5'}))
+        self.assertIn('Index Scan', plan)
+        self.assertIn('<->', plan)
+    
+    def test_layer_active_uses_partial_index(self):
+        """Test el filtro por capa activa usa el índice parcial."""
+        plan = self._plan(Feature.objects.filter(layer=self.layer, is_active=True))
+        self.assertIn('geodata_feature_layer_active', plan)
+
+
+class KeysetPaginationTest(APITestCase):
+    """Tests para la paginación por keyset de los logs de sincronización."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.logs = [SyncLog.objects.create() for _ in range(25)]
+        # Mismo started_at en varias filas: el desempate por id no debe perder filas
+        SyncLog.objects.filter(id__in=[log.id for log in self.logs[5:15]]).update(
+            started_at=self.logs[5].started_at
+        )
+    
+    def test_walks_all_pages_without_gaps(self):
+        """Test recorrer next devuelve todas las filas una sola vez, en orden."""
+        url = '/api/v1/geodata/synclogs/?page_size=10'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        
+        expected = list(
+            SyncLog.objects.order_by('-started_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+    
+    def test_previous_link_returns_prior_page(self):
+        """Test previous devuelve la página anterior completa."""
+        first = self.client.get('/api/v1/geodata/synclogs/?page_size=10')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']]
+        )
+    
+    def test_count_modes(self):
+        """Test count=exact incluye el total y un cursor inválido retorna 404."""
+        response = self.client.get('/api/v1/geodata/synclogs/?count=exact')
+        self.assertEqual(response.data['count'], 25)
+        self.assertFalse(response.data['count_is_approximate'])
+        
+        response = self.client.get('/api/v1/geodata/synclogs/?cursor=invalid')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class StubWFSHandler(BaseHTTPRequestHandler):
+    """Servidor WFS mínimo: GetFeature GeoJSON paginado con startIndex/count."""
+    
+    features = []
+    requests = []
+    # Límite de página del servidor (recorta count)
+    max_count = 1000
+    
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        if params.get('request') != 'GetFeature':
+            # Sin GetCapabilities: el loader usa el page_size configurado
+            self.send_response(404)
+            self.end_headers()
+            return
+        type(self).requests.append(params)
+        start = int(params.get('startIndex', 0))
+        count = min(int(params.get('count', 10)), self.max_count)
+        body = json.dumps({
+            'type': 'FeatureCollection',
+            'numberMatched': len(self.features),
+            'features': self.features[start:start + count],
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class WFSSyncTest(TestCase):
+    """Tests para la sincronización incremental de fuentes WFS."""
+    
+    def setUp(self):
+        StubWFSHandler.features = [
+            {
+                'type': 'Feature',
+                'id': f'rios.{i}',
+                'geometry': {'type': 'Point', 'coordinates': [-75.0 + i * 0.01, 5.0]},
+                'properties': {'nombre': f'punto {i}', 'valor': i},
+            }
+            for i in range(25)
+        ]
+        StubWFSHandler.requests = []
+        StubWFSHandler.max_count = 1000
+        self.server = HTTPServer(('127.0.0.1', 0), StubWFSHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        
+        self.data_source = DataSource.objects.create(
+            name='WFS de prueba',
+            source_type=DataSource.SourceType.WFS,
+            url=f'http://127.0.0.1:{self.server.server_port}/wfs',
+            configuration={'layer_name': 'rios', 'page_size': 10, 'sort_by': 'valor'},
+        )
+    
+    def test_resync_only_writes_changed_features(self):
+        """Test la segunda sincronización solo actualiza el feature modificado."""
+        from .tasks import sync_data_source
+        
+        first = sync_data_source(self.data_source.id)
+        self.assertEqual(first['status'], 'success', first.get('error'))
+        self.assertEqual(first['added'], 25)
+        self.assertEqual(first['details']['pages'], 3)
+        self.assertEqual(
+            [r['startIndex'] for r in StubWFSHandler.requests],
+            ['0', '10', '20']
+        )
+        
+        layer = self.data_source.layers.get()
+        self.assertEqual(layer.features.count(), 25)
+        
+        StubWFSHandler.features[7]['properties']['valor'] = 700
+        second = sync_data_source(self.data_source.id)
+        
+        self.assertEqual(second['added'], 0)
+        self.assertEqual(second['updated'], 1)
+        self.assertEqual(second['details']['unchanged'], 24)
+        self.assertEqual(layer.features.get(feature_id='rios.7').properties['valor'], 700)
+        
+        log = SyncLog.objects.filter(data_source=self.data_source).order_by('-id').first()
+        self.assertEqual(log.records_updated, 1)
+    
+    def test_stored_hash_and_soft_delete_of_missing_features(self):
+        """Test se guarda el hash y los features ausentes en la fuente se desactivan."""
+        from .tasks import sync_data_source
+        
+        sync_data_source(self.data_source.id)
+        layer = self.data_source.layers.get()
+        self.assertFalse(layer.features.filter(content_hash='').exists())
+        
+        removed = StubWFSHandler.features.pop(3)
+        result = sync_data_source(self.data_source.id)
+        
+        self.assertEqual(result['details']['deleted'], 1)
+        self.assertEqual(result['updated'], 0)
+        self.assertFalse(layer.features.get(feature_id=removed['id']).is_active)
+        layer.refresh_from_db()
+        self.assertEqual(layer.feature_count, 24)
+        
+        # Si vuelve a aparecer se reactiva
+        StubWFSHandler.features.append(removed)
+        result = sync_data_source(self.data_source.id)
+        self.assertEqual(result['updated'], 1)
+        self.assertTrue(layer.features.get(feature_id=removed['id']).is_active)
+    
+    def test_server_page_limit_and_unstable_order(self):
+        """Test páginas recortadas por el servidor no truncan la lectura; sin sort_by no se desactiva."""
+        from .tasks import sync_data_source
+        
+        StubWFSHandler.max_count = 7
+        result = sync_data_source(self.data_source.id)
+        self.assertEqual(result['added'], 25)
+        self.assertEqual(result['details']['pages'], 4)
+        
+        self.data_source.configuration.pop('sort_by')
+        self.data_source.save()
+        StubWFSHandler.features.pop(3)
+        result = sync_data_source(self.data_source.id)
+        self.assertEqual(result['details']['deleted'], 0)
+        self.assertIn('sort_by', result['details']['warning'])
+        self.assertEqual(self.data_source.layers.get().features.filter(is_active=True).count(), 25)
+    
+    def test_manual_edit_clears_hash(self):
+        """Test editar un feature a mano invalida su hash y la sync lo restaura."""
+        from .tasks import sync_data_source
+        
+        sync_data_source(self.data_source.id)
+        feature = self.data_source.layers.get().features.get(feature_id='rios.0')
+        feature.properties = {'nombre': 'editado'}
+        feature.save()
+        self.assertEqual(feature.content_hash, '')
+        
+        result = sync_data_source(self.data_source.id)
+        self.assertEqual(result['updated'], 1)
+        feature.refresh_from_db()
+        self.assertEqual(feature.properties['nombre'], 'punto 0')
+
+
+class StubArcGISHandler(BaseHTTPRequestHandler):
+    """Servicio ArcGIS mínimo: metadata, returnIdsOnly y consultas por rango de OBJECTID."""
+    
+    total = 2500
+    max_record_count = 1000
+    queries = []
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        params = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        
+        if self.path.endswith('/query'):
+            type(self).queries.append(params)
+            ids = range(1, self.total + 1)
+            if params.get('returnIdsOnly') == 'true':
+                payload = {'objectIdFieldName': 'OBJECTID', 'objectIds': list(ids)}
+            else:
+                first, last = map(int, re.findall(r'OBJECTID [<>]= (\d+)', params['where']))
+                payload = {'type': 'FeatureCollection', 'features': [
+                    {
+                        'type': 'Feature',
+                        'id': i,
+                        'geometry': {'type': 'Point', 'coordinates': [-75 + i * 1e-4, 5.0]},
+                        'properties': {'OBJECTID': i},
+                    }
+                    for i in ids if first <= i <= last
+                ][:self.max_record_count]}
+        else:
+            payload = {
+                'maxRecordCount': self.max_record_count,
+                'geometryType': 'esriGeometryPoint',
+                'advancedQueryCapabilities': {'supportsPagination': True},
+            }
+        
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class ArcGISLoaderTest(APITestCase):
+    """Tests para la carga paginada y concurrente de servicios ArcGIS."""
+    
+    def setUp(self):
+        StubArcGISHandler.queries = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubArcGISHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.service_url = f'http://127.0.0.1:{self.server.server_port}/arcgis/rest/services/rios/FeatureServer'
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def test_pages_cover_all_object_ids_beyond_max_record_count(self):
+        """Test se descargan todos los features en rangos de maxRecordCount."""
+        from .services import ArcGISLoader
+        
+        loader = ArcGISLoader(f'{self.service_url}/0', max_workers=3)
+        ids = []
+        for gdf, page_ids in loader.iter_pages():
+            self.assertLessEqual(len(gdf), 1000)
+            ids.extend(page_ids)
+        
+        self.assertEqual(loader.total, 2500)
+        self.assertEqual(loader.pages_read, 3)
+        self.assertEqual(sorted(ids), list(range(1, 2501)))
+        self.assertEqual(loader.geometry_type, 'POINT')
+    
+    def test_from_arcgis_returns_202_and_enqueues_task(self):
+        """Test from-arcgis crea la capa y encola la carga en segundo plano."""
+        from unittest import mock
+        from .tasks import pop_job_credentials
+        
+        with mock.patch('apps.geodata.tasks.load_arcgis_layer.delay') as delay:
+            delay.return_value.id = 'task-1'
+            response = self.client.post('/api/v1/geodata/layers/from-arcgis/', {
+                'name': 'Ríos',
+                'service_url': self.service_url,
+                'layer_id': 0,
+                'username': 'lector',
+                'password': 'secreto',
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['task_id'], 'task-1')
+        layer = Layer.objects.get(id=response.data['layer']['id'])
+        self.assertEqual(layer.geometry_type, 'POINT')
+        self.assertEqual(layer.metadata['max_record_count'], 1000)
+        self.assertEqual(delay.call_args[0][1], f'{self.service_url}/0')
+        
+        # Las credenciales quedan en el job, no en los argumentos de la tarea
+        self.assertNotIn('secreto', repr(delay.call_args))
+        job_id = response.data['job_id']
+        self.assertEqual(pop_job_credentials(job_id), {'username': 'lector', 'password': 'secreto'})
+        self.assertEqual(SyncLog.objects.get(id=job_id).credentials, {})
+
+
+class DatabaseLoaderTest(TestCase):
+    """Tests para el loader de bases de datos externas (sin conexión real)."""
+    
+    def setUp(self):
+        self.params = {
+            'db_type': 'postgresql',
+            'host': 'db.example.com',
+            'port': 5432,
+            'database': 'gis',
+            'username': 'lector',
+            'password': 'secreto',
+        }
+    
+    def test_engine_is_cached_by_connection_fingerprint(self):
+        """Test los mismos parámetros reutilizan el engine (y su pool)."""
+        from .services.database_loader import get_engine, dispose_engines
+        self.addCleanup(dispose_engines)
+        
+        engine = get_engine(dict(self.params))
+        self.assertIs(get_engine(dict(self.params)), engine)
+        self.assertIsNot(get_engine(dict(self.params, password='otro')), engine)
+    
+    def test_engine_cache_evicts_and_disposes_least_recently_used(self):
+        """Test la caché de engines está acotada y cierra el pool del expulsado."""
+        from unittest import mock
+        from .services.database_loader import get_engine, dispose_engines
+        self.addCleanup(dispose_engines)
+        
+        with self.settings(GEODATA_DB_ENGINE_CACHE_SIZE=2):
+            first = get_engine(dict(self.params, host='a.example.com'))
+            second = get_engine(dict(self.params, host='b.example.com'))
+            self.assertIs(get_engine(dict(self.params, host='a.example.com')), first)
+            
+            with mock.patch.object(type(second), 'dispose') as dispose:
+                get_engine(dict(self.params, host='c.example.com'))
+            dispose.assert_called_once_with()
+            self.assertIs(get_engine(dict(self.params, host='a.example.com')), first)
+    
+    def test_query_pushes_down_columns_and_bbox(self):
+        """Test la consulta solo pide las columnas indicadas y filtra por bbox en el servidor."""
+        from .services import DatabaseLoader
+        from .services.database_loader import dispose_engines
+        self.addCleanup(dispose_engines)
+        
+        loader = DatabaseLoader(
+            self.params,
+            table='rios',
+            schema='hidro',
+            srid=3116,
+            bbox=(-75.0, 4.0, -74.0, 5.0)
+        )
+        sql, params = loader.build_query(['nombre'])
+        
+        self.assertIn('SELECT nombre, ST_AsBinary(geom)', sql)
+        self.assertIn('FROM hidro.rios WHERE geom && ST_Transform(ST_MakeEnvelope', sql)
+        self.assertNotIn('*', sql)
+        self.assertEqual(params['srid'], 3116)
+        self.assertEqual(params['minx'], -75.0)
+
+
+class BackgroundLoadJobTest(APITestCase):
+    """Tests para las cargas en segundo plano (from-url) y el estado del job."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def test_from_url_returns_202_with_job_status(self):
+        """Test from-url responde 202 y el estado del job se lee del SyncLog."""
+        from unittest import mock
+        
+        with mock.patch('apps.geodata.tasks.load_url_layer.delay') as delay:
+            delay.return_value.id = 'task-1'
+            response = self.client.post('/api/v1/geodata/layers/from-url/', {
+                'name': 'Remota',
+                'url': 'https://example.com/data.geojson',
+                'service_type': 'geojson',
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data['job_id']
+        self.assertEqual(delay.call_args.kwargs['sync_log_id'], job_id)
+        
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(status_response.data['status'], SyncLog.Status.PROCESSING)
+        self.assertEqual(status_response.data['layer'], response.data['layer']['id'])
+    
+    def test_failed_load_keeps_job_and_removes_empty_layer(self):
+        """Test una carga fallida elimina la capa vacía pero el job sigue consultable."""
+        from .tasks import load_url_layer
+        
+        layer = Layer.objects.create(name='Remota', created_by=self.user)
+        sync_log = SyncLog.objects.create(layer=layer, status=SyncLog.Status.PROCESSING)
+        
+        with self.assertRaises(Exception):
+            load_url_layer.apply(
+                args=(layer.id, 'http://127.0.0.1:1/data.geojson', 'geojson', self.user.id),
+                kwargs={'sync_log_id': sync_log.id}
+            )
+        
+        self.assertFalse(Layer.objects.filter(id=layer.id).exists())
+        response = self.client.get(f'/api/v1/geodata/synclogs/{sync_log.id}/status/')
+        self.assertEqual(response.data['status'], SyncLog.Status.FAILED)
+        self.assertIsNone(response.data['layer'])
+        self.assertTrue(response.data['error'])
+
+
+class ResumableUploadTest(APITestCase):
+    """Tests para la subida reanudable por fragmentos."""
+    
+    def setUp(self):
+        import hashlib
+        import os
+        from django.test import override_settings
+        
+        self.upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.upload_dir, ignore_errors=True)
+        settings_override = override_settings(GEODATA_UPLOAD_DIR=self.upload_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+        self.chunk_size = 256 * 1024
+        self.payload = os.urandom(self.chunk_size * 2 + 1000)
+        self.sha256 = lambda data: hashlib.sha256(data).hexdigest()
+        
+        response = self.client.post('/api/v1/geodata/uploads/', {
+            'filename': 'rios.zip',
+            'total_size': len(self.payload),
+            'chunk_size': self.chunk_size,
+            'checksum': self.sha256(self.payload),
+            'name': 'Ríos',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.session_id = response.data['id']
+        self.assertEqual(response.data['total_chunks'], 3)
+    
+    def put_chunk(self, index, data=None, checksum=None):
+        data = self.payload[index * self.chunk_size:(index + 1) * self.chunk_size] if data is None else data
+        return self.client.put(
+            f'/api/v1/geodata/uploads/{self.session_id}/chunks/{index}/',
+            data=data,
+            content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or self.sha256(data)
+        )
+    
+    def test_resume_reports_missing_chunks_and_rejects_bad_checksum(self):
+        """Test los fragmentos corruptos se rechazan y el estado lista los que faltan."""
+        self.assertEqual(self.put_chunk(2).status_code, status.HTTP_200_OK)
+        
+        response = self.put_chunk(0, checksum='0' * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.get(f'/api/v1/geodata/uploads/{self.session_id}/')
+        self.assertEqual(response.data['received_chunks'], [2])
+        self.assertEqual(response.data['missing_chunks'], [0, 1])
+        
+        response = self.client.post(f'/api/v1/geodata/uploads/{self.session_id}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['missing_chunks'], [0, 1])
+    
+    def test_complete_assembles_file_and_enqueues_processing(self):
+        """Test al completar se ensambla el archivo y se encola process_layer_upload."""
+        from unittest import mock
+        
+        for index in (1, 0, 2, 1):  # Desordenado y con un reenvío
+            self.assertEqual(self.put_chunk(index).status_code, status.HTTP_200_OK)
+        
+        with mock.patch('apps.geodata.tasks.process_layer_upload.delay') as delay:
+            delay.return_value.id = 'task-1'
+            response = self.client.post(f'/api/v1/geodata/uploads/{self.session_id}/complete/')
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        layer_id, file_path, filename, user_id = delay.call_args[0]
+        with open(file_path, 'rb') as f:
+            self.assertEqual(f.read(), self.payload)
+        self.assertEqual(filename, 'rios.zip')
+        self.assertEqual(Layer.objects.get(id=layer_id).name, 'Ríos')
+        self.assertEqual(response.data['upload']['status'], 'completed')
+    
+    def test_repeated_complete_is_rejected(self):
+        """Test un complete repetido recibe 409 y no crea otra capa."""
+        from unittest import mock
+        
+        for index in range(3):
+            self.put_chunk(index)
+        
+        url = f'/api/v1/geodata/uploads/{self.session_id}/complete/'
+        with mock.patch('apps.geodata.tasks.process_layer_upload.delay') as delay:
+            delay.return_value.id = 'task-1'
+            first = self.client.post(url)
+            second = self.client.post(url)
+        
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(second.status_code, status.HTTP_409_CONFLICT)
+        delay.assert_called_once()
+        self.assertEqual(self.put_chunk(0).status_code, status.HTTP_409_CONFLICT)
+
+
+class MultiDatasetZipTest(APITestCase):
+    """Tests para la importación de ZIPs con varios datasets."""
+    
+    def setUp(self):
+        from django.test import override_settings
+        
+        self.upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.upload_dir, ignore_errors=True)
+        settings_override = override_settings(GEODATA_UPLOAD_DIR=self.upload_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def make_zip(self, members):
+        import io
+        import zipfile
+        
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            for name, content in members.items():
+                zf.writestr(name, content)
+        buffer.seek(0)
+        buffer.name = 'municipios.zip'
+        return buffer
+    
+    def collection(self, count):
+        return json.dumps({
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'type': 'Feature',
+                    'properties': {'n': i},
+                    'geometry': {'type': 'Point', 'coordinates': [-76.6 + i * 0.01, 5.6]}
+                }
+                for i in range(count)
+            ]
+        })
+    
+    def test_discover_datasets_lists_every_file(self):
+        """Test se listan todos los datasets del directorio, ignorando __MACOSX."""
+        import os
+        from .ingest.readers import discover_datasets
+        
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        for name in ('quibdo.geojson', 'norte/acandi.geojson', '__MACOSX/._quibdo.geojson', 'leeme.txt'):
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(self.collection(1))
+        
+        names = [dataset.name for dataset in discover_datasets(directory)]
+        self.assertEqual(names, ['norte/acandi', 'quibdo'])
+    
+    def test_upload_zip_creates_one_layer_per_dataset(self):
+        """Test cada dataset del ZIP se importa como capa y se agrupa en el Dataset."""
+        import os
+        
+        archive = self.make_zip({
+            'quibdo.geojson': self.collection(3),
+            'norte/acandi.geojson': self.collection(2),
+            'roto.geojson': 'no es geojson',
+        })
+        
+        response = self.client.post('/api/v1/geodata/layers/upload-zip/', {
+            'file': archive,
+            'dataset_name': 'Municipios',
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        
+        job = self.client.get(response.data['status_url']).data
+        self.assertEqual(job['status'], SyncLog.Status.PARTIAL)
+        self.assertEqual(job['datasets_total'], 3)
+        self.assertEqual(job['datasets_finished'], 3)
+        self.assertEqual(job['added'], 5)
+        
+        dataset = Dataset.objects.get(name='Municipios')
+        counts = sorted(dataset.layers.values_list('name', 'feature_count'))
+        self.assertEqual(counts, [('norte/acandi', 2), ('quibdo', 3)])
+        self.assertEqual(os.listdir(os.path.join(self.upload_dir, 'zip')), [])
+    
+    def test_upload_zip_rejects_dataset_of_other_user(self):
+        """Test no se pueden añadir capas al dataset de otro usuario."""
+        import os
+        
+        owner = User.objects.create_user(username='owner', email='owner@test.com', password='testpass123')
+        dataset = Dataset.objects.create(name='Privado', created_by=owner)
+        
+        response = self.client.post('/api/v1/geodata/layers/upload-zip/', {
+            'file': self.make_zip({'quibdo.geojson': self.collection(2)}),
+            'dataset_name': 'Privado',
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(dataset.layers.count(), 0)
+        self.assertFalse(Layer.objects.filter(name='quibdo').exists())
+        self.assertEqual(os.listdir(os.path.join(self.upload_dir, 'zip')), [])
+
+
+class GeometryStageTest(TestCase):
+    """Tests para la etapa de reproyección y validación de geometrías."""
+    
+    def frame(self):
+        import geopandas as gpd
+        from shapely.geometry import Point as ShapelyPoint, Polygon as ShapelyPolygon
+        
+        bowtie = ShapelyPolygon([(0, 0), (10, 10), (10, 0), (0, 10), (0, 0)])
+        geometries = [ShapelyPoint(500000 + i, 600000) for i in range(8)] + [bowtie, None]
+        return gpd.GeoDataFrame({'n': range(10)}, geometry=geometries, crs='EPSG:32618')
+    
+    def test_reprojects_and_repairs_in_parallel(self):
+        """Test el bloque se reparte en el pool, se reproyecta y se reparan las inválidas."""
+        from .ingest import GeometryStage
+        
+        with GeometryStage(workers=2, min_parallel_rows=4) as stage:
+            result = stage.process(self.frame(), offset=100)
+        
+        self.assertEqual(result.crs.to_epsg(), 4326)
+        self.assertEqual(len(result), 10)
+        self.assertAlmostEqual(result.geometry.iloc[0].x, -75.0, places=6)
+        self.assertTrue(result.geometry.iloc[8].is_valid)
+        self.assertIsNone(result.geometry.iloc[9])
+        
+        report = stage.report()
+        self.assertEqual((report['repaired'], report['dropped']), (1, 1))
+        self.assertEqual(
+            [(error['row'], error['action']) for error in report['errors']],
+            [(108, 'repaired'), (109, 'dropped')]
+        )
+    
+    def test_invalid_geometries_are_dropped_without_repair(self):
+        """Test con repair=False las inválidas quedan nulas y el ingestor las descarta."""
+        from .ingest import GeometryStage
+        
+        stage = GeometryStage(workers=1, repair=False)
+        result = stage.process(self.frame())
+        
+        self.assertIsNone(result.geometry.iloc[8])
+        self.assertEqual(stage.report()['dropped'], 2)
+        self.assertIn('Self-intersection', stage.report()['errors'][0]['reason'])
+
+
+class GeometryCacheTest(TestCase):
+    """Tests para la caché de geometrías por capa."""
+    
+    def setUp(self):
+        from django.test import override_settings
+        
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(GEODATA_GEOMETRY_CACHE_DIR=self.cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.layer = Layer.objects.create(
+            name='Hot Layer',
+            geometry_type='POINT',
+            created_by=self.user
+        )
+        self.features = [
+            Feature.objects.create(layer=self.layer, geometry=Point(i, i + 0.5, srid=4326))
+            for i in range(3)
+        ]
+    
+    def test_load_layer_geometries(self):
+        """Test la capa completa se carga como array de shapely con sus ids."""
+        from .geometry_cache import get_layer_geometries, load_layer_geometries
+        
+        ids, geometries = load_layer_geometries(self.layer)
+        
+        self.assertEqual(list(ids), [feature.id for feature in self.features])
+        self.assertEqual([(g.x, g.y) for g in geometries], [(0, 0.5), (1, 1.5), (2, 2.5)])
+        self.assertIs(get_layer_geometries(self.layer), get_layer_geometries(self.layer))
+    
+    def test_new_content_version_rebuilds_cache(self):
+        """Test un cambio en los features invalida la versión cacheada."""
+        import os
+        from .geometry_cache import load_layer_geometries
+        
+        load_layer_geometries(self.layer)
+        Feature.objects.create(layer=self.layer, geometry=Point(9, 9, srid=4326))
+        
+        ids, geometries = load_layer_geometries(self.layer)
+        self.assertEqual(len(ids), 4)
+        self.layer.refresh_from_db()
+        self.assertEqual(
+            os.listdir(os.path.join(self.cache_dir, str(self.layer.id))),
+            [f'v{self.layer.content_version}']
+        )
+
+
+class GeoJSONExporterTest(TestCase):
+    """Tests para el exportador GeoJSON en streaming."""
+    
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.layer = Layer.objects.create(
+            name='Export Layer',
+            geometry_type='POINT',
+            created_by=self.user
+        )
+        for i in range(5):
+            Feature.objects.create(
+                layer=self.layer,
+                feature_id=f'f{i}',
+                geometry=Point(i, i, srid=4326),
+                properties={'n': i, 'nombre': 'Quibdó'}
+            )
+    
+    def test_compact_feature_collection(self):
+        """Test el FeatureCollection es compacto, con feature_id y metadata."""
+        from .exporters import GeoJSONExporter
+        
+        path = GeoJSONExporter(self.output_dir, chunk_size=2).export_layer(self.layer, 'capa')
+        
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        data = json.loads(content)
+        self.assertTrue(path.endswith('capa.geojson'))
+        self.assertNotIn('\n  ', content)
+        self.assertEqual(data['metadata']['total_features'], 5)
+        self.assertEqual(data['features'][1]['properties'], {'feature_id': 'f1', 'n': 1, 'nombre': 'Quibdó'})
+        self.assertEqual(data['features'][1]['geometry']['coordinates'], [1, 1])
+    
+    def test_gzip_geojsonseq(self):
+        """Test GeoJSONSeq comprimido: un Feature por línea."""
+        import gzip
+        from .exporters import GeoJSONExporter
+        
+        path = GeoJSONExporter(self.output_dir).export_features(
+            self.layer.features.all(), 'seq', format='geojsonseq', compress=True
+        )
+        
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertTrue(path.endswith('seq.geojsonl.gz'))
+        self.assertEqual(len(lines), 5)
+        feature = json.loads(lines[0])
+        self.assertEqual(feature['type'], 'Feature')
+        self.assertEqual(feature['properties']['layer_id'], self.layer.id)
+
+
+class ShapefileExporterTest(TestCase):
+    """Tests para el exportador Shapefile de una sola pasada."""
+    
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+        self.layer = Layer.objects.create(name='Predios', geometry_type='MULTIPOLYGON')
+    
+    def _read(self, zip_path):
+        import zipfile
+        import shapefile
+        
+        with zipfile.ZipFile(zip_path) as zipf:
+            names = zipf.namelist()
+            zipf.extractall(self.output_dir)
+        shp = next(name for name in names if name.endswith('.shp'))
+        return names, shapefile.Reader(f"{self.output_dir}/{shp}", encoding='utf-8')
+    
+    def test_multipolygon_with_hole(self):
+        """Test los multipolígonos conservan todas sus partes y huecos."""
+        from django.contrib.gis.geos import MultiPolygon
+        from .exporters import ShapefileExporter
+        
+        outer = ((0, 0), (0, 10), (10, 10), (10, 0), (0, 0))
+        hole = ((2, 2), (4, 2), (4, 4), (2, 4), (2, 2))
+        Feature.objects.create(
+            layer=self.layer,
+            feature_id='a',
+            geometry=MultiPolygon(
+                Polygon(outer, hole),
+                Polygon(((20, 20), (21, 20), (21, 21), (20, 20))),
+                srid=4326
+            ),
+            properties={'area': 96, 'nombre': 'Tumaco'}
+        )
+        Feature.objects.create(
+            layer=self.layer,
+            feature_id='b',
+            geometry=Polygon(((0, 0), (1, 0), (1, 1), (0, 0)), srid=4326),
+            properties={'area': 0.5, 'urbano': True}
+        )
+        
+        result = ShapefileExporter(self.output_dir, chunk_size=1).export_layer(self.layer, 'predios')
+        names, reader = self._read(result['file_path'])
+        
+        self.assertEqual(result['features_count'], 2)
+        self.assertEqual(result['skipped'], 0)
+        self.assertIn('predios.dbf', names)
+        self.assertEqual(reader.shapeType, 5)
+        shape = reader.shape(0)
+        self.assertEqual(len(shape.parts), 3)
+        self.assertEqual(shape.__geo_interface__['type'], 'MultiPolygon')
+        self.assertEqual(len(shape.__geo_interface__['coordinates'][0]), 2)
+        
+        fields = {field[0]: field[1] for field in reader.fields[1:]}
+        self.assertEqual(fields, {'area': 'F', 'nombre': 'C', 'urbano': 'L', 'feature_id': 'C'})
+        self.assertEqual(reader.record(1)['feature_id'], 'b')
+        self.assertTrue(reader.record(1)['urbano'])
+    
+    def test_declared_schema(self):
+        """Test el esquema declarado define las columnas y se omiten tipos ajenos."""
+        from .exporters import ShapefileExporter
+        
+        self.layer.geometry_type = 'GEOMETRY'
+        self.layer.properties_schema = {'properties': {'codigo_predial': {'type': 'string', 'maxLength': 30}}}
+        self.layer.save()
+        for i in range(3):
+            Feature.objects.create(
+                layer=self.layer,
+                geometry=Point(i, i, srid=4326),
+                properties={'codigo_predial': f'P{i}', 'extra': i}
+            )
+        Feature.objects.create(
+            layer=self.layer,
+            geometry=Polygon(((0, 0), (1, 0), (1, 1), (0, 0)), srid=4326),
+            properties={}
+        )
+        
+        result = ShapefileExporter(self.output_dir).export_layer(self.layer, 'puntos')
+        _names, reader = self._read(result['file_path'])
+        
+        self.assertEqual(result['features_count'], 3)
+        self.assertEqual(result['skipped'], 1)
+        self.assertEqual(reader.shapeType, 1)
+        self.assertEqual(
+            [tuple(field[:3]) for field in reader.fields[1:]],
+            [('codigo_pre', 'C', 30), ('feature_id', 'C', 254)]
+        )
+        self.assertEqual(reader.record(2)[0], 'P2')
+
+
+class OGRExporterTest(TestCase):
+    """Tests para los exportadores GeoPackage y FlatGeobuf."""
+    
+    def setUp(self):
+        from django.contrib.gis.geos import MultiPolygon
+        
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+        self.dataset = Dataset.objects.create(name='Catastro')
+        self.layer = Layer.objects.create(name='Predios rurales', geometry_type='POLYGON')
+        self.dataset.layers.add(self.layer)
+        square = ((0, 0), (0, 1), (1, 1), (1, 0), (0, 0))
+        for i in range(5):
+            geometry = Polygon(square, srid=4326)
+            if i % 2:
+                geometry = MultiPolygon(geometry, srid=4326)
+            Feature.objects.create(
+                layer=self.layer,
+                feature_id=f'p{i}',
+                geometry=geometry,
+                properties={'area': i * 1.5, 'fid': i, 'vereda': 'El Carmen'}
+            )
+    
+    def test_geopackage_layer(self):
+        """Test GeoPackage: tipo múltiple, índice R-tree y transacciones por bloque."""
+        import sqlite3
+        import fiona
+        from .exporters import GeoPackageExporter
+        
+        exporter = GeoPackageExporter(self.output_dir, chunk_size=2, transaction_size=2)
+        result = exporter.export_layer(self.layer, 'predios')
+        
+        self.assertTrue(result['file_path'].endswith('predios.gpkg'))
+        self.assertEqual(result['features_count'], 5)
+        with fiona.open(result['file_path']) as src:
+            self.assertEqual(len(src), 5)
+            self.assertEqual(src.schema['geometry'], 'MultiPolygon')
+            self.assertEqual(
+                src.schema['properties'],
+                {'feature_id': 'str', 'area': 'float', 'fid1': 'int', 'vereda': 'str'}
+            )
+            feature = next(iter(src))
+            self.assertEqual(feature['properties']['feature_id'], 'p0')
+        with sqlite3.connect(result['file_path']) as connection:
+            tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master")}
+        self.assertIn('rtree_Predios_rurales_geom', tables)
+    
+    def test_flatgeobuf_dataset(self):
+        """Test FlatGeobuf por dataset: un .fgb por capa dentro de un ZIP."""
+        import zipfile
+        import fiona
+        from .exporters import FlatGeobufExporter
+        
+        result = FlatGeobufExporter(self.output_dir).export_dataset(self.dataset, 'catastro')
+        
+        self.assertTrue(result['file_path'].endswith('catastro_complete.fgb.zip'))
+        self.assertEqual(result['features_count'], 5)
+        with zipfile.ZipFile(result['file_path']) as zipf:
+            self.assertEqual(zipf.namelist(), ['Predios_rurales.fgb'])
+            zipf.extractall(self.output_dir)
+        with fiona.open(f'{self.output_dir}/Predios_rurales.fgb') as src:
+            self.assertEqual(len(src), 5)
+
+
+class ExportJobTest(APITestCase):
+    """Tests para las exportaciones asíncronas con reutilización."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123',
+            role='analyst'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.layer = Layer.objects.create(name='Estaciones', geometry_type='POINT', created_by=self.user)
+        for i in range(3):
+            Feature.objects.create(layer=self.layer, geometry=Point(i, i, srid=4326), properties={'n': i})
+        self.addCleanup(self.remove_exports)
+    
+    def remove_exports(self):
+        import os
+        from apps.core.models import GeneratedFile
+        
+        for path in GeneratedFile.objects.values_list('file_path', flat=True):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def test_job_then_reuse(self):
+        """Test la primera exportación es un job; la idéntica reutiliza el archivo."""
+        url = f'/api/v1/geodata/layers/{self.layer.id}/export/'
+        
+        response = self.client.post(url, {'format': 'geojson'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data['jobs'][0]['job_id']
+        
+        job = self.client.get(f'/api/v1/geodata/synclogs/{job_id}/status/').data
+        self.assertEqual(job['status'], SyncLog.Status.SUCCESS)
+        download = self.client.get(f'/api/v1/geodata/synclogs/{job_id}/download/')
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(b''.join(download.streaming_content))['metadata']['total_features'], 3)
+        
+        response = self.client.post(url, {'format': 'geojson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['files'][0]['file_id'], job['file']['file_id'])
+        
+        # Otras opciones o un cambio en los features generan una exportación nueva
+        response = self.client.post(url, {'format': 'geojson', 'compress': True})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        Feature.objects.create(layer=self.layer, geometry=Point(9, 9, srid=4326), properties={'n': 9})
+        response = self.client.post(url, {'format': 'geojson'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertNotEqual(response.data['jobs'][0]['job_id'], job_id)
+    
+    def test_identical_requests_share_job(self):
+        """Test peticiones idénticas mientras corre el job reciben el mismo job id."""
+        from unittest import mock
+        
+        url = f'/api/v1/geodata/layers/{self.layer.id}/download/gpkg/'
+        with mock.patch('apps.geodata.tasks.run_export_job.apply_async') as apply_async:
+            first = self.client.get(url)
+            second = self.client.get(url)
+        
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(second.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(first.data['job_id'], second.data['job_id'])
+        apply_async.assert_called_once()
+        
+        pending = self.client.get(first.data['download_url'])
+        self.assertEqual(pending.status_code, status.HTTP_409_CONFLICT)
+        unsupported = self.client.get(f'/api/v1/geodata/layers/{self.layer.id}/download/kml/')
+        self.assertEqual(unsupported.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_jobs_of_private_objects_hidden(self):
+        """Test otro usuario no lista, ve ni descarga jobs de capas, datasets o ZIPs ajenos."""
+        dataset = Dataset.objects.create(name='Privado', created_by=self.user)
+        dataset.layers.add(self.layer)
+        layer_job = self.client.post(f'/api/v1/geodata/layers/{self.layer.id}/export/', {'format': 'geojson'})
+        dataset_job = self.client.post(f'/api/v1/geodata/datasets/{dataset.id}/export/', {'format': 'gpkg'})
+        zip_job = SyncLog.objects.create(requested_by=self.user, details={'filename': 'privado.zip'})
+        
+        other = User.objects.create_user(username='otro', email='otro@test.com', password='testpass123')
+        self.client.force_authenticate(user=other)
+        listed = self.client.get('/api/v1/geodata/synclogs/').data['results']
+        self.assertEqual(listed, [])
+        self.assertEqual(
+            self.client.get(f'/api/v1/geodata/synclogs/{zip_job.id}/').status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+        for response in (layer_job, dataset_job):
+            job_id = response.data['jobs'][0]['job_id']
+            self.assertEqual(
+                self.client.get(f'/api/v1/geodata/synclogs/{job_id}/status/').status_code,
+                status.HTTP_404_NOT_FOUND
+            )
+            self.assertEqual(
+                self.client.get(f'/api/v1/geodata/synclogs/{job_id}/download/').status_code,
+                status.HTTP_404_NOT_FOUND
+            )
+    
+    def test_dataset_export_per_layer(self):
+        """Test un dataset se exporta con un job por capa en un único ZIP."""
+        import io
+        import zipfile
+        
+        dataset = Dataset.objects.create(name='Red')
+        other = Layer.objects.create(name='Vías', geometry_type='POINT', created_by=self.user)
+        Feature.objects.create(layer=other, geometry=Point(5, 5, srid=4326), properties={'n': 5})
+        dataset.layers.add(self.layer, other)
+        
+        response = self.client.post(f'/api/v1/geodata/datasets/{dataset.id}/export/', {'format': 'shapefile'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data['jobs'][0]['job_id']
+        
+        job = self.client.get(f'/api/v1/geodata/synclogs/{job_id}/status/').data
+        self.assertEqual(job['status'], SyncLog.Status.SUCCESS)
+        self.assertEqual(job['datasets_total'], 2)
+        self.assertEqual(job['added'], 4)
+        
+        download = self.client.get(f'/api/v1/geodata/synclogs/{job_id}/download/')
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        names = zipfile.ZipFile(io.BytesIO(b''.join(download.streaming_content))).namelist()
+        self.assertIn(f'Estaciones_{self.layer.id}/Estaciones_{self.layer.id}.shp', names)
+        self.assertIn(f'Vías_{other.id}/Vías_{other.id}.dbf', names)
+        self.assertFalse([name for name in names if name.endswith('.zip')])
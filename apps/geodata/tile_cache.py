@@ -0,0 +1,304 @@
+"""
+Caché persistente de teselas vectoriales.
+
+Las teselas se guardan con clave (capa, versión de contenido, nombre MVT y
+propiedades, z, x, y). Como Layer.content_version cambia con cada modificación de
+features, las entradas antiguas dejan de consultarse y se eliminan por LRU
+(o al detectar una versión nueva de la capa en disco).
+
+Backends (GEODATA_TILE_CACHE_BACKEND):
+    disk: archivos bajo GEODATA_TILE_CACHE_DIR; el mtime hace de marca LRU
+    redis: GEODATA_TILE_CACHE_REDIS_URL, con un sorted set de accesos LRU
+    none: sin caché
+"""
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def properties_token(properties: Optional[Iterable[str]]) -> str:
+    """Identificador corto y estable de la selección de propiedades."""
+    keys = sorted(set(properties or []))
+    if not keys:
+        return 'none'
+    return hashlib.sha1(','.join(keys).encode('utf-8')).hexdigest()[:12]
+
+
+def tile_token(layer, properties: Optional[Iterable[str]] = None) -> str:
+    """
+    Identificador corto del contenido de la tesela aparte de la versión.
+    
+    Combina el nombre de la capa MVT (va dentro de la tesela y renombrar la
+    capa no cambia content_version) con la selección de propiedades.
+    """
+    from .tiles import mvt_layer_name
+    
+    token = f'{mvt_layer_name(layer)}\x00{properties_token(properties)}'
+    return hashlib.sha1(token.encode('utf-8')).hexdigest()[:12]
+
+
+def tile_etag(layer, z: int, x: int, y: int, properties: Optional[Iterable[str]] = None) -> str:
+    """ETag de una tesela (versión de la capa, nombre MVT, propiedades y coordenadas)."""
+    return f'"{layer.id}-{layer.content_version}-{tile_token(layer, properties)}-{z}-{x}-{y}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evalúa la cabecera If-None-Match contra un ETag."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+class DiskTileCache:
+    """
+    Caché de teselas en disco con expulsión LRU acotada por tamaño.
+
+    Estructura: <root>/<layer_id>/<version>/<props>/<z>/<x>/<y>.mvt
+    """
+
+    def __init__(self, root, max_bytes: int = DEFAULT_MAX_BYTES, evict_every: int = 200):
+        """
+        Args:
+            root: Directorio raíz de la caché
+            max_bytes: Tamaño máximo total
+            evict_every: Escrituras entre revisiones del tamaño total
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, layer_id, version, props, z, x, y) -> Path:
+        return self.root / str(layer_id) / str(version) / props / str(z) / str(x) / f'{y}.mvt'
+
+    def get(self, layer_id, version, props, z, x, y) -> Optional[bytes]:
+        path = self._path(layer_id, version, props, z, x, y)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def set(self, layer_id, version, props, z, x, y, data: bytes):
+        path = self._path(layer_id, version, props, z, x, y)
+        version_dir = self.root / str(layer_id) / str(version)
+        if not version_dir.exists():
+            self._drop_old_versions(layer_id, version)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._writes += 1
+            should_evict = self._writes % self.evict_every == 0
+        if should_evict:
+            self.evict()
+
+    def _drop_old_versions(self, layer_id, current_version):
+        layer_dir = self.root / str(layer_id)
+        if not layer_dir.exists():
+            return
+        for child in layer_dir.iterdir():
+            if child.is_dir() and child.name != str(current_version):
+                shutil.rmtree(child, ignore_errors=True)
+
+    def evict(self) -> int:
+        """
+        Elimina las teselas menos usadas hasta quedar bajo el 90% del límite.
+
+        Returns:
+            Cantidad de teselas eliminadas
+        """
+        entries = []
+        total = 0
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith('.mvt'):
+                    continue
+                full = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, full))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return 0
+
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _mtime, size, full in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(full)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+
+        logger.info(f"Tile cache eviction removed {removed} tiles ({total} bytes remaining)")
+        return removed
+
+    def clear(self, layer_id=None):
+        target = self.root / str(layer_id) if layer_id is not None else self.root
+        shutil.rmtree(target, ignore_errors=True)
+
+
+class RedisTileCache:
+    """
+    Caché de teselas en Redis con expulsión LRU acotada por tamaño.
+
+    Cada tesela es una clave; un sorted set guarda el último acceso y un
+    contador el tamaño total, de modo que la expulsión no depende de la
+    política maxmemory del servidor (compartido con Celery).
+    """
+
+    prefix = 'geodata:tiles'
+
+    def __init__(self, url: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.max_bytes = max_bytes
+        self.lru_key = f'{self.prefix}:lru'
+        self.size_key = f'{self.prefix}:bytes'
+
+    def _key(self, layer_id, version, props, z, x, y) -> str:
+        return f'{self.prefix}:{layer_id}:{version}:{props}:{z}:{x}:{y}'
+
+    def get(self, layer_id, version, props, z, x, y) -> Optional[bytes]:
+        key = self._key(layer_id, version, props, z, x, y)
+        data = self.client.get(key)
+        if data is not None:
+            self.client.zadd(self.lru_key, {key: time.time()})
+        return data
+
+    def set(self, layer_id, version, props, z, x, y, data: bytes):
+        key = self._key(layer_id, version, props, z, x, y)
+        pipe = self.client.pipeline()
+        pipe.strlen(key)
+        pipe.set(key, data)
+        pipe.zadd(self.lru_key, {key: time.time()})
+        previous, _, _ = pipe.execute()
+        total = self.client.incrby(self.size_key, len(data) - int(previous or 0))
+        if total > self.max_bytes:
+            self.evict()
+
+    def evict(self, batch: int = 100) -> int:
+        """Elimina las teselas menos usadas hasta quedar bajo el 90% del límite."""
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        while int(self.client.get(self.size_key) or 0) > target:
+            oldest = self.client.zpopmin(self.lru_key, batch)
+            if not oldest:
+                self.client.set(self.size_key, 0)
+                break
+            keys = [key for key, _score in oldest]
+            pipe = self.client.pipeline()
+            for key in keys:
+                pipe.strlen(key)
+            sizes = pipe.execute()
+            self.client.delete(*keys)
+            self.client.decrby(self.size_key, sum(int(size or 0) for size in sizes))
+            removed += len(keys)
+        return removed
+
+    def clear(self, layer_id=None):
+        pattern = f'{self.prefix}:{layer_id}:*' if layer_id is not None else f'{self.prefix}:*'
+        keys = list(self.client.scan_iter(match=pattern, count=1000))
+        if keys:
+            self.client.delete(*keys)
+            self.client.zrem(self.lru_key, *keys)
+        if layer_id is None:
+            self.client.delete(self.size_key, self.lru_key)
+
+
+_tile_cache = None
+_tile_cache_lock = threading.Lock()
+
+
+def get_tile_cache():
+    """
+    Retorna la caché de teselas configurada (None si está desactivada).
+
+    Returns:
+        DiskTileCache, RedisTileCache o None
+    """
+    global _tile_cache
+
+    backend = getattr(settings, 'GEODATA_TILE_CACHE_BACKEND', 'disk')
+    if backend in (None, '', 'none'):
+        return None
+
+    with _tile_cache_lock:
+        if _tile_cache is None:
+            max_bytes = getattr(settings, 'GEODATA_TILE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+            if backend == 'redis':
+                _tile_cache = RedisTileCache(settings.GEODATA_TILE_CACHE_REDIS_URL, max_bytes=max_bytes)
+            elif backend == 'disk':
+                _tile_cache = DiskTileCache(settings.GEODATA_TILE_CACHE_DIR, max_bytes=max_bytes)
+            else:
+                raise ValueError(f'Backend de caché de teselas no válido: {backend}')
+    return _tile_cache
+
+
+def cached_tile(layer, z: int, x: int, y: int, properties: Optional[Iterable[str]] = None,
+                render=None) -> bytes:
+    """
+    Retorna una tesela desde la caché o la genera y la guarda.
+
+    Args:
+        layer: Layer de la tesela
+        z, x, y: Coordenadas XYZ
+        properties: Claves de properties incluidas como atributos
+        render: Función (layer, z, x, y, properties) -> bytes
+
+    Returns:
+        Bytes de la tesela (vacío si no hay features)
+    """
+    if render is None:
+        from .tiles import render_tile as render
+
+    tile_cache = get_tile_cache()
+    props = tile_token(layer, properties)
+    key = (layer.id, layer.content_version, props, z, x, y)
+
+    if tile_cache is not None:
+        try:
+            data = tile_cache.get(*key)
+        except Exception as e:
+            logger.warning(f"Tile cache read failed: {e}")
+            data = None
+        if data is not None:
+            return data
+
+    data = render(layer, z, x, y, properties=list(properties or []))
+
+    if tile_cache is not None:
+        try:
+            tile_cache.set(*key, data)
+        except Exception as e:
+            logger.warning(f"Tile cache write failed: {e}")
+
+    return data
@@ -0,0 +1,154 @@
+"""
+Teselas vectoriales (Mapbox Vector Tiles) generadas en PostGIS.
+
+Cada tesela se construye en una sola consulta: ST_TileEnvelope delimita la
+tesela, el índice espacial de Feature.geometry filtra los features que la
+tocan, ST_AsMVTGeom recorta y cuantiza las geometrías y ST_AsMVT codifica
+el resultado. Las claves de propiedades seleccionadas viajan en una columna
+jsonb, que ST_AsMVT convierte en atributos de la tesela.
+"""
+import logging
+import math
+from typing import Iterator, List, Optional, Tuple
+
+from django.db import connections
+
+from .models import Feature
+from .utils import MAX_ZOOM
+
+logger = logging.getLogger(__name__)
+
+MVT_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+
+def mvt_layer_name(layer) -> str:
+    """Nombre de la capa dentro de la tesela MVT."""
+    return layer.name or f'layer_{layer.id}'
+
+
+def tiles_supported(using: str = 'default') -> bool:
+    """Indica si la base de datos puede generar teselas (PostGIS)."""
+    return connections[using].vendor == 'postgresql'
+
+
+def validate_tile(z: int, x: int, y: int):
+    """
+    Valida las coordenadas de una tesela XYZ.
+
+    Raises:
+        ValueError: Si la tesela no existe en el esquema web mercator
+    """
+    if not 0 <= z <= MAX_ZOOM:
+        raise ValueError(f'z debe estar entre 0 y {MAX_ZOOM}')
+    limit = 2 ** z
+    if not (0 <= x < limit and 0 <= y < limit):
+        raise ValueError(f'x e y deben estar entre 0 y {limit - 1} para z={z}')
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    """Tesela XYZ que contiene un punto lon/lat en el zoom z."""
+    lat = max(-85.05112878, min(85.05112878, lat))
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bounds(bounds, z: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    Teselas de un zoom que cubren un bounding box en EPSG:4326.
+
+    Args:
+        bounds: (minx, miny, maxx, maxy)
+        z: Nivel de zoom
+
+    Yields:
+        Tuplas (z, x, y)
+    """
+    minx, miny, maxx, maxy = bounds
+    x0, y0 = lonlat_to_tile(minx, maxy, z)
+    x1, y1 = lonlat_to_tile(maxx, miny, z)
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield z, x, y
+
+
+def tile_sql(table: str, with_properties: bool) -> str:
+    """SQL de ST_AsMVT para una tesela de una capa."""
+    properties = (
+        """,
+            (
+                SELECT jsonb_object_agg(p.key, p.value)
+                FROM jsonb_each(f.properties) AS p
+                WHERE p.key = ANY(%(keys)s) AND p.value <> 'null'::jsonb
+            ) AS attributes"""
+        if with_properties else ''
+    )
+    return f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom_3857,
+                   ST_Transform(ST_TileEnvelope(%(z)s, %(x)s, %(y)s), 4326) AS geom_4326
+        ),
+        mvtgeom AS (
+            SELECT
+                f.id,
+                ST_AsMVTGeom(
+                    ST_Transform(f.geometry, 3857),
+                    bounds.geom_3857,
+                    %(extent)s,
+                    %(buffer)s,
+                    true
+                ) AS geom{properties}
+            FROM {table} AS f, bounds
+            WHERE f.layer_id = %(layer_id)s
+              AND f.is_active
+              AND f.geometry && bounds.geom_4326
+        )
+        SELECT ST_AsMVT(mvtgeom.*, %(name)s, %(extent)s, 'geom', 'id')
+        FROM mvtgeom
+        WHERE geom IS NOT NULL
+    """
+
+
+def render_tile(layer, z: int, x: int, y: int, properties: Optional[List[str]] = None,
+                extent: int = TILE_EXTENT, buffer: int = TILE_BUFFER,
+                using: str = 'default') -> bytes:
+    """
+    Genera una tesela MVT de una capa.
+
+    Args:
+        layer: Layer a teselar
+        z, x, y: Coordenadas XYZ de la tesela
+        properties: Claves de properties a incluir como atributos
+        extent: Resolución interna de la tesela
+        buffer: Margen en unidades de tesela para evitar cortes en los bordes
+        using: Alias de la base de datos
+
+    Returns:
+        Bytes de la tesela (vacío si no hay features)
+    """
+    validate_tile(z, x, y)
+
+    connection = connections[using]
+    table = connection.ops.quote_name(Feature._meta.db_table)
+    params = {
+        'z': z,
+        'x': x,
+        'y': y,
+        'extent': extent,
+        'buffer': buffer,
+        'layer_id': layer.id,
+        'name': mvt_layer_name(layer),
+        'keys': list(properties or []),
+    }
+
+    with connection.cursor() as cursor:
+        cursor.execute(tile_sql(table, bool(properties)), params)
+        row = cursor.fetchone()
+
+    tile = bytes(row[0]) if row and row[0] is not None else b''
+    logger.debug(f"Tile {z}/{x}/{y} for layer {layer.id}: {len(tile)} bytes")
+    return tile
@@ -0,0 +1,156 @@
+"""
+Almacenamiento de subidas reanudables por fragmentos.
+
+Cada UploadSession tiene un directorio GEODATA_UPLOAD_DIR/sessions/<id>/
+con un archivo por fragmento (<index>.part). Un fragmento se escribe en un
+temporal, se verifica (tamaño y SHA-256) y se renombra, así que en disco
+solo hay fragmentos completos y los reenvíos son idempotentes. La lista de
+fragmentos recibidos se obtiene del disco, no de la base de datos.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class ChunkError(ValueError):
+    """Fragmento rechazado (índice, tamaño o checksum no válidos)."""
+
+
+def sessions_root() -> Path:
+    return Path(getattr(settings, 'GEODATA_UPLOAD_DIR', settings.BASE_DIR / 'data' / 'uploads')) / 'sessions'
+
+
+def session_dir(session) -> Path:
+    """Directorio de fragmentos de una sesión."""
+    return sessions_root() / str(session.id)
+
+
+def chunk_path(session, index: int) -> Path:
+    return session_dir(session) / f'{index:06d}.part'
+
+
+def received_chunks(session) -> List[int]:
+    """Índices de los fragmentos ya recibidos, ordenados."""
+    directory = session_dir(session)
+    if not directory.exists():
+        return []
+    return sorted(
+        int(entry.name.split('.', 1)[0])
+        for entry in os.scandir(directory)
+        if entry.name.endswith('.part')
+    )
+
+
+def missing_chunks(session) -> List[int]:
+    """Índices de los fragmentos que faltan."""
+    received = set(received_chunks(session))
+    return [index for index in range(session.total_chunks) if index not in received]
+
+
+def write_chunk(session, index: int, stream: BinaryIO, checksum: Optional[str] = None) -> str:
+    """
+    Guarda un fragmento leyendo el cuerpo de la petición por bloques.
+
+    Args:
+        session: UploadSession
+        index: Índice del fragmento (desde 0)
+        stream: Cuerpo de la petición
+        checksum: SHA-256 hexadecimal esperado (opcional)
+
+    Returns:
+        SHA-256 del fragmento guardado
+
+    Raises:
+        ChunkError: Si el índice, el tamaño o el checksum no son válidos
+    """
+    if index < 0 or index >= session.total_chunks:
+        raise ChunkError(f'Índice de fragmento fuera de rango (0-{session.total_chunks - 1})')
+
+    expected_size = session.expected_chunk_size(index)
+    directory = session_dir(session)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    target = chunk_path(session, index)
+    temp = directory / f'{target.name}.{uuid.uuid4().hex}.tmp'
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(temp, 'wb') as f:
+            while True:
+                block = stream.read(READ_BLOCK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > expected_size:
+                    raise ChunkError(f'El fragmento {index} excede {expected_size} bytes')
+                digest.update(block)
+                f.write(block)
+
+        if size != expected_size:
+            raise ChunkError(f'El fragmento {index} tiene {size} bytes, se esperaban {expected_size}')
+
+        actual = digest.hexdigest()
+        if checksum and checksum.lower() != actual:
+            raise ChunkError(f'Checksum del fragmento {index} no coincide')
+
+        os.replace(temp, target)
+        return actual
+    finally:
+        if temp.exists():
+            temp.unlink()
+
+
+def assemble(session, destination_dir: Path) -> Path:
+    """
+    Concatena los fragmentos en el archivo final y verifica el checksum global.
+
+    Args:
+        session: UploadSession con todos los fragmentos recibidos
+        destination_dir: Directorio del archivo ensamblado
+
+    Returns:
+        Ruta del archivo ensamblado
+
+    Raises:
+        ChunkError: Si faltan fragmentos o el checksum no coincide
+    """
+    missing = missing_chunks(session)
+    if missing:
+        raise ChunkError(f'Faltan {len(missing)} fragmentos (primero: {missing[0]})')
+
+    destination_dir.mkdir(parents=True, exist_ok=True)
+    destination = destination_dir / f'{session.id}_{Path(session.filename).name}'
+    digest = hashlib.sha256()
+
+    with open(destination, 'wb') as out:
+        for index in range(session.total_chunks):
+            with open(chunk_path(session, index), 'rb') as part:
+                while True:
+                    block = part.read(READ_BLOCK_SIZE)
+                    if not block:
+                        break
+                    digest.update(block)
+                    out.write(block)
+
+    if session.checksum and session.checksum.lower() != digest.hexdigest():
+        destination.unlink()
+        raise ChunkError('Checksum del archivo ensamblado no coincide')
+
+    logger.info(f"Assembled upload {session.id}: {session.total_chunks} chunks, {session.total_size} bytes")
+    return destination
+
+
+def discard(session):
+    """Elimina los fragmentos de una sesión."""
+    shutil.rmtree(session_dir(session), ignore_errors=True)
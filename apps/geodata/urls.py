@@ -5,7 +5,8 @@ from .views import (
     LayerViewSet,
     FeatureViewSet,
     DatasetViewSet,
-    SyncLogViewSet
+    SyncLogViewSet,
+    UploadSessionViewSet
 )
 
 router = DefaultRouter()
@@ -14,7 +15,11 @@ router.register(r'layers', LayerViewSet, basename='layer')
 router.register(r'features', FeatureViewSet, basename='feature')
 router.register(r'datasets', DatasetViewSet, basename='dataset')
 router.register(r'synclogs', SyncLogViewSet, basename='synclog')
+router.register(r'uploads', UploadSessionViewSet, basename='upload-session')
+
+layer_tiles = LayerViewSet.as_view({'get': 'tiles'})
 
 urlpatterns = [
+    path('layers/<int:pk>/tiles/<int:z>/<int:x>/<int:y>.mvt', layer_tiles, name='layer-tiles'),
     path('', include(router.urls)),
 ]
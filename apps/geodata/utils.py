@@ -6,6 +6,7 @@ from django.contrib.gis.geos import GEOSGeometry, Point, LineString, Polygon
 from django.contrib.gis.gdal import DataSource as GDALDataSource
 import json
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 
@@ -94,6 +95,37 @@ def simplify_geometry(geom: GEOSGeometry, tolerance: float = 0.0001) -> GEOSGeom
     return geom.simplify(tolerance=tolerance, preserve_topology=True)
 
 
+MAX_ZOOM = 22
+
+
+def zoom_to_tolerance(zoom: int, tile_size: int = 256) -> float:
+    """
+    Tolerancia de simplificación (grados) equivalente a un píxel en un zoom.
+    
+    Args:
+        zoom: Nivel de zoom web mercator (0-22)
+        tile_size: Tamaño de tesela en píxeles
+    
+    Returns:
+        Grados por píxel en el ecuador
+    """
+    return 360.0 / (tile_size * 2 ** zoom)
+
+
+def zoom_to_precision(zoom: int, tile_size: int = 256) -> int:
+    """
+    Decimales de coordenadas suficientes para un nivel de zoom.
+    
+    Args:
+        zoom: Nivel de zoom web mercator (0-22)
+        tile_size: Tamaño de tesela en píxeles
+    
+    Returns:
+        Cantidad de decimales (sub-píxel), entre 0 y 15
+    """
+    return max(0, min(15, math.ceil(-math.log10(zoom_to_tolerance(zoom, tile_size)))))
+
+
 def geometry_to_geojson(geom: GEOSGeometry) -> Dict[str, Any]:
     """
     Convierte GEOSGeometry a GeoJSON dict.
@@ -2,27 +2,35 @@
 Views for Geodata app - SMGI Sistema de Monitoreo Geoespacial Inteligente.
 Includes upload functionality for shapefiles, GeoJSON, KML, GeoPackage.
 """
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import BaseParser, JSONParser, MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from django.contrib.gis.geos import GEOSGeometry
-from django.db.models import Q
-from django.http import FileResponse, HttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import IntegerField, Q, Subquery
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
+from django.urls import reverse
+from django.utils import timezone
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 import os
 import json
 import tempfile
 import shutil
+import uuid
 import zipfile
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
-from .models import DataSource, Layer, Feature, Dataset, SyncLog
+from apps.core.pagination import KeysetPagination
+from .models import DataSource, Layer, Feature, Dataset, SyncLog, UploadSession
 from .serializers import (
     DataSourceSerializer,
     LayerSerializer,
@@ -33,23 +41,64 @@ from .serializers import (
     URLLayerSerializer,
     ArcGISLayerSerializer,
     DatabaseLayerSerializer,
+    UploadSessionSerializer,
+    UploadSessionCreateSerializer,
 )
 from .serializers_export import ExportRequestSerializer
-from .filters import DataSourceFilter, LayerFilter, FeatureFilter
+from .filters import DataSourceFilter, LayerFilter, FeatureFilter, has_active_filters
 from .tasks import sync_data_source
-from .exporters import ShapefileExporter, GeoJSONExporter
+from .bulk import bulk_operation
+from . import uploads
+from .streaming import iter_feature_collection, GEOJSON_CONTENT_TYPE
+from .cache import simplified_geojson_key
+from .tiles import tiles_supported, validate_tile, MVT_CONTENT_TYPE
+from .tile_cache import cached_tile, etag_matches, tile_etag
+from .utils import MAX_ZOOM, zoom_to_tolerance, zoom_to_precision
+from .export_jobs import EXPORT_FORMATS, enqueue_export, file_info
+from .ingest import FeatureIngestor, INGEST_BACKENDS
+from .ingest.readers import ChunkedGeoReader, resolve_dataset_path, DEFAULT_CHUNK_SIZE
 from apps.users.permissions import IsAnalystOrAbove
 
 logger = logging.getLogger(__name__)
 
 
 class ExportMixin:
-    """Mixin para agregar funcionalidad de exportación."""
+    """
+    Mixin para agregar funcionalidad de exportación.
+    
+    Las exportaciones se generan en un job de Celery (ver export_jobs): si ya
+    existe un archivo vigente para el mismo objeto, formato, opciones y
+    versión de contenido se entrega de inmediato; si no, se responde 202 con
+    el job id y el archivo se descarga desde /synclogs/{job_id}/download/.
+    """
+    
+    def _export_file_data(self, request, file_record):
+        data = file_info(file_record)
+        data['download_url'] = request.build_absolute_uri(
+            reverse('synclog-job-download', kwargs={'pk': data['job_id']})
+        )
+        return data
+    
+    def _export_job_data(self, request, sync_log):
+        return {
+            'job_id': sync_log.id,
+            'format': sync_log.details.get('format'),
+            'status': sync_log.status,
+            'status_url': request.build_absolute_uri(
+                reverse('synclog-job-status', kwargs={'pk': sync_log.id})
+            ),
+            'download_url': request.build_absolute_uri(
+                reverse('synclog-job-download', kwargs={'pk': sync_log.id})
+            ),
+        }
     
     @action(detail=True, methods=['post'], url_path='export')
     def export_data(self, request, pk=None):
         """
-        Exporta los datos a Shapefile o GeoJSON.
+        Exporta los datos a Shapefile, GeoJSON, GeoPackage o FlatGeobuf.
+        
+        Responde 200 con los archivos si todos existían, o 202 con los jobs
+        que quedan en proceso.
         """
         serializer = ExportRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -58,60 +107,42 @@ class ExportMixin:
         export_format = serializer.validated_data['format']
         filename = serializer.validated_data.get('filename')
         
+        if not isinstance(obj, (Layer, Dataset)):
+            return Response({
+                'error': 'Tipo de objeto no soportado'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        formats = ['shapefile', 'geojson'] if export_format == 'both' else [export_format]
+        if isinstance(obj, Dataset):
+            # GeoJSON se exporta por capa
+            formats = [f for f in formats if f not in ('geojson', 'geojsonseq')]
+            if not formats:
+                return Response({
+                    'error': f'El formato {export_format} no admite datasets'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
         files = []
+        jobs = []
+        for fmt in formats:
+            file_record, sync_log = enqueue_export(obj, fmt, serializer.validated_data, request.user, filename)
+            if file_record is not None:
+                files.append(self._export_file_data(request, file_record))
+            else:
+                jobs.append(self._export_job_data(request, sync_log))
         
-        try:
-            if export_format in ['shapefile', 'both']:
-                shp_exporter = ShapefileExporter(output_dir='data/exports/shapefiles')
-                
-                if hasattr(obj, 'features'):
-                    result = shp_exporter.export_layer(obj, filename)
-                    shp_path = result.get('file_path', result) if isinstance(result, dict) else result
-                elif hasattr(obj, 'layers'):
-                    result = shp_exporter.export_dataset(obj, filename)
-                    shp_path = result.get('file_path', result) if isinstance(result, dict) else result
-                else:
-                    return Response({
-                        'error': 'Tipo de objeto no soportado'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                files.append({
-                    'format': 'shapefile',
-                    'filename': os.path.basename(shp_path),
-                    'size': os.path.getsize(shp_path) if os.path.exists(shp_path) else 0,
-                    'download_url': request.build_absolute_uri(
-                        f'/api/v1/geodata/download/{os.path.basename(shp_path)}'
-                    )
-                })
-            
-            if export_format in ['geojson', 'both']:
-                geojson_exporter = GeoJSONExporter(output_dir='data/exports/geojson')
-                
-                if hasattr(obj, 'features'):
-                    result = geojson_exporter.export_layer(obj, filename)
-                    geojson_path = result.get('file_path', result) if isinstance(result, dict) else result
-                    
-                    files.append({
-                        'format': 'geojson',
-                        'filename': os.path.basename(geojson_path),
-                        'size': os.path.getsize(geojson_path) if os.path.exists(geojson_path) else 0,
-                        'download_url': request.build_absolute_uri(
-                            f'/api/v1/geodata/download/{os.path.basename(geojson_path)}'
-                        )
-                    })
-            
+        if jobs:
             return Response({
                 'success': True,
-                'message': 'Exportación completada exitosamente',
-                'files': files
-            })
+                'message': 'Exportación en proceso',
+                'files': files,
+                'jobs': jobs
+            }, status=status.HTTP_202_ACCEPTED)
         
-        except Exception as e:
-            logger.error(f"Export error: {str(e)}", exc_info=True)
-            return Response({
-                'success': False,
-                'message': f'Error: {str(e)}'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({
+            'success': True,
+            'message': 'Exportación disponible',
+            'files': files
+        })
     
     @extend_schema(
         parameters=[
@@ -119,46 +150,41 @@ class ExportMixin:
                 name='format_type',
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.PATH,
-                description='Formato de exportación (shapefile, geojson, kml, gpkg)',
-                enum=['shapefile', 'geojson', 'kml', 'gpkg']
+                description='Formato de exportación (shapefile, geojson, geojsonseq, gpkg, flatgeobuf)',
+                enum=list(EXPORT_FORMATS)
+            ),
+            OpenApiParameter(
+                name='compress',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Comprimir la salida GeoJSON con gzip'
             )
         ],
-        description='Genera y descarga archivo en el formato especificado'
+        description=(
+            'Descarga el archivo en el formato especificado si ya existe una exportación '
+            'vigente; si no, responde 202 con el job que lo genera'
+        )
     )
     @action(detail=True, methods=['get'], url_path='download/(?P<format_type>[^/.]+)')
     def download_export(self, request, pk=None, format_type=None):
-        """Genera y descarga archivo directamente."""
+        """Descarga la exportación vigente o encola su generación."""
         obj = self.get_object()
         
-        try:
-            if format_type == 'shapefile':
-                exporter = ShapefileExporter(output_dir='data/exports/shapefiles')
-                result = exporter.export_layer(obj)
-                file_path = result.get('file_path', result) if isinstance(result, dict) else result
-                content_type = 'application/zip'
-            else:
-                exporter = GeoJSONExporter(output_dir='data/exports/geojson')
-                result = exporter.export_layer(obj)
-                file_path = result.get('file_path', result) if isinstance(result, dict) else result
-                content_type = 'application/geo+json'
-            
-            if os.path.exists(file_path):
-                response = FileResponse(
-                    open(file_path, 'rb'),
-                    content_type=content_type
-                )
-                response['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
-                return response
-            
+        if format_type not in EXPORT_FORMATS:
             return Response({
-                'error': 'Archivo no encontrado'
-            }, status=status.HTTP_404_NOT_FOUND)
+                'error': f'Formato no soportado: {format_type}'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        except Exception as e:
-            logger.error(f"Download error: {str(e)}", exc_info=True)
+        options = {'compress': request.query_params.get('compress', '').lower() in ('1', 'true')}
+        file_record, sync_log = enqueue_export(obj, format_type, options, request.user)
+        
+        if file_record is None:
             return Response({
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                'message': 'Exportación en proceso',
+                **self._export_job_data(request, sync_log)
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        return export_file_response(file_record)
 
 
 class DataSourceViewSet(viewsets.ModelViewSet):
@@ -175,6 +201,11 @@ class DataSourceViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save(updated_by=self.request.user)
     
+    def perform_destroy(self, instance):
+        # El borrado en cascada de features no encola una tarea por feature
+        with bulk_operation():
+            instance.delete()
+    
     @action(detail=True, methods=['post'])
     def sync(self, request, pk=None):
         """Trigger manual sync for this data source."""
@@ -212,6 +243,11 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
     
     def perform_update(self, serializer):
         serializer.save(updated_by=self.request.user)
+    
+    def perform_destroy(self, instance):
+        # El borrado en cascada de features no encola una tarea por feature
+        with bulk_operation():
+            instance.delete()
 
     @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def upload(self, request):
@@ -220,8 +256,6 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
         
         POST /api/v1/geodata/layers/upload/
         """
-        import geopandas as gpd
-        
         logger.info(f"Upload request - FILES: {request.FILES}")
         logger.info(f"Upload request - DATA: {request.data}")
         
@@ -245,6 +279,14 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
             name = file.name.rsplit('.', 1)[0]
         
         description = request.data.get('description', '')
+        
+        backend = request.data.get('ingest_backend') or None
+        if backend and backend not in INGEST_BACKENDS:
+            return Response(
+                {'error': f'ingest_backend no válido: {backend}. Opciones: {", ".join(INGEST_BACKENDS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         temp_dir = tempfile.mkdtemp()
         
         logger.info(f"Processing file: {file.name}, size: {file.size}")
@@ -257,42 +299,22 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
             
             logger.info(f"File saved to: {file_path}")
             
-            gdf = self._read_geodata_file(file_path, file.name, temp_dir)
+            dataset_path, driver = resolve_dataset_path(file_path, file.name, temp_dir)
+            reader = ChunkedGeoReader(
+                dataset_path,
+                chunk_size=getattr(settings, 'GEODATA_READ_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+                driver=driver
+            )
             
-            logger.info(f"Read {len(gdf)} features from file")
+            logger.info(f"File contains {reader.total} features")
             
-            if len(gdf) == 0:
+            if reader.total == 0:
                 raise ValueError('El archivo no contiene features')
             
-            if gdf.crs and gdf.crs.to_epsg() != 4326:
-                logger.info(f"Reprojecting from {gdf.crs} to EPSG:4326")
-                gdf = gdf.to_crs(epsg=4326)
-            elif gdf.crs is None:
-                logger.warning("No CRS found, assuming EPSG:4326")
-                gdf = gdf.set_crs(epsg=4326)
-            
-            geom_types = gdf.geometry.geom_type.unique()
-            if len(geom_types) > 1:
-                geom_type = 'GEOMETRY'
-            else:
-                geom_type = str(geom_types[0]).upper()
-                geom_type_mapping = {
-                    'POINT': 'POINT',
-                    'LINESTRING': 'LINESTRING',
-                    'POLYGON': 'POLYGON',
-                    'MULTIPOINT': 'MULTIPOINT',
-                    'MULTILINESTRING': 'MULTILINESTRING',
-                    'MULTIPOLYGON': 'MULTIPOLYGON',
-                    'GEOMETRYCOLLECTION': 'GEOMETRYCOLLECTION',
-                }
-                geom_type = geom_type_mapping.get(geom_type, 'GEOMETRY')
-            
-            logger.info(f"Geometry type: {geom_type}")
-            
             layer = Layer.objects.create(
                 name=name,
                 description=description,
-                geometry_type=geom_type,
+                geometry_type='GEOMETRY',
                 layer_type='vector',
                 srid=4326,
                 created_by=request.user,
@@ -304,12 +326,22 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
             
             logger.info(f"Created layer: {layer.id}")
             
-            features_created = self._create_features_batch(layer, gdf, request.user)
+            features_created = 0
+            try:
+                for chunk in reader:
+                    features_created += self._create_features_batch(layer, chunk, request.user, backend=backend)
+                    logger.info(f"Chunk {reader.chunks_read}: {reader.features_read} features read, {features_created} created")
+            except Exception:
+                with bulk_operation():
+                    layer.delete()
+                raise
             
             if features_created > 0:
-                layer.feature_count = features_created
-                layer.save(update_fields=['feature_count'])
-                logger.info(f"Created {features_created} features")
+                # feature_count/extent/statistics ya los mantiene el ingestor
+                layer.refresh_from_db(fields=['feature_count', 'extent', 'statistics'])
+                layer.geometry_type = reader.geometry_type
+                layer.save(update_fields=['geometry_type'])
+                logger.info(f"Created {features_created} features ({layer.geometry_type})")
             else:
                 layer.delete()
                 raise ValueError('No se pudieron crear features válidos')
@@ -338,116 +370,135 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
         finally:
             shutil.rmtree(temp_dir, ignore_errors=True)
     
-    def _read_geodata_file(self, file_path, filename, temp_dir):
-        """Lee archivos geoespaciales de diferentes formatos."""
-        import geopandas as gpd
-        
-        filename_lower = filename.lower()
+    @action(detail=False, methods=['post'], url_path='upload-zip', parser_classes=[MultiPartParser, FormParser])
+    def upload_zip(self, request):
+        """
+        Importa todos los datasets de un ZIP, cada uno como una capa.
         
-        if filename_lower.endswith('.zip'):
-            logger.info("Processing ZIP file")
-            with zipfile.ZipFile(file_path) as zf:
-                zf.extractall(temp_dir)
-            
-            shp_files = list(Path(temp_dir).rglob('*.shp'))
-            if shp_files:
-                logger.info(f"Found .shp file: {shp_files[0]}")
-                return gpd.read_file(str(shp_files[0]))
-            
-            geojson_files = list(Path(temp_dir).rglob('*.geojson')) + list(Path(temp_dir).rglob('*.json'))
-            if geojson_files:
-                logger.info(f"Found GeoJSON file: {geojson_files[0]}")
-                return gpd.read_file(str(geojson_files[0]))
-            
-            gpkg_files = list(Path(temp_dir).rglob('*.gpkg'))
-            if gpkg_files:
-                logger.info(f"Found GeoPackage file: {gpkg_files[0]}")
-                return gpd.read_file(str(gpkg_files[0]))
-            
-            kml_files = list(Path(temp_dir).rglob('*.kml'))
-            if kml_files:
-                logger.info(f"Found KML file: {kml_files[0]}")
-                return gpd.read_file(str(kml_files[0]), driver='KML')
-            
-            raise ValueError('No se encontró archivo geoespacial válido en el ZIP')
+        POST /api/v1/geodata/layers/upload-zip/
+        file: ZIP con varios .shp/.geojson/.kml/.gpkg (cada capa de un
+        GeoPackage es un dataset); dataset_name (opcional) agrupa las capas
+        en un Dataset.
         
-        elif filename_lower.endswith(('.geojson', '.json')):
-            logger.info("Processing GeoJSON file")
-            return gpd.read_file(file_path)
+        Los datasets se importan en paralelo en segundo plano (202 + job_id).
+        """
+        file = request.FILES.get('file')
+        if not file or not file.name.lower().endswith('.zip'):
+            return Response(
+                {'error': 'Se requiere un archivo ZIP'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        elif filename_lower.endswith('.kml'):
-            logger.info("Processing KML file")
-            return gpd.read_file(file_path, driver='KML')
+        max_size = getattr(settings, 'GEODATA_UPLOAD_MAX_SIZE', 5 * 1024 * 1024 * 1024)
+        if file.size > max_size:
+            return Response(
+                {'error': f'El archivo excede el tamaño máximo permitido ({max_size // (1024 * 1024)}MB)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        elif filename_lower.endswith('.gpkg'):
-            logger.info("Processing GeoPackage file")
-            return gpd.read_file(file_path)
+        backend = request.data.get('ingest_backend') or None
+        if backend and backend not in INGEST_BACKENDS:
+            return Response(
+                {'error': f'ingest_backend no válido: {backend}. Opciones: {", ".join(INGEST_BACKENDS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        elif filename_lower.endswith('.shp'):
-            logger.info("Processing Shapefile")
-            return gpd.read_file(file_path)
+        directory = Path(settings.GEODATA_UPLOAD_DIR) / 'zip'
+        directory.mkdir(parents=True, exist_ok=True)
+        file_path = directory / f'{uuid.uuid4().hex}_{Path(file.name).name}'
+        with open(file_path, 'wb') as f:
+            for chunk in file.chunks():
+                f.write(chunk)
         
-        else:
-            raise ValueError(f'Formato de archivo no soportado: {filename}')
+        return enqueue_zip_upload(
+            request,
+            file_path,
+            file.name,
+            dataset_name=request.data.get('dataset_name', '').strip(),
+            options={
+                'description': request.data.get('description', ''),
+                'is_public': str(request.data.get('is_public', '')).lower() in ('1', 'true'),
+            },
+            backend=backend
+        )
     
-    def _create_features_batch(self, layer, gdf, user, batch_size=1000):
-        """Crea features en lotes para mejor rendimiento."""
-        features = []
-        created_count = 0
-        skipped_count = 0
-        
-        for idx, row in gdf.iterrows():
-            if row.geometry is None or row.geometry.is_empty:
-                skipped_count += 1
-                continue
-            
-            props = {}
-            for col in gdf.columns:
-                if col != 'geometry':
-                    val = row[col]
-                    if hasattr(val, 'item'):
-                        val = val.item()
-                    if val != val:
-                        val = None
-                    if val is not None and not isinstance(val, (str, int, float, bool, list, dict)):
-                        val = str(val)
-                    props[col] = val
-            
-            try:
-                geom = GEOSGeometry(row.geometry.wkt, srid=4326)
-                features.append(Feature(
-                    layer=layer, 
-                    geometry=geom,
-                    properties=props,
-                    created_by=user
-                ))
-                
-                if len(features) >= batch_size:
-                    Feature.objects.bulk_create(features, batch_size=batch_size)
-                    created_count += len(features)
-                    logger.info(f"Batch inserted: {created_count} features")
-                    features = []
-                    
-            except Exception as e:
-                logger.warning(f"Failed to create feature {idx}: {e}")
-                skipped_count += 1
-                continue
+    def _create_features_batch(self, layer, gdf, user, batch_size=None, backend=None):
+        """
+        Crea features en lotes usando el motor de ingesta columnar.
         
-        if features:
-            Feature.objects.bulk_create(features, batch_size=batch_size)
-            created_count += len(features)
+        backend: 'copy' (COPY FROM STDIN) u 'orm' (bulk_create); None usa
+        GEODATA_INGEST_BACKEND. En bases de datos que no son PostgreSQL
+        siempre se usa bulk_create.
+        """
+        ingestor = FeatureIngestor(layer, user, batch_size=batch_size, backend=backend)
+        result = ingestor.ingest(gdf)
         
-        if skipped_count > 0:
-            logger.warning(f"Skipped {skipped_count} invalid features")
+        if result['failed'] > 0:
+            logger.warning(f"Skipped {result['failed']} invalid features")
         
-        return created_count
+        return result['created']
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='stream',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Envía el FeatureCollection en streaming (memoria constante)'
+            ),
+            OpenApiParameter(
+                name='zoom',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Nivel de zoom del mapa; deriva tolerancia y precisión (0-22)'
+            ),
+            OpenApiParameter(
+                name='tolerance',
+                type=OpenApiTypes.FLOAT,
+                location=OpenApiParameter.QUERY,
+                description='Tolerancia de simplificación en grados (ST_SimplifyPreserveTopology)'
+            ),
+            OpenApiParameter(
+                name='precision',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Decimales de las coordenadas (0-15)'
+            ),
+        ]
+    )
     @action(detail=True, methods=['get'])
     def geojson(self, request, pk=None):
         """Retorna la capa como GeoJSON para visualización en mapa."""
         layer = self.get_object()
         features = layer.features.filter(is_active=True)
         
+        # Mismos filtros que FeatureViewSet (incluidos bbox, intersects, dwithin, nearest)
+        filterset = FeatureFilter(request.query_params, queryset=features, request=request)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        # La caché guarda la capa completa: un resultado filtrado no se cachea
+        filtered = has_active_filters(filterset)
+        features = filterset.qs
+        
+        try:
+            simplification = self._simplification_params(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if simplification:
+            return self._simplified_geojson(
+                layer, features, *simplification, use_cache=not filtered
+            )
+        
+        if request.query_params.get('stream', 'false').lower() in ('true', '1'):
+            chunk_size = getattr(settings, 'GEODATA_STREAM_CHUNK_SIZE', 2000)
+            response = StreamingHttpResponse(
+                iter_feature_collection(layer, features, chunk_size=chunk_size),
+                content_type=GEOJSON_CONTENT_TYPE
+            )
+            response['Content-Disposition'] = f'inline; filename="layer_{layer.id}.geojson"'
+            return response
+        
         geojson = {
             "type": "FeatureCollection",
             "name": layer.name,
@@ -474,16 +525,141 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
         
         return Response(geojson)
     
+    def _simplification_params(self, request):
+        """
+        Lee zoom/tolerance/precision de la query.
+        
+        Returns:
+            Tupla (bucket de caché, tolerancia, precisión) o None si no se pidió
+            simplificación
+        
+        Raises:
+            ValueError: Si algún parámetro no es válido
+        """
+        params = request.query_params
+        zoom = params.get('zoom')
+        tolerance = params.get('tolerance')
+        precision = params.get('precision')
+        
+        if zoom is None and tolerance is None and precision is None:
+            return None
+        
+        try:
+            zoom = int(zoom) if zoom is not None else None
+            tolerance = float(tolerance) if tolerance is not None else None
+            precision = int(precision) if precision is not None else None
+        except (TypeError, ValueError):
+            raise ValueError('zoom y precision deben ser enteros; tolerance, numérico')
+        
+        if zoom is not None and not 0 <= zoom <= MAX_ZOOM:
+            raise ValueError(f'zoom debe estar entre 0 y {MAX_ZOOM}')
+        if tolerance is not None and tolerance < 0:
+            raise ValueError('tolerance no puede ser negativa')
+        if precision is not None and not 0 <= precision <= 15:
+            raise ValueError('precision debe estar entre 0 y 15')
+        
+        explicit_tolerance = tolerance is not None
+        if tolerance is None and zoom is not None:
+            tolerance = zoom_to_tolerance(zoom)
+        if precision is None and zoom is not None:
+            precision = zoom_to_precision(zoom)
+        
+        # Una tolerancia explícita cambia la salida aunque el zoom coincida;
+        # solo precision (sin zoom ni tolerance) no simplifica geometrías
+        if zoom is None and tolerance is None:
+            bucket = 'p-only'
+        elif zoom is None:
+            bucket = f't{tolerance:g}'
+        elif explicit_tolerance:
+            bucket = f'{zoom}-t{tolerance:g}'
+        else:
+            bucket = f'{zoom}'
+        return bucket, tolerance, precision
+    
+    def _simplified_geojson(self, layer, features, bucket, tolerance, precision, use_cache=True):
+        """GeoJSON simplificado en la base de datos, en caché por capa y zoom."""
+        cache_key = simplified_geojson_key(layer, bucket, precision)
+        content = cache.get(cache_key) if use_cache else None
+        
+        if content is None:
+            content = ''.join(iter_feature_collection(
+                layer,
+                features,
+                chunk_size=getattr(settings, 'GEODATA_STREAM_CHUNK_SIZE', 2000),
+                precision=precision,
+                tolerance=tolerance or None
+            )).encode('utf-8')
+            if use_cache and len(content) <= getattr(settings, 'GEODATA_GEOJSON_CACHE_MAX_BYTES', 1024 * 1024):
+                cache.set(cache_key, content, timeout=getattr(settings, 'GEODATA_GEOJSON_CACHE_TIMEOUT', 3600))
+            logger.info(
+                f"Simplified GeoJSON for layer {layer.id} (bucket {bucket}, precision {precision}): "
+                f"{len(content)} bytes"
+            )
+        
+        return HttpResponse(content, content_type=GEOJSON_CONTENT_TYPE)
+    
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='properties',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Claves de properties a incluir como atributos, separadas por coma'
+            )
+        ],
+        description='Tesela vectorial Mapbox (MVT) de la capa generada con ST_AsMVT'
+    )
+    def tiles(self, request, pk=None, z=None, x=None, y=None):
+        """
+        Retorna una tesela vectorial de la capa.
+        
+        GET /api/v1/geodata/layers/{id}/tiles/{z}/{x}/{y}.mvt?properties=nombre,codigo
+        """
+        layer = self.get_object()
+        
+        if not tiles_supported():
+            return Response(
+                {'error': 'Las teselas vectoriales requieren PostGIS'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        
+        keys = [k.strip() for k in request.query_params.get('properties', '').split(',') if k.strip()]
+        z, x, y = int(z), int(x), int(y)
+        
+        try:
+            validate_tile(z, x, y)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # La versión de contenido de la capa determina el ETag: si el cliente
+        # ya tiene esta tesela no se consulta ni la caché ni PostGIS
+        etag = tile_etag(layer, z, x, y, keys)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            tile = cached_tile(layer, z, x, y, properties=keys)
+            if tile:
+                response = HttpResponse(tile, content_type=MVT_CONTENT_TYPE)
+            else:
+                response = HttpResponse(status=status.HTTP_204_NO_CONTENT)
+        
+        response['ETag'] = etag
+        response['Cache-Control'] = f"private, max-age={getattr(settings, 'GEODATA_TILE_MAX_AGE', 0)}"
+        return response
+    
     @action(detail=True, methods=['get'])
     def stats(self, request, pk=None):
         """Retorna estadísticas de la capa."""
         layer = self.get_object()
-        features = layer.features.filter(is_active=True)
         
+        # Valores mantenidos incrementalmente (sin COUNT sobre features)
         return Response({
             'layer_id': layer.id,
             'name': layer.name,
-            'feature_count': features.count(),
+            'feature_count': layer.feature_count,
+            'bounds': layer.get_bounds(),
+            'attributes': layer.statistics.get('attributes', {}),
+            'statistics_stale': layer.statistics.get('stale', False),
             'geometry_type': layer.geometry_type,
             'srid': layer.srid,
             'is_public': layer.is_public,
@@ -493,6 +669,41 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
             'file_size': layer.file_size,
         })
 
+    def _enqueue_load(self, request, layer, task, *args, message='', extra=None, credentials=None, **kwargs):
+        """
+        Encola una carga en segundo plano y responde 202 con el job id.
+        
+        El job id es un SyncLog creado aquí, antes de encolar la tarea, para
+        que el estado sea consultable desde el primer momento. Las
+        credenciales se guardan en ese SyncLog y no viajan como argumentos
+        de la tarea (quedarían en el broker, el result backend y los logs).
+        """
+        sync_log = SyncLog.objects.create(
+            layer=layer,
+            requested_by=request.user,
+            status=SyncLog.Status.PROCESSING,
+            details={'progress': 0, 'queued_at': datetime.now().isoformat()},
+            credentials=credentials or {}
+        )
+        result = task.delay(layer.id, *args, sync_log_id=sync_log.id, **kwargs)
+        
+        return Response({
+            'message': message,
+            'job_id': sync_log.id,
+            'task_id': result.id,
+            'status_url': request.build_absolute_uri(
+                reverse('synclog-job-status', kwargs={'pk': sync_log.id})
+            ),
+            'layer': {
+                'id': layer.id,
+                'name': layer.name,
+                'description': layer.description,
+                'geometry_type': layer.geometry_type,
+                'feature_count': layer.feature_count,
+                **(extra or {}),
+            }
+        }, status=status.HTTP_202_ACCEPTED)
+    
     @action(detail=False, methods=['post'], url_path='from-url')
     def from_url(self, request):
         """
@@ -507,108 +718,53 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
             "is_public": false,
             "tags": ["tag1", "tag2"]
         }
+        
+        Responde 202 con job_id: el archivo se descarga una sola vez, en
+        streaming, y se inserta en segundo plano. El progreso se consulta en
+        GET /api/v1/geodata/synclogs/{job_id}/status/.
         """
         serializer = URLLayerSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         data = serializer.validated_data
+        service_type = data['service_type']
         
-        try:
-            import requests
-            import geopandas as gpd
-            
-            # Descargar datos desde URL
-            logger.info(f"Fetching data from URL: {data['url']}")
-            response = requests.get(data['url'], timeout=30)
-            response.raise_for_status()
-            
-            # Procesar según el tipo de servicio
-            temp_dir = tempfile.mkdtemp()
-            try:
-                service_type = data['service_type']
-                
-                if service_type == 'geojson':
-                    # Cargar GeoJSON directamente
-                    gdf = gpd.read_file(data['url'])
-                    
-                elif service_type == 'kml':
-                    # Guardar y cargar KML
-                    temp_file = os.path.join(temp_dir, 'data.kml')
-                    with open(temp_file, 'wb') as f:
-                        f.write(response.content)
-                    gdf = gpd.read_file(temp_file, driver='KML')
-                    
-                elif service_type in ['wms', 'wfs']:
-                    return Response({
-                        'error': f'Tipo de servicio {service_type} aún no soportado. Use geojson o kml.'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                else:
-                    return Response({
-                        'error': f'Tipo de servicio no reconocido: {service_type}'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                # Reproyectar a EPSG:4326 si es necesario
-                if gdf.crs and gdf.crs.to_epsg() != 4326:
-                    logger.info(f"Reprojecting from {gdf.crs} to EPSG:4326")
-                    gdf = gdf.to_crs(epsg=4326)
-                elif gdf.crs is None:
-                    gdf = gdf.set_crs(epsg=4326)
-                
-                # Detectar tipo de geometría
-                geom_types = gdf.geometry.geom_type.unique()
-                if len(geom_types) > 1:
-                    geom_type = 'GEOMETRY'
-                else:
-                    geom_type = str(geom_types[0]).upper()
-                
-                # Crear capa
-                layer = Layer.objects.create(
-                    name=data['name'],
-                    description=data.get('description', ''),
-                    geometry_type=geom_type,
-                    layer_type='vector',
-                    srid=4326,
-                    created_by=request.user,
-                    is_public=data.get('is_public', False),
-                    tags=data.get('tags', []),
-                    feature_count=0
-                )
-                
-                # Crear features
-                features_created = self._create_features_batch(layer, gdf, request.user)
-                
-                if features_created > 0:
-                    layer.feature_count = features_created
-                    layer.save(update_fields=['feature_count'])
-                else:
-                    layer.delete()
-                    raise ValueError('No se pudieron crear features válidos')
-                
-                return Response({
-                    'message': f'Capa "{layer.name}" creada desde URL exitosamente',
-                    'layer': {
-                        'id': layer.id,
-                        'name': layer.name,
-                        'description': layer.description,
-                        'geometry_type': layer.geometry_type,
-                        'feature_count': layer.feature_count,
-                        'source_url': data['url'],
-                    }
-                }, status=status.HTTP_201_CREATED)
-                
-            finally:
-                shutil.rmtree(temp_dir, ignore_errors=True)
-                
-        except requests.RequestException as e:
-            logger.error(f"Error fetching URL: {str(e)}")
+        if service_type in ['wms', 'wfs']:
             return Response({
-                'error': f'Error al acceder a la URL: {str(e)}'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            logger.error(f"Error creating layer from URL: {str(e)}", exc_info=True)
-            return Response({
-                'error': f'Error al crear capa: {str(e)}'
+                'error': f'Tipo de servicio {service_type} aún no soportado. Use geojson o kml.'
             }, status=status.HTTP_400_BAD_REQUEST)
+        
+        from .tasks import load_url_layer
+        
+        # La descarga y la lectura van en segundo plano (tarea load_url_layer)
+        layer = Layer.objects.create(
+            name=data['name'],
+            description=data.get('description', ''),
+            geometry_type='GEOMETRY',
+            layer_type='vector',
+            srid=4326,
+            created_by=request.user,
+            is_public=data.get('is_public', False),
+            tags=data.get('tags', []),
+            metadata={
+                'source': 'url',
+                'source_url': data['url'],
+                'service_type': service_type,
+            },
+            feature_count=0
+        )
+        
+        return self._enqueue_load(
+            request,
+            layer,
+            load_url_layer,
+            data['url'],
+            service_type,
+            request.user.id,
+            backend=data.get('ingest_backend'),
+            message=f'Carga de "{layer.name}" desde URL iniciada',
+            extra={'source_url': data['url']}
+        )
 
     @action(detail=False, methods=['post'], url_path='from-arcgis')
     def from_arcgis(self, request):
@@ -626,6 +782,9 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
             "is_public": false,
             "tags": ["arcgis", "external"]
         }
+        
+        Responde 202 con task_id: los features se descargan en páginas
+        concurrentes en segundo plano (tarea load_arcgis_layer).
         """
         serializer = ArcGISLayerSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -634,67 +793,28 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
         
         try:
             import requests
-            import geopandas as gpd
-            from io import BytesIO
+            from .services import ArcGISLoader
+            from .tasks import load_arcgis_layer
             
-            service_url = data['service_url']
+            service_url = data['service_url'].rstrip('/')
             layer_id = data.get('layer_id', 0)
             
-            # Construir URL de query
-            if not service_url.endswith('/'):
-                service_url += '/'
+            # .../FeatureServer -> .../FeatureServer/<layer_id>
+            if not service_url.rsplit('/', 1)[-1].isdigit():
+                service_url = f"{service_url}/{layer_id}"
             
-            # URL para obtener metadata
-            metadata_url = f"{service_url}?f=json"
+            username = data.get('username') or None
+            password = data.get('password') or None
             
-            # Preparar autenticación si es necesaria
-            auth = None
-            if data.get('username') and data.get('password'):
-                auth = (data['username'], data['password'])
+            # Metadata síncrona: valida el servicio antes de crear la capa
+            loader = ArcGISLoader(service_url, username=username, password=password)
+            logger.info(f"Fetching ArcGIS metadata from: {service_url}")
+            metadata = loader.fetch_metadata()
             
-            logger.info(f"Fetching ArcGIS metadata from: {metadata_url}")
-            response = requests.get(metadata_url, auth=auth, timeout=30)
-            response.raise_for_status()
-            metadata = response.json()
-            
-            # URL para obtener features (GeoJSON)
-            query_url = f"{service_url}/query"
-            params = {
-                'where': '1=1',
-                'outFields': '*',
-                'f': 'geojson',
-                'returnGeometry': 'true'
-            }
-            
-            logger.info(f"Fetching features from: {query_url}")
-            response = requests.get(query_url, params=params, auth=auth, timeout=60)
-            response.raise_for_status()
-            
-            # Cargar GeoJSON en GeoDataFrame
-            geojson_data = response.json()
-            gdf = gpd.GeoDataFrame.from_features(geojson_data['features'])
-            
-            if len(gdf) == 0:
-                raise ValueError('El servicio no contiene features')
-            
-            # Asegurar CRS EPSG:4326
-            if gdf.crs is None:
-                gdf = gdf.set_crs(epsg=4326)
-            elif gdf.crs.to_epsg() != 4326:
-                gdf = gdf.to_crs(epsg=4326)
-            
-            # Detectar tipo de geometría
-            geom_types = gdf.geometry.geom_type.unique()
-            if len(geom_types) > 1:
-                geom_type = 'GEOMETRY'
-            else:
-                geom_type = str(geom_types[0]).upper()
-            
-            # Crear capa
             layer = Layer.objects.create(
                 name=data['name'],
                 description=data.get('description', ''),
-                geometry_type=geom_type,
+                geometry_type=loader.geometry_type,
                 layer_type='vector',
                 srid=4326,
                 created_by=request.user,
@@ -704,32 +824,25 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
                     'source': 'arcgis',
                     'service_url': service_url,
                     'layer_id': layer_id,
+                    'max_record_count': loader.max_record_count,
+                    'supports_pagination': loader.supports_pagination,
                     'service_metadata': metadata
                 },
                 feature_count=0
             )
             
-            # Crear features
-            features_created = self._create_features_batch(layer, gdf, request.user)
-            
-            if features_created > 0:
-                layer.feature_count = features_created
-                layer.save(update_fields=['feature_count'])
-            else:
-                layer.delete()
-                raise ValueError('No se pudieron crear features válidos')
-            
-            return Response({
-                'message': f'Capa "{layer.name}" creada desde ArcGIS exitosamente',
-                'layer': {
-                    'id': layer.id,
-                    'name': layer.name,
-                    'description': layer.description,
-                    'geometry_type': layer.geometry_type,
-                    'feature_count': layer.feature_count,
-                    'service_url': service_url,
-                }
-            }, status=status.HTTP_201_CREATED)
+            # Descarga paginada y concurrente en segundo plano
+            return self._enqueue_load(
+                request,
+                layer,
+                load_arcgis_layer,
+                service_url,
+                request.user.id,
+                credentials={'username': username, 'password': password} if username else None,
+                backend=data.get('ingest_backend'),
+                message=f'Carga de "{layer.name}" desde ArcGIS iniciada',
+                extra={'service_url': service_url}
+            )
             
         except requests.RequestException as e:
             logger.error(f"Error fetching ArcGIS service: {str(e)}")
@@ -761,9 +874,14 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
             "username": "user",
             "password": "pass",
             "srid": 4326,
+            "columns": ["nombre", "codigo"],
+            "bbox": [-79.0, -4.2, -66.8, 12.5],
             "is_public": false,
             "tags": ["database", "external"]
         }
+        
+        Responde 202 con task_id: la tabla se lee con un cursor del lado del
+        servidor en segundo plano (tarea load_database_layer).
         """
         serializer = DatabaseLayerSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -771,72 +889,45 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
         data = serializer.validated_data
         
         try:
-            import geopandas as gpd
-            from sqlalchemy import create_engine
+            from .services import DatabaseLoader
+            from .tasks import load_database_layer
             
-            # Construir connection string según el tipo de DB
             db_type = data['db_type']
             host = data['host']
             port = data['port']
             database = data['database']
-            username = data['username']
-            password = data['password']
             schema = data.get('schema', 'public')
             table = data['table']
             geom_col = data.get('geometry_column', 'geom')
             srid = data.get('srid', 4326)
             
-            if db_type == 'postgresql':
-                conn_string = f"postgresql://{username}:{password}@{host}:{port}/{database}"
-            elif db_type == 'mysql':
-                conn_string = f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
-            elif db_type == 'oracle':
-                conn_string = f"oracle+cx_oracle://{username}:{password}@{host}:{port}/{database}"
-            elif db_type == 'sqlserver':
-                conn_string = f"mssql+pyodbc://{username}:{password}@{host}:{port}/{database}"
-            else:
-                return Response({
-                    'error': f'Tipo de base de datos no soportado: {db_type}'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            connection_params = {
+                'db_type': db_type,
+                'host': host,
+                'port': port,
+                'database': database,
+                'username': data['username'],
+                'password': data['password'],
+            }
             
             logger.info(f"Connecting to {db_type} database: {host}:{port}/{database}")
             
-            # Crear engine de SQLAlchemy
-            engine = create_engine(conn_string)
-            
-            # Leer datos geoespaciales
-            query = f'SELECT * FROM {schema}.{table}'
-            logger.info(f"Executing query: {query}")
-            
-            gdf = gpd.read_postgis(
-                query,
-                engine,
-                geom_col=geom_col,
-                crs=f'EPSG:{srid}'
+            # Validación síncrona (tabla y columnas); la lectura va en segundo plano
+            loader = DatabaseLoader(
+                connection_params,
+                table=table,
+                schema=schema,
+                geometry_column=geom_col,
+                srid=srid,
+                columns=data.get('columns'),
+                bbox=data.get('bbox')
             )
+            columns = loader.resolve_columns()
             
-            if len(gdf) == 0:
-                raise ValueError('La tabla no contiene registros')
-            
-            # Reproyectar a EPSG:4326 si es necesario
-            if gdf.crs and gdf.crs.to_epsg() != 4326:
-                logger.info(f"Reprojecting from EPSG:{srid} to EPSG:4326")
-                gdf = gdf.to_crs(epsg=4326)
-            elif gdf.crs is None:
-                gdf = gdf.set_crs(epsg=4326)
-            
-            # Detectar tipo de geometría
-            geom_types = gdf.geometry.geom_type.unique()
-            if len(geom_types) > 1:
-                geom_type = 'GEOMETRY'
-            else:
-                geom_type = str(geom_types[0]).upper()
-            
-            # Crear capa
             layer = Layer.objects.create(
                 name=data['name'],
                 description=data.get('description', ''),
-                geometry_type=geom_type,
+                geometry_type='GEOMETRY',
                 layer_type='vector',
                 srid=4326,
                 created_by=request.user,
@@ -850,35 +941,30 @@ class LayerViewSet(ExportMixin, viewsets.ModelViewSet):
                     'schema': schema,
                     'table': table,
                     'geometry_column': geom_col,
+                    'columns': columns,
+                    'bbox': data.get('bbox'),
                     'original_srid': srid
                 },
                 feature_count=0
             )
             
-            # Crear features
-            features_created = self._create_features_batch(layer, gdf, request.user)
-            
-            # Cerrar conexión
-            engine.dispose()
-            
-            if features_created > 0:
-                layer.feature_count = features_created
-                layer.save(update_fields=['feature_count'])
-            else:
-                layer.delete()
-                raise ValueError('No se pudieron crear features válidos')
-            
-            return Response({
-                'message': f'Capa "{layer.name}" creada desde base de datos exitosamente',
-                'layer': {
-                    'id': layer.id,
-                    'name': layer.name,
-                    'description': layer.description,
-                    'geometry_type': layer.geometry_type,
-                    'feature_count': layer.feature_count,
-                    'source': f'{db_type}://{host}:{port}/{database}/{schema}.{table}',
-                }
-            }, status=status.HTTP_201_CREATED)
+            return self._enqueue_load(
+                request,
+                layer,
+                load_database_layer,
+                {key: value for key, value in connection_params.items() if key not in ('username', 'password')},
+                table,
+                request.user.id,
+                schema=schema,
+                geometry_column=geom_col,
+                srid=srid,
+                columns=data.get('columns'),
+                bbox=data.get('bbox'),
+                backend=data.get('ingest_backend'),
+                credentials={'username': data['username'], 'password': data['password']},
+                message=f'Carga de "{layer.name}" desde base de datos iniciada',
+                extra={'source': f'{db_type}://{host}:{port}/{database}/{schema}.{table}'}
+            )
             
         except Exception as e:
             logger.error(f"Error creating layer from database: {str(e)}", exc_info=True)
@@ -894,6 +980,7 @@ class FeatureViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_class = FeatureFilter
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         queryset = Feature.objects.all()
@@ -902,6 +989,13 @@ class FeatureViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(layer_id=layer_id)
         return queryset.filter(is_active=True)
     
+    def paginate_queryset(self, queryset):
+        # ?nearest= devuelve como mucho k features ordenados por distancia;
+        # la paginación keyset los reordenaría por fecha
+        if self.request.query_params.get('nearest'):
+            return None
+        return super().paginate_queryset(queryset)
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return FeatureCreateSerializer
@@ -929,15 +1023,425 @@ class SyncLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = SyncLog.objects.all()
     serializer_class = SyncLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering_field = 'started_at'
     
     def get_queryset(self):
         queryset = SyncLog.objects.all()
         data_source_id = self.request.query_params.get('data_source')
         layer_id = self.request.query_params.get('layer')
         
+        user = self.request.user
+        if not user.is_staff:
+            # Misma regla que LayerViewSet y DatasetViewSet: los jobs de capas
+            # o datasets privados solo los ve su creador. Los jobs sin capa ni
+            # fuente (p. ej. el padre de un ZIP) solo los ve quien los inició
+            visible_datasets = Dataset.objects.filter(Q(is_public=True) | Q(created_by=user)).values('id')
+            queryset = queryset.annotate(
+                exported_dataset_id=Cast(KT('details__object__id'), IntegerField())
+            ).filter(
+                Q(layer__is_public=True)
+                | Q(layer__created_by=user)
+                | Q(layer__isnull=True, requested_by=user)
+                | Q(layer__isnull=True, data_source__isnull=False)
+                | Q(
+                    layer__isnull=True,
+                    details__object__type='dataset',
+                    exported_dataset_id__in=Subquery(visible_datasets)
+                )
+            )
+        
         if data_source_id:
             queryset = queryset.filter(data_source_id=data_source_id)
         if layer_id:
             queryset = queryset.filter(layer_id=layer_id)
         
-        return queryset.order_by('-started_at')
\ No newline at end of file
+        return queryset.order_by('-started_at')
+    
+    @action(detail=True, methods=['get'], url_path='status', url_name='job-status')
+    def job_status(self, request, pk=None):
+        """
+        Estado de una carga o exportación en segundo plano (job id = SyncLog).
+        
+        GET /api/v1/geodata/synclogs/{id}/status/
+        """
+        sync_log = self.get_object()
+        details = sync_log.details or {}
+        
+        data = {
+            'job_id': sync_log.id,
+            'status': sync_log.status,
+            'progress': details.get('progress'),
+            'total': details.get('total'),
+            'processed': sync_log.records_processed,
+            'added': sync_log.records_added,
+            'failed': sync_log.records_failed,
+            'layer': sync_log.layer_id,
+            'task_id': details.get('task_id'),
+            'error': sync_log.error_message or None,
+            'started_at': sync_log.started_at,
+            'completed_at': sync_log.completed_at,
+        }
+        
+        members = details.get('members')
+        if members:
+            data.update(self._members_progress(sync_log, members))
+        
+        if details.get('file'):
+            data['file'] = {
+                **details['file'],
+                'download_url': request.build_absolute_uri(
+                    reverse('synclog-job-download', kwargs={'pk': sync_log.id})
+                ),
+            }
+        
+        return Response(data)
+    
+    @action(detail=True, methods=['get'], url_path='download', url_name='job-download')
+    def download(self, request, pk=None):
+        """
+        Descarga el archivo generado por un job de exportación.
+        
+        GET /api/v1/geodata/synclogs/{id}/download/
+        """
+        from apps.core.models import GeneratedFile
+        
+        sync_log = self.get_object()
+        file_data = (sync_log.details or {}).get('file')
+        
+        if sync_log.status == SyncLog.Status.PROCESSING:
+            return Response({
+                'error': 'La exportación aún está en proceso',
+                'job_id': sync_log.id,
+            }, status=status.HTTP_409_CONFLICT)
+        # Un dataset con capas fallidas (PARTIAL) también deja su archivo
+        if sync_log.status not in (SyncLog.Status.SUCCESS, SyncLog.Status.PARTIAL) or not file_data:
+            return Response({
+                'error': 'El job no generó ningún archivo'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        file_record = GeneratedFile.objects.filter(id=file_data['file_id']).first()
+        if file_record is None or not file_record.can_be_downloaded():
+            return Response({
+                'error': 'El archivo expiró o ya no está disponible'
+            }, status=status.HTTP_410_GONE)
+        
+        return export_file_response(file_record)
+    
+    def _members_progress(self, sync_log, members):
+        """Progreso agregado de un job con varios miembros (ZIP multi-dataset o exportación de un dataset)."""
+        logs = SyncLog.objects.in_bulk([member['job_id'] for member in members])
+        datasets = []
+        total = processed = added = failed = 0
+        
+        for member in members:
+            log = logs.get(member['job_id'])
+            if log is None:
+                continue
+            member_total = (log.details or {}).get('total')
+            datasets.append({
+                'job_id': log.id,
+                'name': member['name'],
+                'layer': log.layer_id,
+                'status': log.status,
+                'progress': (log.details or {}).get('progress'),
+                'processed': log.records_processed,
+                'error': log.error_message or None,
+            })
+            # Un dataset terminado cuenta completo aunque su total fuera desconocido
+            done = log.status != SyncLog.Status.PROCESSING
+            total += member_total or (log.records_processed if done else 0)
+            processed += log.records_processed
+            added += log.records_added
+            failed += log.records_failed
+        
+        finished = sum(1 for dataset in datasets if dataset['status'] != SyncLog.Status.PROCESSING)
+        result = {
+            'datasets': datasets,
+            'datasets_total': len(members),
+            'datasets_finished': finished,
+            'total': total or None,
+            'processed': processed,
+            'added': added,
+            'failed': failed,
+        }
+        if sync_log.status == SyncLog.Status.PROCESSING and total:
+            result['progress'] = min(int(processed / total * 100), 99)
+        return result
+
+
+def export_file_response(file_record):
+    """Entrega un archivo exportado (GeneratedFile) como descarga."""
+    file_record.mark_downloaded()
+    return FileResponse(
+        open(file_record.file_path, 'rb'),
+        as_attachment=True,
+        filename=file_record.filename,
+        content_type=file_record.metadata.get('content_type') or 'application/octet-stream'
+    )
+
+
+def enqueue_zip_upload(request, file_path, filename, dataset_name='', options=None, backend=None):
+    """
+    Encola la importación de un ZIP con varios datasets (una capa por dataset).
+    
+    Crea el SyncLog del archivo (job id) y, si se indica dataset_name, el
+    Dataset que agrupa las capas. Responde 202; el progreso agregado de
+    todos los datasets se consulta en GET /synclogs/{job_id}/status/.
+    Un dataset existente de otro usuario (salvo staff) se rechaza con 403
+    y se elimina el archivo subido.
+    """
+    from .tasks import process_zip_upload
+    
+    dataset = None
+    if dataset_name:
+        dataset, _created = Dataset.objects.get_or_create(
+            name=dataset_name,
+            defaults={'created_by': request.user}
+        )
+        if dataset.created_by_id != request.user.id and not request.user.is_staff:
+            Path(file_path).unlink(missing_ok=True)
+            return Response(
+                {'error': f'El dataset "{dataset_name}" pertenece a otro usuario'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+    
+    sync_log = SyncLog.objects.create(
+        requested_by=request.user,
+        status=SyncLog.Status.PROCESSING,
+        details={'progress': 0, 'queued_at': datetime.now().isoformat(), 'filename': filename}
+    )
+    result = process_zip_upload.delay(
+        str(file_path),
+        filename,
+        request.user.id,
+        sync_log_id=sync_log.id,
+        dataset_id=dataset.id if dataset else None,
+        options=options or {},
+        backend=backend
+    )
+    
+    return Response({
+        'message': f'Importación de "{filename}" iniciada (un dataset por capa)',
+        'job_id': sync_log.id,
+        'task_id': result.id,
+        'status_url': request.build_absolute_uri(
+            reverse('synclog-job-status', kwargs={'pk': sync_log.id})
+        ),
+        'dataset': {'id': dataset.id, 'name': dataset.name} if dataset else None,
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+class RawChunkParser(BaseParser):
+    """Entrega el cuerpo de la petición como stream, sin leerlo en memoria."""
+    media_type = 'application/octet-stream'
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.ListModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Subida reanudable de archivos de capa por fragmentos.
+    
+    1. POST /api/v1/geodata/uploads/ {filename, total_size, checksum?, name?, ...}
+    2. PUT /api/v1/geodata/uploads/{id}/chunks/{index}/ (application/octet-stream,
+       cabecera X-Chunk-SHA256 opcional), en cualquier orden y reintentable
+    3. GET /api/v1/geodata/uploads/{id}/ -> missing_chunks para reanudar
+    4. POST /api/v1/geodata/uploads/{id}/complete/ -> ensambla y encola
+       process_layer_upload (202)
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, FormParser, MultiPartParser]
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(created_by=self.request.user)
+    
+    def _session_data(self, session):
+        data = UploadSessionSerializer(session).data
+        data['received_chunks'] = uploads.received_chunks(session)
+        data['missing_chunks'] = uploads.missing_chunks(session)
+        return data
+    
+    def create(self, request, *args, **kwargs):
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        ttl = getattr(settings, 'GEODATA_UPLOAD_SESSION_TTL_HOURS', 48)
+        session = UploadSession.objects.create(
+            created_by=request.user,
+            filename=data['filename'],
+            total_size=data['total_size'],
+            chunk_size=data.get('chunk_size') or getattr(settings, 'GEODATA_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024),
+            checksum=data.get('checksum', ''),
+            options={
+                'name': data.get('name', ''),
+                'description': data.get('description', ''),
+                'is_public': data.get('is_public', False),
+                'tags': data.get('tags', []),
+                'ingest_backend': data.get('ingest_backend'),
+                'split_datasets': data.get('split_datasets', False),
+                'dataset_name': data.get('dataset_name', ''),
+            },
+            expires_at=timezone.now() + timedelta(hours=ttl)
+        )
+        logger.info(f"Upload session {session.id}: {session.filename} ({session.total_size} bytes, {session.total_chunks} chunks)")
+        
+        return Response(self._session_data(session), status=status.HTTP_201_CREATED)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self._session_data(self.get_object()))
+    
+    def _claim(self, session, from_status, to_status):
+        """
+        Cambia el estado de la sesión solo si sigue en from_status (UPDATE
+        condicional): de dos peticiones concurrentes, solo una lo consigue.
+        """
+        claimed = UploadSession.objects.filter(pk=session.pk, status=from_status).update(
+            status=to_status,
+            updated_at=timezone.now()
+        )
+        if claimed:
+            session.status = to_status
+        return bool(claimed)
+    
+    def _conflict(self, session):
+        session.refresh_from_db(fields=['status'])
+        return Response({'error': f'La sesión está en estado {session.status}'}, status=status.HTTP_409_CONFLICT)
+    
+    def destroy(self, request, *args, **kwargs):
+        session = self.get_object()
+        if self._claim(session, UploadSession.Status.PENDING, UploadSession.Status.ABORTED):
+            uploads.discard(session)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        
+        session.refresh_from_db(fields=['status'])
+        if session.status == UploadSession.Status.ASSEMBLING:
+            # complete() está leyendo los fragmentos
+            return self._conflict(session)
+        uploads.discard(session)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)', parser_classes=[RawChunkParser])
+    def chunk(self, request, pk=None, index=None):
+        """
+        Recibe un fragmento. Reenviar un fragmento ya recibido lo reemplaza.
+        
+        PUT /api/v1/geodata/uploads/{id}/chunks/{index}/
+        """
+        session = self.get_object()
+        if session.status != UploadSession.Status.PENDING:
+            return self._conflict(session)
+        if session.expires_at < timezone.now():
+            return Response({'error': 'La sesión expiró'}, status=status.HTTP_410_GONE)
+        
+        try:
+            digest = uploads.write_chunk(
+                session,
+                int(index),
+                request.data,
+                checksum=request.headers.get('X-Chunk-SHA256')
+            )
+        except uploads.ChunkError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # complete() pudo reclamar la sesión mientras se escribía: el
+        # fragmento no cuenta y el cliente debe saberlo
+        if not UploadSession.objects.filter(pk=session.pk, status=UploadSession.Status.PENDING).exists():
+            session.refresh_from_db(fields=['status'])
+            if session.status != UploadSession.Status.ASSEMBLING:
+                uploads.discard(session)
+            return self._conflict(session)
+        
+        return Response({
+            'index': int(index),
+            'sha256': digest,
+            'missing_chunks': uploads.missing_chunks(session),
+        })
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """
+        Ensambla los fragmentos y encola el procesamiento de la capa.
+        
+        POST /api/v1/geodata/uploads/{id}/complete/
+        """
+        from .tasks import process_layer_upload
+        
+        session = self.get_object()
+        # Reclamar la sesión antes de ensamblar: un complete repetido o
+        # concurrente recibe 409 en lugar de crear otra capa
+        if not self._claim(session, UploadSession.Status.PENDING, UploadSession.Status.ASSEMBLING):
+            return self._conflict(session)
+        
+        try:
+            file_path = uploads.assemble(session, Path(settings.GEODATA_UPLOAD_DIR) / 'assembled')
+        except uploads.ChunkError as e:
+            # Se puede reanudar: enviar los fragmentos que faltan y repetir complete
+            self._claim(session, UploadSession.Status.ASSEMBLING, UploadSession.Status.PENDING)
+            return Response({
+                'error': str(e),
+                'missing_chunks': uploads.missing_chunks(session),
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            self._claim(session, UploadSession.Status.ASSEMBLING, UploadSession.Status.PENDING)
+            raise
+        
+        uploads.discard(session)
+        
+        options = session.options or {}
+        if options.get('split_datasets') and session.filename.lower().endswith('.zip'):
+            session.status = UploadSession.Status.COMPLETED
+            session.save(update_fields=['status', 'updated_at'])
+            return enqueue_zip_upload(
+                request,
+                file_path,
+                session.filename,
+                dataset_name=options.get('dataset_name', ''),
+                options=options,
+                backend=options.get('ingest_backend')
+            )
+        
+        layer = Layer.objects.create(
+            name=options.get('name') or session.filename.rsplit('.', 1)[0],
+            description=options.get('description', ''),
+            geometry_type='GEOMETRY',
+            layer_type='vector',
+            srid=4326,
+            created_by=request.user,
+            feature_count=0,
+            original_filename=session.filename,
+            file_size=session.total_size,
+            is_public=options.get('is_public', False),
+            tags=options.get('tags', [])
+        )
+        
+        task = process_layer_upload.delay(
+            layer.id,
+            str(file_path),
+            session.filename,
+            request.user.id,
+            backend=options.get('ingest_backend')
+        )
+        
+        session.status = UploadSession.Status.COMPLETED
+        session.layer = layer
+        session.task_id = task.id or ''
+        session.save(update_fields=['status', 'layer', 'task_id', 'updated_at'])
+        
+        return Response({
+            'message': f'Archivo "{session.filename}" recibido, procesando capa',
+            'upload': self._session_data(session),
+            'task_id': task.id,
+            'layer': {
+                'id': layer.id,
+                'name': layer.name,
+            }
+        }, status=status.HTTP_202_ACCEPTED)
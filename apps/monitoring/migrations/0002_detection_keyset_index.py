@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("monitoring", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="detection",
+            index=models.Index(
+                fields=["created_at", "id"], name="monitoring_detection_keyset"
+            ),
+        ),
+    ]
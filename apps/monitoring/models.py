@@ -366,6 +366,7 @@ class Detection(BaseModel):
             models.Index(fields=['monitor', 'status']),
             models.Index(fields=['severity', 'status']),
             models.Index(fields=['detected_at']),
+            models.Index(fields=['created_at', 'id'], name='monitoring_detection_keyset'),
         ]
     
     def __str__(self):
@@ -37,6 +37,7 @@ from .tasks import (
     generate_monitoring_report
 )
 from apps.users.permissions import IsAnalystOrAbove
+from apps.core.pagination import KeysetPagination
 import logging
 
 logger = logging.getLogger(__name__)
@@ -300,6 +301,7 @@ class DetectionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_class = DetectionFilter
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         """Return detailed serializer for retrieve action."""
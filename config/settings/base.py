@@ -321,6 +321,11 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.agents.tasks.cleanup_old_executions',
         'schedule': crontab(hour=2, minute=0),  # Diario a las 2 AM
     },
+    # Geodata tasks
+    'cleanup-upload-sessions': {
+        'task': 'apps.geodata.tasks.cleanup_upload_sessions',
+        'schedule': crontab(minute=15),  # Cada hora, offset 15 min
+    },
 }
 
 # ============================================================================
@@ -342,4 +347,59 @@ CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Procesar una tarea a la vez
 GEODATA_ASYNC_THRESHOLD = 50 * 1024 * 1024  # 50MB
 
 # Directorio para uploads grandes
-GEODATA_UPLOAD_DIR = BASE_DIR / 'data' / 'uploads'
\ No newline at end of file
+GEODATA_UPLOAD_DIR = BASE_DIR / 'data' / 'uploads'
+# Backend de inserción de features: 'copy' (COPY FROM STDIN, solo PostgreSQL) u 'orm' (bulk_create)
+GEODATA_INGEST_BACKEND = config('GEODATA_INGEST_BACKEND', default='copy')
+
+# Features por bloque al leer archivos subidos (la memoria del worker depende de este valor, no del tamaño del archivo)
+GEODATA_READ_CHUNK_SIZE = config('GEODATA_READ_CHUNK_SIZE', default=20000, cast=int)
+
+# Segundos de debounce para agrupar refrescos de estadísticas de capa
+GEODATA_STATS_DEBOUNCE = config('GEODATA_STATS_DEBOUNCE', default=10, cast=int)
+
+# Filas por bloque del cursor en respuestas GeoJSON en streaming
+GEODATA_STREAM_CHUNK_SIZE = config('GEODATA_STREAM_CHUNK_SIZE', default=2000, cast=int)
+
+# Caché del GeoJSON simplificado por capa y zoom (segundos / tamaño máximo cacheable).
+# Con LocMemCache cada worker guarda su propia copia: subir el máximo solo con
+# una caché compartida (Redis, Memcached)
+GEODATA_GEOJSON_CACHE_TIMEOUT = config('GEODATA_GEOJSON_CACHE_TIMEOUT', default=3600, cast=int)
+GEODATA_GEOJSON_CACHE_MAX_BYTES = config('GEODATA_GEOJSON_CACHE_MAX_BYTES', default=1024 * 1024, cast=int)
+
+# Caché de teselas vectoriales: 'disk', 'redis' o 'none' (LRU acotado por GEODATA_TILE_CACHE_MAX_BYTES)
+GEODATA_TILE_CACHE_BACKEND = config('GEODATA_TILE_CACHE_BACKEND', default='disk')
+GEODATA_TILE_CACHE_DIR = config('GEODATA_TILE_CACHE_DIR', default=str(BASE_DIR / 'data' / 'tiles'))
+GEODATA_TILE_CACHE_REDIS_URL = config('GEODATA_TILE_CACHE_REDIS_URL', default='redis://localhost:6379/2')
+GEODATA_TILE_CACHE_MAX_BYTES = config('GEODATA_TILE_CACHE_MAX_BYTES', default=512 * 1024 * 1024, cast=int)
+# max-age de Cache-Control de las teselas (las revalidaciones usan ETag)
+GEODATA_TILE_MAX_AGE = config('GEODATA_TILE_MAX_AGE', default=0, cast=int)
+
+# Peticiones concurrentes por carga de servicios ArcGIS
+GEODATA_ARCGIS_MAX_WORKERS = config('GEODATA_ARCGIS_MAX_WORKERS', default=4, cast=int)
+
+# Filas por fetchmany del cursor del lado del servidor en cargas desde bases de datos externas
+GEODATA_DB_FETCH_SIZE = config('GEODATA_DB_FETCH_SIZE', default=5000, cast=int)
+# Engines (pools) de bases de datos externas por proceso; al superarlo se cierra el menos usado
+GEODATA_DB_ENGINE_CACHE_SIZE = config('GEODATA_DB_ENGINE_CACHE_SIZE', default=8, cast=int)
+
+# Tamaño máximo de archivos descargados por from-url
+GEODATA_URL_MAX_BYTES = config('GEODATA_URL_MAX_BYTES', default=1024 * 1024 * 1024, cast=int)
+
+# Subidas reanudables por fragmentos: tamaño de fragmento, tamaño máximo de archivo y horas de validez de la sesión
+GEODATA_UPLOAD_CHUNK_SIZE = config('GEODATA_UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+GEODATA_UPLOAD_MAX_SIZE = config('GEODATA_UPLOAD_MAX_SIZE', default=5 * 1024 * 1024 * 1024, cast=int)
+GEODATA_UPLOAD_SESSION_TTL_HOURS = config('GEODATA_UPLOAD_SESSION_TTL_HOURS', default=48, cast=int)
+
+# Etapa de geometrías de la ingesta: procesos para reproyectar/validar (0 = todos los núcleos)
+GEODATA_GEOMETRY_WORKERS = config('GEODATA_GEOMETRY_WORKERS', default=0, cast=int)
+# Reparar geometrías inválidas con make_valid (False: se descartan y se reportan)
+GEODATA_REPAIR_GEOMETRIES = config('GEODATA_REPAIR_GEOMETRIES', default=True, cast=bool)
+
+# Caché de geometrías por capa (WKB contiguo + índice, con memory-map) y capas abiertas por proceso
+GEODATA_GEOMETRY_CACHE_DIR = config('GEODATA_GEOMETRY_CACHE_DIR', default=str(BASE_DIR / 'data' / 'geometry_cache'))
+GEODATA_GEOMETRY_CACHE_MAX_OPEN = config('GEODATA_GEOMETRY_CACHE_MAX_OPEN', default=8, cast=int)
+
+# Exportación GeoPackage/FlatGeobuf: features escritos por transacción OGR
+GEODATA_EXPORT_TRANSACTION_SIZE = config('GEODATA_EXPORT_TRANSACTION_SIZE', default=20000, cast=int)
+# Segundos tras los que un job de exportación en curso se considera abandonado (deja de colapsar peticiones)
+GEODATA_EXPORT_JOB_TIMEOUT = config('GEODATA_EXPORT_JOB_TIMEOUT', default=3600, cast=int)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Benchmark de exportación a Shapefile: ruta anterior vs. exportador de una pasada.
+
+Uso:
+    python scripts/benchmark_export.py --rows 500000
+    python scripts/benchmark_export.py --rows 500000 --skip-legacy
+
+Inserta polígonos sintéticos con generate_series (PostgreSQL): uno de cada
+diez es un MultiPolygon y uno de cada cinco tiene un hueco. Todo ocurre en
+una transacción que se revierte al final. La ruta anterior (GEOSGeometry
+desde GeoJSON por feature, solo el anillo exterior) se reproduce aquí para
+comparar; además de filas/s se informa el pico de memoria del proceso.
+"""
+import argparse
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+django.setup()
+
+import shapefile
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection, transaction
+
+from apps.geodata.models import Layer, Feature
+from apps.geodata.exporters.shapefile import ShapefileExporter
+
+
+def populate(layer, rows):
+    """Inserta polígonos, multipolígonos y polígonos con hueco."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {Feature._meta.db_table}
+                (layer_id, geometry, properties, feature_id, content_hash, created_at, updated_at, is_active)
+            SELECT %s,
+                   CASE
+                       WHEN g %% 10 = 0 THEN ST_Multi(ST_Union(
+                           ST_MakeEnvelope(x, y, x + 0.001, y + 0.001, 4326),
+                           ST_MakeEnvelope(x + 0.002, y, x + 0.003, y + 0.001, 4326)))
+                       WHEN g %% 5 = 0 THEN ST_Difference(
+                           ST_MakeEnvelope(x, y, x + 0.001, y + 0.001, 4326),
+                           ST_MakeEnvelope(x + 0.0004, y + 0.0004, x + 0.0006, y + 0.0006, 4326))
+                       ELSE ST_MakeEnvelope(x, y, x + 0.001, y + 0.001, 4326)
+                   END,
+                   jsonb_build_object('codigo', 'P' || g, 'area_m2', random() * 5000,
+                                      'estrato', (g %% 6) + 1, 'urbano', g %% 2 = 0),
+                   'F' || g,
+                   '',
+                   now(),
+                   now(),
+                   true
+            FROM (
+                SELECT g, -79 + random() * 12 AS x, -4 + random() * 16 AS y
+                FROM generate_series(1, %s) AS g
+            ) AS s
+        """, [layer.id, rows])
+        cursor.execute(f'ANALYZE {Feature._meta.db_table}')
+    Layer.objects.filter(id=layer.id).update(feature_count=rows)
+    layer.refresh_from_db()
+
+
+def legacy_export(layer, output_dir):
+    """Ruta anterior: exists/first/count + GEOSGeometry(json) por feature."""
+    features = layer.features.filter(is_active=True)
+    features.exists()
+    first = features.first()
+    w = shapefile.Writer(os.path.join(output_dir, 'legacy'), shapeType=shapefile.POLYGON)
+    for k, v in first.properties.items():
+        if isinstance(v, int):
+            w.field(k[:10], 'N', size=19)
+        elif isinstance(v, float):
+            w.field(k[:10], 'F', size=19, decimal=8)
+        else:
+            w.field(k[:10], 'C', size=254)
+    w.field('feature_id', 'C', size=254)
+    for f in features:
+        g = GEOSGeometry(f.geometry.json)
+        if g.geom_type == 'Polygon':
+            w.poly([list(g[0].coords)])
+        else:
+            continue
+        w.record(*[f.properties.get(k, '') for k in first.properties], f.feature_id or '')
+    w.close()
+    features.count()
+    features.count()
+
+
+def timed(label, rows, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"   {label:<26} {elapsed:8.2f} s  {rows / elapsed:12,.0f} filas/s  pico RSS {peak:8.0f} MB")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--chunk-size', type=int, default=None)
+    parser.add_argument('--skip-legacy', action='store_true', help='Medir solo el exportador nuevo')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK DE EXPORTACIÓN SHAPEFILE - {args.rows:,} features")
+    print("=" * 80)
+
+    output_dir = tempfile.mkdtemp(prefix='smgi_bench_')
+    try:
+        with transaction.atomic():
+            layer = Layer.objects.create(name='benchmark_export', geometry_type='POLYGON')
+            populate(layer, args.rows)
+
+            # El exportador nuevo primero: el pico de RSS es acumulativo
+            exporter = ShapefileExporter(output_dir=output_dir, chunk_size=args.chunk_size)
+            new_time = timed('una pasada + WKB', args.rows, lambda: exporter.write_shapefile(
+                layer, layer.features.filter(is_active=True), os.path.join(output_dir, 'single_pass')
+            ))
+
+            if not args.skip_legacy:
+                legacy_time = timed('GEOSGeometry(json) (ant.)', args.rows, lambda: legacy_export(layer, output_dir))
+                print(f"\n   Aceleración: {legacy_time / new_time:.1f}x "
+                      f"(la ruta anterior omite los multipolígonos y los huecos)")
+
+            transaction.set_rollback(True)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Benchmark de ingesta de features: ruta iterrows() vs. motor columnar.
+
+Uso:
+    python scripts/benchmark_ingest.py --rows 200000
+    python scripts/benchmark_ingest.py --rows 50000 --with-db
+
+Sin --with-db solo se mide la construcción de instancias Feature
+(conversión de propiedades + geometrías); con --with-db se incluye el
+bulk_create dentro de una transacción que se revierte al final.
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+django.setup()
+
+import numpy as np
+import geopandas as gpd
+from shapely.geometry import Polygon
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import transaction
+
+from apps.geodata.models import Layer, Feature
+from apps.geodata.ingest import FeatureIngestor
+
+
+def build_frame(rows):
+    """Genera un GeoDataFrame sintético de polígonos tipo catastro."""
+    rng = np.random.default_rng(42)
+    x = rng.uniform(-79.0, -67.0, rows)
+    y = rng.uniform(-4.0, 12.0, rows)
+    geoms = [
+        Polygon([(a, b), (a + 0.001, b), (a + 0.001, b + 0.001), (a, b + 0.001)])
+        for a, b in zip(x, y)
+    ]
+    area = rng.uniform(10, 5000, rows)
+    area[rng.random(rows) < 0.05] = np.nan
+    return gpd.GeoDataFrame({
+        'codigo': [f'P{i:08d}' for i in range(rows)],
+        'area_m2': area,
+        'estrato': rng.integers(1, 7, rows),
+        'urbano': rng.random(rows) < 0.5,
+    }, geometry=geoms, crs='EPSG:4326')
+
+
+def legacy_build(layer, gdf):
+    """Ruta anterior: iterrows() + WKT + coerción celda a celda."""
+    features = []
+    columns = [col for col in gdf.columns if col != 'geometry']
+    for idx, row in gdf.iterrows():
+        if row.geometry is None or row.geometry.is_empty:
+            continue
+        props = {}
+        for col in columns:
+            val = row[col]
+            if hasattr(val, 'item'):
+                val = val.item()
+            if val != val:
+                val = None
+            if val is not None and not isinstance(val, (str, int, float, bool, list, dict)):
+                val = str(val)
+            props[col] = val
+        geom = GEOSGeometry(row.geometry.wkt, srid=4326)
+        features.append(Feature(layer=layer, geometry=geom, properties=props))
+    return features
+
+
+def columnar_build(layer, gdf, batch_size):
+    """Ruta nueva: FeatureIngestor.build_features por lotes."""
+    ingestor = FeatureIngestor(layer, batch_size=batch_size)
+    features = []
+    for start in range(0, len(gdf), batch_size):
+        batch, _ = ingestor.build_features(gdf.iloc[start:start + batch_size])
+        features.extend(batch)
+    return features
+
+
+def timed(label, rows, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<22} {elapsed:8.2f} s  {rows / elapsed:12,.0f} filas/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--with-db', action='store_true', help='Incluir bulk_create (transacción revertida)')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK DE INGESTA - {args.rows:,} polígonos")
+    print("=" * 80)
+
+    gdf = build_frame(args.rows)
+
+    if args.with_db:
+        with transaction.atomic():
+            layer = Layer.objects.create(name='benchmark_ingest', geometry_type='POLYGON')
+
+            def legacy():
+                Feature.objects.bulk_create(legacy_build(layer, gdf), batch_size=args.batch_size)
+
+            def columnar():
+                FeatureIngestor(layer, batch_size=args.batch_size).ingest(gdf)
+
+            legacy_time = timed('iterrows + WKT', args.rows, legacy)
+            columnar_time = timed('columnar + WKB', args.rows, columnar)
+            transaction.set_rollback(True)
+    else:
+        layer = Layer(id=0, name='benchmark_ingest')
+        legacy_time = timed('iterrows + WKT', args.rows, lambda: legacy_build(layer, gdf))
+        columnar_time = timed('columnar + WKB', args.rows, lambda: columnar_build(layer, gdf, args.batch_size))
+
+    print(f"\n   Aceleración: {legacy_time / columnar_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Benchmark de paginación: OFFSET + COUNT(*) vs. keyset (cursor).
+
+Uso:
+    python scripts/benchmark_pagination.py --rows 1000000
+    python scripts/benchmark_pagination.py --rows 200000 --page-size 50
+
+Inserta features sintéticos con generate_series (PostgreSQL) dentro de una
+transacción que se revierte al final, y mide la latencia de una página a
+distintas profundidades con PageNumberPagination (OFFSET + COUNT) y con
+KeysetPagination (cursor, sin total y con ?count=approximate).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+django.setup()
+
+from django.db import connection, transaction
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.core.pagination import KeysetPagination, encode_cursor
+from apps.geodata.models import Layer, Feature
+
+factory = APIRequestFactory()
+
+
+def populate(layer, rows):
+    """Inserta filas sintéticas con created_at decreciente y actualiza estadísticas."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {Feature._meta.db_table}
+                (layer_id, geometry, properties, feature_id, created_at, updated_at, is_active)
+            SELECT %s,
+                   ST_SetSRID(ST_MakePoint(-79 + random() * 12, -4 + random() * 16), 4326),
+                   jsonb_build_object('n', g),
+                   '',
+                   now() - (g || ' seconds')::interval,
+                   now(),
+                   true
+            FROM generate_series(1, %s) AS g
+        """, [layer.id, rows])
+        cursor.execute(f'ANALYZE {Feature._meta.db_table}')
+
+
+def timed(func, repeat):
+    """Mediana de varias ejecuciones en milisegundos."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def offset_page(queryset, page, page_size):
+    paginator = PageNumberPagination()
+    paginator.page_size = page_size
+    request = Request(factory.get('/', {'page': page}))
+    list(paginator.paginate_queryset(queryset, request))
+
+
+def keyset_page(queryset, cursor, page_size, count_mode):
+    paginator = KeysetPagination()
+    params = {'page_size': page_size, 'count': count_mode}
+    if cursor:
+        params['cursor'] = cursor
+    request = Request(factory.get('/', params))
+    paginator.paginate_queryset(queryset, request)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit('Este benchmark requiere PostgreSQL/PostGIS')
+
+    print("=" * 80)
+    print(f"BENCHMARK DE PAGINACIÓN - {args.rows:,} features, {args.page_size} por página")
+    print("=" * 80)
+
+    with transaction.atomic():
+        layer = Layer.objects.create(name='benchmark_pagination', geometry_type='POINT')
+
+        start = time.perf_counter()
+        populate(layer, args.rows)
+        print(f"\n   Datos generados en {time.perf_counter() - start:.1f}s")
+
+        queryset = Feature.objects.filter(layer=layer, is_active=True)
+        depths = [d for d in (0, 1000, 10000, 100000, 500000, args.rows - args.page_size)
+                  if 0 <= d < args.rows]
+
+        print(f"\n   {'Profundidad':>12} {'OFFSET+COUNT':>14} {'Keyset':>10} {'Keyset+aprox':>14}")
+        print("   " + "-" * 54)
+
+        for depth in depths:
+            page = depth // args.page_size + 1
+
+            # Cursor equivalente a la página: clave de la última fila anterior
+            cursor = None
+            if depth:
+                last = queryset.order_by('-created_at', '-id').values_list('created_at', 'id')[depth - 1]
+                cursor = encode_cursor(*last)
+
+            offset_ms = timed(lambda: offset_page(queryset.order_by('-created_at', '-id'), page, args.page_size), args.repeat)
+            keyset_ms = timed(lambda: keyset_page(queryset, cursor, args.page_size, 'none'), args.repeat)
+            approx_ms = timed(lambda: keyset_page(queryset, cursor, args.page_size, 'approximate'), args.repeat)
+
+            print(f"   {depth:>12,} {offset_ms:>12.1f}ms {keyset_ms:>8.1f}ms {approx_ms:>12.1f}ms")
+
+        transaction.set_rollback(True)
+
+    print("\n   Keyset debe mantenerse plano con la profundidad; OFFSET crece linealmente.")
+
+
+if __name__ == '__main__':
+    main()